@@ -0,0 +1,99 @@
+"""
+Benchmark for the appmanifest reader.
+
+Compares `vdf.load`, which builds the whole document, with the streaming
+`read_manifest_fields()` reader used by game discovery, on a realistic
+manifest with large `InstalledDepots`, `UserConfig` and `MountedDepots`
+blocks. Both the time per manifest and the peak memory are reported.
+
+Usage:
+    python benchmarks/bench_acf_reader.py [--depots N] [--iterations I]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import vdf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from offbgamessettings.game_discovery import read_manifest_fields  # noqa: E402
+
+
+def build_manifest(path, depots):
+    """Writes a manifest laid out like the ones written by Steam."""
+    depot_block = {
+        str(365960 + i): {"manifest": str(10**17 + i), "size": str(10**9)}
+        for i in range(depots)
+    }
+    acf = {
+        "AppState": {
+            "appid": "365960",
+            "Universe": "1",
+            "LauncherPath": "C:\\Program Files (x86)\\Steam\\steam.exe",
+            "name": "rFactor 2",
+            "StateFlags": "4",
+            "installdir": "rFactor 2",
+            "LastUpdated": "1700000000",
+            "SizeOnDisk": "25000000000",
+            "buildid": "12345678",
+            "InstalledDepots": depot_block,
+            "SharedDepots": {str(228980 + i): "228980" for i in range(depots)},
+            "UserConfig": {"language": "english", "BetaKey": "public"},
+            "MountedConfig": {"language": "english"},
+            "MountedDepots": {k: v["manifest"] for k, v in depot_block.items()},
+        }
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        vdf.dump(acf, f, pretty=True)
+
+
+def load_with_vdf(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = vdf.load(f)["AppState"]
+    return {"name": data.get("name"), "installdir": data.get("installdir")}
+
+
+def measure(func, path, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(path)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depots", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "appmanifest_365960.acf")
+        build_manifest(path, args.depots)
+        size = os.path.getsize(path)
+        assert load_with_vdf(path).items() <= read_manifest_fields(path).items()
+
+        vdf_time, vdf_peak = measure(load_with_vdf, path, args.iterations)
+        stream_time, stream_peak = measure(read_manifest_fields, path, args.iterations)
+
+    print(f"manifest: {size / 1024:.1f} KiB, {args.depots} depots")
+    print(f"{'reader':<22}{'time/manifest':>16}{'peak memory':>14}")
+    print(f"{'vdf.load':<22}{vdf_time * 1e6:>13.1f} us{vdf_peak / 1024:>11.1f} KiB")
+    print(
+        f"{'read_manifest_fields':<22}{stream_time * 1e6:>13.1f} us"
+        f"{stream_peak / 1024:>11.1f} KiB"
+    )
+    print(f"speed-up: {vdf_time / stream_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark for the Steam library scan.
+
+Builds a synthetic Steam installation with several libraries and compares a
+sequential scan (`max_workers=1`) against the concurrent scan used by
+default. Real rigs keep libraries on disks of very different speeds; this is
+simulated by adding a fixed access latency to every other library.
+
+Usage:
+    python benchmarks/bench_library_scan.py [--libraries N] [--manifests M]
+                                            [--latency-ms MS] [--repeat R]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import vdf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from offbgamessettings import game_discovery  # noqa: E402
+
+
+def build_tree(root, libraries, manifests):
+    """Creates a Steam root with `libraries` libraries of `manifests` games."""
+    app_ids = list(game_discovery.SIM_RACING_APP_IDS)
+    steam = os.path.join(root, "Steam")
+    library_paths = [steam] + [
+        os.path.join(root, f"Library{i}") for i in range(1, libraries)
+    ]
+    for index, library in enumerate(library_paths):
+        steamapps = os.path.join(library, "steamapps")
+        os.makedirs(os.path.join(steamapps, "common"), exist_ok=True)
+        for i in range(manifests):
+            # One sim racing game per library, the rest are unrelated apps
+            app_id = app_ids[index % len(app_ids)] if i == 0 else str(10_000 + i)
+            installdir = f"game_{index}_{i}"
+            os.makedirs(os.path.join(steamapps, "common", installdir))
+            acf = {
+                "AppState": {
+                    "appid": app_id,
+                    "name": f"Game {index}/{i}",
+                    "installdir": installdir,
+                }
+            }
+            path = os.path.join(steamapps, f"appmanifest_{app_id}.acf")
+            with open(path, "w", encoding="utf-8") as f:
+                vdf.dump(acf, f, pretty=True)
+
+    folders = {
+        "libraryfolders": {str(i): {"path": p} for i, p in enumerate(library_paths)}
+    }
+    with open(
+        os.path.join(steam, "steamapps", "libraryfolders.vdf"), "w", encoding="utf-8"
+    ) as f:
+        vdf.dump(folders, f, pretty=True)
+    return steam
+
+
+def timed(max_workers, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        game_discovery.get_sim_racing_game_folders(max_workers=max_workers)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--libraries", type=int, default=6)
+    parser.add_argument("--manifests", type=int, default=200)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=50.0,
+        help="Simulated access latency of the slow libraries.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        steam = build_tree(root, args.libraries, args.manifests)
+        game_discovery.find_steam_path = lambda: steam
+
+        # Every other library is on a "slow disk" (e.g. a USB drive spinning up)
+        scan_library = game_discovery._scan_library
+
+        def slow_scan_library(library_path, cached_library=None):
+            suffix = os.path.basename(library_path)[len("Library") :]
+            if suffix.isdigit() and int(suffix) % 2:
+                time.sleep(args.latency_ms / 1000)
+            return scan_library(library_path, cached_library)
+
+        game_discovery._scan_library = slow_scan_library
+
+        sequential = timed(1, args.repeat)
+        parallel = timed(game_discovery.DEFAULT_SCAN_WORKERS, args.repeat)
+
+    print(
+        f"{args.libraries} libraries x {args.manifests} manifests, "
+        f"{args.latency_ms:g} ms access latency on slow libraries"
+    )
+    print(f"sequential: {sequential * 1000:8.2f} ms")
+    print(f"parallel:   {parallel * 1000:8.2f} ms")
+    print(f"speed-up:   {sequential / parallel:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark for the "already configured" probes.
+
+Compares the full parse (`ET.parse` + `.//device` search for DiRT,
+`json.load` for rFactor 2) with the memory-mapped byte-level `probe()` of
+the configurators, on already configured files of growing size. This is the
+common case on re-runs.
+
+Usage:
+    python benchmarks/bench_probe.py [--sizes N [N ...]] [--iterations I]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from offbgamessettings.game_configurators.dirt_wrc_configurator import (  # noqa: E402
+    OPENFFBOARD_DEVICE_ID,
+    DirtWrcConfigurator,
+)
+from offbgamessettings.game_configurators.rfactor2_configurator import (  # noqa: E402
+    Rfactor2Configurator,
+)
+
+
+def build_dirt(root, size):
+    """Creates a configured DiRT Rally 2.0 install with `size` devices."""
+    devices = os.path.join(root, "dirt", "input", "devices")
+    actionmaps = os.path.join(root, "dirt", "input", "actionmaps")
+    os.makedirs(devices)
+    os.makedirs(actionmaps)
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', "<devices>"]
+    for i in range(size):
+        lines.append(
+            f'  <device id="{{{i:08X}-0000-0000-0000-504944564944}}" '
+            f'name="wheel_{i}" priority="100" type="wheel" official="true" />'
+        )
+    lines.append(f'  <device id="{OPENFFBOARD_DEVICE_ID}" name="openffboard" />')
+    lines.append("</devices>")
+    path = os.path.join(devices, "device_defines.xml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    with open(os.path.join(actionmaps, "openffboard.xml"), "w") as f:
+        f.write("<action_map />")
+    return DirtWrcConfigurator("690790", "DiRT Rally 2.0", os.path.join(root, "dirt"))
+
+
+def build_rfactor2(root, size):
+    """Creates a configured rFactor 2 profile with `size` other keys."""
+    player = os.path.join(root, "rf2", "UserData", "player")
+    os.makedirs(player)
+    data = {f"Controller setting {i}": i * 1.5 for i in range(size)}
+    data["Steering effects strength"] = -8000
+    with open(os.path.join(player, "Controller.JSON"), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return Rfactor2Configurator("365960", "rFactor 2", os.path.join(root, "rf2"))
+
+
+def full_dirt(configurator):
+    root = ET.parse(configurator.managed_files()[0]).getroot()
+    return bool(root.findall(f".//device[@id='{OPENFFBOARD_DEVICE_ID}']"))
+
+
+def full_rfactor2(configurator):
+    with open(configurator.managed_files()[0], "r", encoding="utf-8") as f:
+        return json.load(f)["Steering effects strength"] < 0
+
+
+def timed(func, configurator, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        assert func(configurator)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'file':<22}{'size':>10}{'full parse':>14}{'probe':>12}{'speed-up':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            for name, build, full in (
+                ("device_defines.xml", build_dirt, full_dirt),
+                ("Controller.JSON", build_rfactor2, full_rfactor2),
+            ):
+                configurator = build(root, size)
+                full_time = timed(full, configurator, args.iterations)
+                probe_time = timed(
+                    type(configurator).probe, configurator, args.iterations
+                )
+                path = configurator.managed_files()[0]
+                print(
+                    f"{name:<22}{os.path.getsize(path) / 1024:>7.0f} KiB"
+                    f"{full_time * 1e6:>11.1f} us{probe_time * 1e6:>9.1f} us"
+                    f"{full_time / probe_time:>9.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark for the result model.
+
+Builds the results of a large fleet run twice: as plain dictionaries with
+messages formatted up front (the former shape), and as `GameResult` and
+`LogEntry` objects with interned templates formatted lazily. The memory
+retained per 10,000 results is reported.
+
+Usage:
+    python benchmarks/bench_results.py [--results N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from offbgamessettings.results import GameResult, LogEntry, Status  # noqa: E402
+
+# Log entries of a typical DiRT run
+DEVICES, ACTION_MAP = "device_defines.xml", "openffboard.xml"
+
+
+def build_dicts(count):
+    return [
+        {
+            "status": "OK",
+            "logs": [
+                {
+                    "status": "OK",
+                    "message": (
+                        f"OpenFFBoard device is already configured in {DEVICES}."
+                    ),
+                },
+                {
+                    "status": "OK",
+                    "message": f"Action map file {ACTION_MAP} already exists.",
+                },
+                {"status": "INFO", "message": f"Backup of {DEVICES} created."},
+            ],
+        }
+        for _ in range(count)
+    ]
+
+
+def build_results(count):
+    return [
+        GameResult(
+            Status.OK,
+            [
+                LogEntry(
+                    "OK",
+                    "{} is already configured in {}.",
+                    "OpenFFBoard device",
+                    DEVICES,
+                ),
+                LogEntry("OK", "{} {} already exists.", "Action map file", ACTION_MAP),
+                LogEntry("INFO", "Backup of {} created.", DEVICES),
+            ],
+        )
+        for _ in range(count)
+    ]
+
+
+def retained(build, count):
+    """Returns the memory retained by the built results, in bytes."""
+    tracemalloc.start()
+    results = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--results", type=int, default=10000)
+    args = parser.parse_args()
+
+    per_10k = 10000 / args.results
+    dicts = retained(build_dicts, args.results) * per_10k
+    objects = retained(build_results, args.results) * per_10k
+    print(f"{'model':<14}{'per 10k results':>18}")
+    print(f"{'dict':<14}{dicts / 2**20:>14.2f} MiB")
+    print(f"{'GameResult':<14}{objects / 2**20:>14.2f} MiB")
+    print(f"saved: {(dicts - objects) / 2**20:.2f} MiB ({1 - objects / dicts:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,43 @@ reverting settings for sim racing games.
 The organization is as follows:
 - `game_discovery.py`: Detects installed games.
 - `config_orchestrator.py`: Orchestrates the configuration process.
-- `console_ui.py`: Manages console display.
-- `utils.py`: Provides utility functions (e.g., backup).
+- `console_ui.py`: Manages console display (progressive, buffered result tables).
+- `output.py`: Streams machine-readable records (NDJSON, JSON).
+- `metrics.py`: Writes Prometheus metrics of a run (`--metrics-file`).
+- `backup_store.py`: Keeps backups of the modified game files.
+- `results.py`: Compact result model (statuses, lazily formatted logs).
+- `ledger.py`: Records the configured state of each game between runs.
+- `watcher.py`: Re-applies the configuration when game files change.
+- `transaction.py`: Journaled, all-or-nothing writes of the files of a game.
+- `utils.py`: Provides utility functions (e.g., atomic writes).
+- `json_patch.py`: Rewrites individual JSON values in place.
+- `xml_splice.py`: Patches XML files without re-serializing them.
+- `ini_patch.py`: Rewrites individual INI values in place.
+- `synthetic_steam.py`: Generates synthetic Steam installations.
+- `benchmark.py`: Times the workflows on them (`bench` command).
+- `tracing.py`: Span tracing of the hot paths (`--profile`).
 - `game_configurators/`: A sub-package containing game-specific logic.
+
+Importing the package is cheap: the discovery functions (and `vdf`) are
+only imported the first time they are used, so that commands such as
+`--help` or `status` start quickly.
 """
 
 __version__ = "0.0.1"
 
-from .game_discovery import get_sim_racing_game_folders
-
 # __all__ defines the public API of the package.
-# Only get_sim_racing_game_folders is exposed during a `*` import.
-__all__ = ["get_sim_racing_game_folders"]
+# Only the discovery functions are exposed during a `*` import.
+__all__ = ["get_sim_racing_game_folders", "iter_sim_racing_games"]
+
+
+def __getattr__(name):
+    """Imports the public discovery functions on first access."""
+    if name in __all__:
+        from . import game_discovery
+
+        return getattr(game_discovery, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -6,35 +6,118 @@ orchestrating the main workflow of the application.
 
 Workflow:
 1.  **Argument Parsing**: Uses `argparse` to handle options
-    like `--verbose` and `--revert`.
+    like `--verbose`, `--revert` (optionally `--to TIMESTAMP`), `--jobs`,
+    `--watch` and the discovery cache flags (`--no-cache`,
+    `--rebuild-cache`).
 2.  **Header Display**: Displays a welcome banner.
 3.  **Game Discovery**: Calls functions from `game_discovery` to
-    find the Steam installation and relevant games.
+    find the Steam installation and relevant games. Discovery is streamed
+    into the next step, so the first games are configured while the
+    remaining libraries are still being scanned.
 4.  **Action Execution**:
+    - If `--dry-run` is used, it asks `config_orchestrator` for the plan
+      of changes and displays it, without modifying anything.
     - If `--revert` is used, it asks `config_orchestrator` to revert
       the configurations.
-    - Otherwise, it asks to check and apply the configurations.
+    - Otherwise, it asks to check and apply the configurations. Questions
+      are answered in one batch, or from a policy (`--yes`, `--no`,
+      `--policy FILE`) for unattended runs.
 5.  **Result Display**: Uses `console_ui` to display a summary
-    table and detailed logs (depending on the `--verbose` option).
+    table and detailed logs (depending on the `--verbose` option). With
+    `--output ndjson` or `--output json`, a machine-readable record is also
+    written for each game as soon as it is processed (see the `output`
+    module), to the standard output or to `--output-file`. When the records
+    go to the standard output, the human-readable text goes to the standard
+    error instead.
+6.  **Watch Mode** (`--watch`): Keeps watching the game files and
+    re-applies the configuration of the games that a Steam update
+    overwrote (see the `watcher` module).
+
+With `--metrics-file PATH`, the results and timings of the run are also
+written as Prometheus metrics, for the node_exporter textfile collector
+(see the `metrics` module).
+
+With `--profile FILE`, the hot paths of the run are traced (see the
+`tracing` module) and the trace is written to FILE in the Chrome trace
+format, optionally with the peak memory of each span (`--profile-memory`).
+
+Unchanged games (see the `ledger` module) are skipped, unless `--force` is
+used. The files of each game are written in a journaled transaction (see
+the `transaction` module); a transaction interrupted by a crash is rolled
+back at the start of the next local run.
+
+Subcommands:
+-   `fleet --root DIR...`: Runs the same workflow against many explicit
+    Steam roots in parallel worker processes (see the `fleet` module) and
+    displays a merged report.
+-   `status`: Tells whether the rig is configured, from the ledger only,
+    with an exit code suited to monitoring checks.
+-   `bench`: Times discovery, check, apply and revert on synthetic Steam
+    installations at several scales (see the `benchmark` module), and
+    compares the timings with a baseline report.
+
+Startup time: only `argparse` and `console_ui` are imported up front. The
+modules needed by each workflow (discovery, configurators, process pools,
+watchers...) are imported by the functions that run it, so that `--help`,
+`status` or a run without any game do not pay for them.
 """
 import argparse
+import sys
 
-from offbgamessettings import config_orchestrator, console_ui
-from offbgamessettings.game_discovery import (
-    find_steam_path,
-    get_sim_racing_game_folders,
-)
+from offbgamessettings import console_ui
 
 
-def main():
+def _timestamp(value):
     """
-    Entry point for the command-line interface.
-    Finds and configures sim racing games for OpenFFBoard.
+    Parses the `--to` option.
+
+    Args:
+        value (str): The value given on the command line.
+
+    Returns:
+        float: The Unix timestamp.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a point in time.
+    """
+    from offbgamessettings.backup_store import parse_timestamp
+
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid point in time: {value!r}")
+
+
+def _positive_int(value):
+    """
+    Parses an option that must be a positive integer (e.g. `--jobs`).
+
+    Args:
+        value (str): The value given on the command line.
+
+    Returns:
+        int: The value.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value!r}")
+    return number
+
+
+def _add_action_arguments(parser, jobs_help):
+    """
+    Adds the options shared by the local and fleet modes to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to extend.
+        jobs_help (str): The help text of the `--jobs` option.
     """
-    # Set up the argument parser for the command line
-    parser = argparse.ArgumentParser(
-        description="Game configuration utility for OpenFFBoard"
-    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -49,9 +132,528 @@ def main():
         action="store_true",
         help="Restores the original game configuration files from backups.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--to",
+        dest="revert_to",
+        type=_timestamp,
+        metavar="TIMESTAMP",
+        help=(
+            "With --revert, restores the newest backups taken at or before "
+            "TIMESTAMP (ISO 8601 date/time in local time, or Unix time) "
+            "instead of the original files."
+        ),
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help=(
+            "Shows the changes that would be made, with diffs, without "
+            "writing or backing up anything."
+        ),
+    )
+    parser.add_argument("-j", "--jobs", type=_positive_int, metavar="N", help=jobs_help)
+    decision_group = parser.add_mutually_exclusive_group()
+    decision_group.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="Accepts every proposed change without asking.",
+    )
+    decision_group.add_argument(
+        "-n",
+        "--no",
+        action="store_true",
+        help="Declines every change that needs confirmation, without asking.",
+    )
+    decision_group.add_argument(
+        "--policy",
+        metavar="FILE",
+        help="Answers the confirmation questions from a JSON policy file.",
+    )
+    parser.add_argument(
+        "--output",
+        choices=("text", "ndjson", "json"),
+        default="text",
+        help=(
+            "Also writes a machine-readable record for each game as soon as "
+            "it is processed (default: text only)."
+        ),
+    )
+    parser.add_argument(
+        "--output-file",
+        metavar="PATH",
+        help="Writes the records to PATH instead of the standard output.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help=(
+            "Traces the run and writes the trace to FILE (Chrome trace format, "
+            "for Perfetto or chrome://tracing)."
+        ),
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help=(
+            "With --profile, also records the peak memory of each span "
+            "(slows the run down)."
+        ),
+    )
+
+
+def _build_parser():
+    """
+    Builds the command-line argument parser.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    # Set up the argument parser for the command line
+    parser = argparse.ArgumentParser(
+        description="Game configuration utility for OpenFFBoard"
+    )
+    _add_action_arguments(
+        parser, "Runs up to N game configurators concurrently (default: 1)."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Scans the Steam libraries without reading or updating the cache.",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Ignores the existing discovery cache and rebuilds it from scratch.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Checks every game, even those unchanged since the last run.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help=(
+            "Writes Prometheus metrics of the run to PATH (text exposition "
+            "format, e.g. for the node_exporter textfile collector)."
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keeps running after the configuration, and re-applies it when a "
+            "game update overwrites the game files. Stop with Ctrl+C."
+        ),
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    fleet_parser = subparsers.add_parser(
+        "fleet",
+        help="Configures many offline Steam installations in parallel.",
+        description=(
+            "Runs discovery and configuration against explicit Steam roots "
+            "(e.g. mounted disk images), in parallel worker processes."
+        ),
+    )
+    fleet_parser.add_argument(
+        "--root",
+        dest="roots",
+        nargs="+",
+        action="extend",
+        required=True,
+        metavar="DIR",
+        help="A Steam root folder (the folder containing `steamapps`).",
+    )
+    _add_action_arguments(
+        fleet_parser,
+        "Processes up to N Steam roots at once (default: number of CPUs).",
+    )
+
+    subparsers.add_parser(
+        "status",
+        help="Tells whether this rig is configured, from the last runs.",
+        description=(
+            "Checks the games recorded in the configuration ledger, without "
+            "scanning the Steam libraries. Exit code: 0 if every game is "
+            "configured, 1 if a game needs a new run, 2 if nothing has been "
+            "recorded yet."
+        ),
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Measures the performance on synthetic Steam installations.",
+        description=(
+            "Generates synthetic Steam installations and times discovery, "
+            "check, apply and revert on them. Exit code: 1 if a phase is "
+            "slower than in the baseline, 0 otherwise."
+        ),
+    )
+    bench_parser.add_argument(
+        "--scale",
+        dest="scales",
+        nargs="+",
+        choices=("small", "medium", "large"),
+        default=["small", "medium"],
+        metavar="SCALE",
+        help="The scales to run: small, medium or large (default: small medium).",
+    )
+    bench_parser.add_argument(
+        "--repeat",
+        type=_positive_int,
+        default=10,
+        metavar="N",
+        help="Runs each scale N times (default: 10).",
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="Compares the timings with a report saved with --save.",
+    )
+    bench_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        metavar="RATIO",
+        help=(
+            "The allowed slowdown of the median of each phase against the "
+            "baseline (default: 0.25, i.e. 25%%)."
+        ),
+    )
+    bench_parser.add_argument(
+        "--save",
+        metavar="FILE",
+        help="Saves the report as JSON, e.g. to use it as a baseline later.",
+    )
+    return parser
+
+
+def _load_policy(args):
+    """
+    Builds the decision policy requested on the command line.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        DecisionPolicy or None: The policy, or None if the user is to be
+                                asked.
+
+    Raises:
+        OSError: If the policy file cannot be read.
+        ValueError: If the policy file is invalid.
+    """
+    if not (args.yes or args.no or args.policy):
+        return None
+
+    from offbgamessettings.decisions import DecisionPolicy
+
+    if args.yes or args.no:
+        return DecisionPolicy(default=args.yes)
+    return DecisionPolicy.from_file(args.policy)
+
+
+def _human_output(writer):
+    """
+    Returns the context in which the human-readable text is displayed: it
+    is sent to the standard error when the records use the standard output.
+
+    Args:
+        writer (RecordWriter or None): The machine-readable output.
+    """
+    import contextlib
+
+    if writer is not None and writer.stream is sys.stdout:
+        return contextlib.redirect_stdout(sys.stderr)
+    return contextlib.nullcontext()
+
+
+def _callbacks(*callbacks):
+    """
+    Combines result callbacks into one.
+
+    Args:
+        *callbacks (callable or None): The callbacks (None values are
+                                       ignored).
+
+    Returns:
+        callable or None: A callback calling each of them in turn, or None if
+                          there are none.
+    """
+    callbacks = [callback for callback in callbacks if callback is not None]
+    if not callbacks:
+        return None
+    if len(callbacks) == 1:
+        return callbacks[0]
+
+    def combined(*args):
+        for callback in callbacks:
+            callback(*args)
+
+    return combined
+
+
+def _run_fleet(args, policy, writer=None):
+    """
+    Runs the fleet mode and displays the merged report. The row of each
+    Steam root is displayed as soon as it is processed.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        policy (DecisionPolicy or None): The decision policy.
+        writer (RecordWriter, optional): Receives the record of each game.
+    """
+    console_ui.print_header("Fleet configuration for OpenFFBoard")
+
+    if args.dry_run:
+        action = "plan"
+    elif args.revert:
+        action = "revert"
+    else:
+        action = "configure"
+
+    from offbgamessettings import fleet
+
+    table = console_ui.fleet_table(args.roots)
+
+    def show_root(root, report):
+        table.add(root, report["status"], len(report["games"]))
+
+    try:
+        report = fleet.run_fleet(
+            args.roots,
+            action=action,
+            policy=policy,
+            max_workers=args.jobs,
+            timestamp=args.revert_to,
+            on_report=_callbacks(
+                writer.write_root_report if writer else None, show_root
+            ),
+            records=writer is not None,
+        )
+    finally:
+        table.close()
+    console_ui.print_fleet_details(report, verbose=args.verbose)
+    if args.dry_run:
+        console_ui.print_plan(
+            {
+                f"{root} / {game}": game_data
+                for root, data in report.items()
+                for game, game_data in data["games"].items()
+            }
+        )
+    console_ui.print_header("Process finished")
+
+
+def _run_watch(args, games, run_ledger, policy, on_result=None, metrics=None):
+    """
+    Watches the configured games until interrupted, displaying the result of
+    each new configuration run.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        games (dict): The discovered games, keyed by AppID.
+        run_ledger (Ledger): The configuration ledger.
+        policy (DecisionPolicy or None): The decision policy.
+        on_result (callable, optional): Receives the result of each game.
+        metrics (MetricsCollector, optional): The metrics of the session,
+                                              written after each run.
+    """
+
+    def show(results):
+        console_ui.print_header("Game files changed")
+        console_ui.print_summary_table(results)
+        console_ui.print_details(results, verbose=args.verbose)
+        if metrics is not None:
+            _write_metrics(args.metrics_file, metrics)
+
+    console_ui.print_header("Watching game files")
+    console_ui.print_status(
+        "INFO",
+        "Configurations are re-applied after game updates. Press Ctrl+C to stop.",
+    )
+    from offbgamessettings import watcher
+    from offbgamessettings.transaction import default_journal_dir
+
+    try:
+        watcher.watch_games(
+            games,
+            run_ledger,
+            policy=policy,
+            on_results=show,
+            on_result=on_result,
+            journal_dir=default_journal_dir(),
+        )
+    except KeyboardInterrupt:
+        console_ui.print_status("INFO", "Stopped watching.")
+
+
+def _run_status():
+    """
+    Displays the configuration state recorded in the ledger.
+
+    Returns:
+        int: The exit code: 0 if every recorded game is configured, 1 if a
+             game needs a new run, 2 if the ledger is empty.
+    """
+    from offbgamessettings import ledger
+
+    report = ledger.Ledger.load(ledger.default_ledger_path()).status()
+    if not report:
+        console_ui.print_status(
+            "WARNING", "No configuration recorded yet. Run the tool first."
+        )
+        return 2
+
+    console_ui.print_ledger_status(report)
+    if all(data["configured"] for data in report.values()):
+        console_ui.print_status("OK", "This rig is configured.")
+        return 0
+    console_ui.print_status("WARNING", "This rig needs a new configuration run.")
+    return 1
+
+
+def _write_profile(path):
+    """
+    Stops tracing and writes the trace.
 
+    Args:
+        path (str): The path of the trace file.
+    """
+    from offbgamessettings import tracing
+
+    tracer = tracing.stop()
+    try:
+        tracer.write(path)
+    except OSError as e:
+        console_ui.print_status("ERROR", f"Cannot write the trace: {e}")
+        return
+    console_ui.print_status(
+        "INFO",
+        f"Trace of {len(tracer.events)} spans written to {path} (open it with "
+        "https://ui.perfetto.dev).",
+    )
+
+
+def _run_bench(args):
+    """
+    Runs the benchmark suite and displays its report.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        int: The exit code: 1 if a phase regressed against the baseline, 0
+             otherwise.
+    """
+    from offbgamessettings import benchmark
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = benchmark.load_report(args.baseline)
+        except (OSError, ValueError) as e:
+            console_ui.print_status("ERROR", f"Invalid baseline: {e}")
+            return 1
+
+    console_ui.print_header("Benchmarks on synthetic Steam installations")
+    report = benchmark.run_benchmarks(
+        args.scales,
+        repeat=args.repeat,
+        on_progress=lambda scale, run: (
+            console_ui.print_status("INFO", f"{scale}: run {run + 1}/{args.repeat}")
+            if args.verbose
+            else None
+        ),
+    )
+
+    regressions = None
+    if baseline is not None:
+        regressions = benchmark.compare(report, baseline, tolerance=args.tolerance)
+    console_ui.print_benchmark_report(report, regressions)
+
+    if args.save:
+        try:
+            benchmark.save_report(args.save, report)
+        except OSError as e:
+            console_ui.print_status("ERROR", f"Cannot save the report: {e}")
+            return 1
+        console_ui.print_status("INFO", f"Report saved to {args.save}.")
+    return 1 if regressions else 0
+
+
+def _recover_transactions(journal_dir):
+    """
+    Rolls back the transactions interrupted by a crash of a previous run,
+    and reports them.
+
+    Args:
+        journal_dir (str): The journal folder.
+    """
+    from offbgamessettings import transaction
+
+    for recovered in transaction.recover(journal_dir):
+        if recovered["error"]:
+            console_ui.print_status(
+                "ERROR",
+                f"Could not roll back an interrupted configuration "
+                f"({recovered['name']}): {recovered['error']}",
+            )
+        else:
+            console_ui.print_status(
+                "WARNING",
+                f"Interrupted configuration of {recovered['name']} rolled back "
+                f"({len(recovered['files'])} file(s) restored).",
+            )
+
+
+def _write_metrics(path, metrics):
+    """
+    Writes the metrics of the run.
+
+    Args:
+        path (str): The path of the metrics file.
+        metrics (MetricsCollector): The metrics.
+    """
+    try:
+        metrics.write(path)
+    except OSError as e:
+        console_ui.print_status("ERROR", f"Cannot write the metrics: {e}")
+
+
+def _run_local(args, policy, writer=None, metrics=None):
+    """
+    Discovers the games of this machine and runs the requested action.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        policy (DecisionPolicy or None): The decision policy.
+        writer (RecordWriter, optional): Receives the record of each game.
+        metrics (MetricsCollector, optional): Collects the metrics of the
+                                              run.
+    """
+    import itertools
+
+    from offbgamessettings import discovery_cache, ledger, transaction
+    from offbgamessettings.game_discovery import (
+        SIM_RACING_APP_IDS,
+        find_steam_path,
+        iter_sim_racing_games,
+    )
+
+    jobs = args.jobs or 1
+    # The ledger records the state of each game after the run, so that
+    # unchanged games are skipped next time
+    run_ledger = ledger.Ledger.load(ledger.default_ledger_path())
+    if args.force:
+        # Forget the recorded state: every game is checked, then recorded again
+        run_ledger.games.clear()
     console_ui.print_header("Game Configuration Utility for OpenFFBoard")
+    # Finish (roll back) the transactions of a run that crashed
+    journal_dir = transaction.default_journal_dir()
+    _recover_transactions(journal_dir)
 
     # Step 1: Check if Steam is installed
     if not find_steam_path():
@@ -60,28 +662,205 @@ def main():
         )
         return
 
-    # Step 2: Discover installed simulation games
-    games_found = get_sim_racing_game_folders()
+    # Step 2: Discover installed simulation games.
+    # Discovery is a stream: the games are configured as they are found.
+    cache_path = None if args.no_cache else discovery_cache.default_cache_path()
+    games_stream = iter_sim_racing_games(
+        cache_path=cache_path, rebuild_cache=args.rebuild_cache
+    )
+    if metrics is not None:
+        games_stream = metrics.timed_discovery(games_stream)
+    first_game = next(games_stream, None)
 
-    if games_found:
-        # Step 3: Execute the requested action (configure or revert)
-        if args.revert:
-            console_ui.print_header("Reverting configurations")
-            results = config_orchestrator.revert_configurations(games_found)
-        else:
-            console_ui.print_header("Checking configuration")
-            results = config_orchestrator.check_and_configure_games(games_found)
+    if first_game:
+        from offbgamessettings import config_orchestrator
 
-        # Step 4: Display the results to the user
-        console_ui.print_summary_table(results)
+        games_found = itertools.chain([first_game], games_stream)
+        # Keep the discovered games, to watch them after the run
+        watched_games = {}
+        games_found = (
+            (app_id, watched_games.setdefault(app_id, game_data))
+            for app_id, game_data in games_found
+        )
+
+        def record_callback(action):
+            return _callbacks(
+                writer.result_callback(action) if writer else None,
+                metrics.on_result if metrics else None,
+            )
+
+        # The summary table is displayed progressively: the row of each game
+        # is printed as soon as its result is known
+        table = console_ui.ResultTable(SIM_RACING_APP_IDS.values())
+
+        def table_callback(action):
+            return _callbacks(record_callback(action), table.result_callback())
+
+        # Step 3: Execute the requested action (plan, configure or revert)
+        if args.dry_run:
+            console_ui.print_header("Planning changes (dry run)")
+            try:
+                results = config_orchestrator.plan_configurations(
+                    games_found, max_workers=jobs, on_result=table_callback("plan")
+                )
+            finally:
+                table.close()
+            console_ui.print_plan(results)
+            console_ui.print_details(results, verbose=args.verbose)
+            console_ui.print_header("Process finished")
+            return
+
+        try:
+            if args.revert:
+                console_ui.print_header("Reverting configurations")
+                results = config_orchestrator.revert_configurations(
+                    games_found,
+                    max_workers=jobs,
+                    timestamp=args.revert_to,
+                    ledger=run_ledger,
+                    on_result=table_callback("revert"),
+                )
+            else:
+                console_ui.print_header("Checking configuration")
+                results = config_orchestrator.check_and_configure_games(
+                    games_found,
+                    max_workers=jobs,
+                    policy=policy,
+                    ledger=run_ledger,
+                    on_result=table_callback("configure"),
+                    journal_dir=journal_dir,
+                )
+        finally:
+            table.close()
+
+        # Step 4: Display the details to the user
         console_ui.print_details(results, verbose=args.verbose)
 
+        if args.watch:
+            _run_watch(
+                args,
+                watched_games,
+                run_ledger,
+                policy,
+                record_callback("configure"),
+                metrics,
+            )
         console_ui.print_header("Process finished")
     else:
         # No supported games were found
         console_ui.print_status("INFO", "No supported sim racing games were found.")
 
 
+def _run_action(args, policy, writer=None, metrics=None):
+    """
+    Runs the fleet mode or the local mode.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        policy (DecisionPolicy or None): The decision policy.
+        writer (RecordWriter, optional): Receives the record of each game.
+        metrics (MetricsCollector, optional): Collects the metrics of the
+                                              run (local mode).
+    """
+    if args.command == "fleet":
+        _run_fleet(args, policy, writer)
+    else:
+        _run_local(args, policy, writer, metrics)
+
+
+def main(argv=None):
+    """
+    Entry point for the command-line interface.
+    Finds and configures sim racing games for OpenFFBoard.
+
+    Args:
+        argv (list, optional): The command-line arguments. Defaults to
+                               `sys.argv[1:]`.
+
+    Returns:
+        int or None: The exit code of the `status` and `bench` commands, or
+                     1 if the run cannot start (invalid policy, unwritable
+                     output).
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        return _run_status()
+    if args.command == "bench":
+        return _run_bench(args)
+
+    if args.dry_run and args.revert:
+        parser.error("--dry-run cannot be combined with --revert")
+    if args.revert_to is not None and not args.revert:
+        parser.error("--to can only be used with --revert")
+    if args.watch and (args.dry_run or args.revert or args.command == "fleet"):
+        parser.error("--watch cannot be combined with --dry-run, --revert or fleet")
+    if args.output_file and args.output == "text":
+        parser.error("--output-file requires --output ndjson or --output json")
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory requires --profile")
+    if args.metrics_file and args.command == "fleet":
+        parser.error("--metrics-file cannot be combined with fleet")
+    if args.no_cache and args.rebuild_cache:
+        parser.error("--no-cache cannot be combined with --rebuild-cache")
+
+    # Build the decision policy used for unattended runs
+    try:
+        policy = _load_policy(args)
+    except (OSError, ValueError) as e:
+        console_ui.print_status("ERROR", f"Invalid decision policy: {e}")
+        return 1
+
+    writer = None
+    if args.output != "text":
+        from offbgamessettings.output import RecordWriter
+
+        try:
+            writer = RecordWriter.open(args.output_file, args.output)
+        except OSError as e:
+            console_ui.print_status("ERROR", f"Cannot write the output: {e}")
+            return 1
+
+    metrics = None
+    if args.metrics_file:
+        from offbgamessettings.metrics import MetricsCollector
+
+        if args.dry_run:
+            action = "plan"
+        elif args.revert:
+            action = "revert"
+        else:
+            action = "configure"
+        metrics = MetricsCollector(action)
+
+    if args.profile:
+        from offbgamessettings import tracing
+
+        tracing.start(memory=args.profile_memory)
+
+    try:
+        with _human_output(writer):
+            if args.profile:
+                with tracing.span(args.command or "run"):
+                    _run_action(args, policy, writer, metrics)
+            else:
+                _run_action(args, policy, writer, metrics)
+    finally:
+        if writer is not None:
+            writer.close()
+        if metrics is not None:
+            with _human_output(writer):
+                _write_metrics(args.metrics_file, metrics)
+        if args.profile:
+            with _human_output(writer):
+                _write_profile(args.profile)
+
+
 # Ensures that the main() function is called when the script is executed directly
 if __name__ == "__main__":
-    main()
+    import multiprocessing
+
+    # Required for the fleet worker processes in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,619 @@
+"""
+Generational, content-addressed backup store.
+
+Before a game file is modified, a copy of it is kept so that it can be
+restored later. Instead of a `<file>.bak_offb_settings` copy that is
+overwritten on every run (losing the true original), backups are stored in a
+content-addressed store:
+
+    <library>/steamapps/offb_settings_backups/
+        objects/<first 2 hex digits>/<sha256>[.zz|.xz]   one blob per content
+        index.json                                       generations per file
+
+Design:
+-   **One store per Steam library**, next to the game files. Files that are
+    not inside a Steam library (e.g. in tests) use a `.offb_settings_backups`
+    folder next to them.
+-   **Deduplication**: blobs are named after the SHA-256 of their
+    (uncompressed) content. Backing up a content that is already stored
+    costs no extra disk space.
+-   **Compression**: blobs are compressed with `zlib` by default, or `lzma`.
+    The file is hashed and compressed in a single streaming pass. Stores
+    created with `codec="none"` keep raw blobs instead, which are created
+    with a reflink (`FICLONE`) or `os.copy_file_range` when the file system
+    supports it.
+-   **Generations**: the index keeps, for each file, the list of distinct
+    versions backed up, oldest first, each with its timestamp. Looking up
+    the generation to restore only reads the index (a bisection on the
+    timestamps), never the game folders.
+-   **Retention**: after each backup, old generations are evicted by count
+    and by age (`RetentionPolicy`), and blobs that are no longer referenced
+    are deleted, so that game updates rewriting a file over and over do not
+    make the store grow without bound. The first generation (the original
+    file) is pinned and never evicted.
+-   **Verified restores**: the blob is hashed again after decompression and
+    before anything is overwritten, and the file is written through
+    `utils.atomic_write`.
+
+Files backed up by older versions of the tool (`.bak_offb_settings`) are
+still restored when the store has no entry for them.
+"""
+import bisect
+import hashlib
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from .tracing import span, traced
+from .utils import atomic_write, count_io, restore_file
+
+STORE_DIR_NAME = "offb_settings_backups"
+FALLBACK_STORE_DIR_NAME = ".offb_settings_backups"
+INDEX_FILE_NAME = "index.json"
+INDEX_VERSION = 1
+
+# Blob compression codecs and the suffix of their blobs
+CODEC_SUFFIXES = {"none": "", "zlib": ".zz", "lzma": ".xz"}
+DEFAULT_CODEC = "zlib"
+
+DEFAULT_MAX_GENERATIONS = 10
+DEFAULT_MAX_AGE = None
+
+# Suffix of the backups created by older versions of the tool
+LEGACY_BACKUP_SUFFIX = ".bak_offb_settings"
+
+# `FICLONE` ioctl request code (Linux), used to create reflinks
+_FICLONE = 0x40049409
+
+_CHUNK_SIZE = 1024 * 1024
+
+# One lock per store, so that concurrent configurators do not lose index
+# updates
+_store_locks = {}
+_store_locks_lock = threading.Lock()
+
+
+class BackupIntegrityError(OSError):
+    """Raised when a backup blob does not match its recorded hash."""
+
+
+def hash_file(file_path):
+    """
+    Computes the SHA-256 of a file.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _try_reflink(src, dst):
+    """
+    Tries to make `dst` a reflink (copy-on-write clone) of `src`.
+
+    Args:
+        src (file): The source file, opened for reading.
+        dst (file): The destination file, opened for writing.
+
+    Returns:
+        bool: True if the clone was created.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        return False
+
+
+@traced("copy_file")
+def copy_file(src_path, dst_path):
+    """
+    Copies a file using the cheapest method supported by the file system.
+
+    Tries a reflink first, then `os.copy_file_range` (in-kernel copy), and
+    falls back to a plain buffered copy. The copy is flushed to disk.
+
+    Args:
+        src_path (str): The path to the source file.
+        dst_path (str): The path to the destination file.
+
+    Returns:
+        str: The method used: "reflink", "copy_file_range" or "copy".
+    """
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        method = "copy"
+        if _try_reflink(src, dst):
+            method = "reflink"
+        elif hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(src.fileno(), dst.fileno(), _CHUNK_SIZE):
+                    pass
+                method = "copy_file_range"
+            except OSError:
+                # Not supported here (e.g. across file systems): start over
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        if method == "copy":
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+        dst.flush()
+        os.fsync(dst.fileno())
+    return method
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _compressor(codec):
+    if codec == "zlib":
+        return zlib.compressobj(6)
+    if codec == "lzma":
+        return lzma.LZMACompressor()
+    raise ValueError(f"Unknown backup codec: {codec!r}")
+
+
+def _decompress(codec, data):
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "lzma":
+        return lzma.decompress(data)
+    return data
+
+
+def parse_timestamp(value):
+    """
+    Parses a point in time given on the command line.
+
+    Args:
+        value (str): A Unix timestamp, or an ISO 8601 date or date and time
+                     (e.g. "2024-05-01" or "2024-05-01T18:30"). Dates and
+                     times without a time zone are in local time.
+
+    Returns:
+        float: The Unix timestamp.
+
+    Raises:
+        ValueError: If the value is not a valid point in time.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(value).timestamp()
+
+
+class RetentionPolicy:
+    """
+    Decides which backup generations are kept.
+
+    The first generation of a file (its original content) and the latest
+    one are always kept.
+
+    Attributes:
+        max_generations (int or None): The maximum number of generations kept
+                                       per file (None for no limit).
+        max_age (float or None): The age, in seconds, after which a
+                                 generation is evicted (None for no limit).
+    """
+
+    def __init__(
+        self, max_generations=DEFAULT_MAX_GENERATIONS, max_age=DEFAULT_MAX_AGE
+    ):
+        """
+        Initializes the policy.
+
+        Args:
+            max_generations (int, optional): The maximum number of
+                                             generations per file.
+            max_age (float, optional): The maximum age of a generation, in
+                                       seconds.
+        """
+        if max_generations is not None and max_generations < 2:
+            raise ValueError("At least 2 generations must be kept.")
+        self.max_generations = max_generations
+        self.max_age = max_age
+
+    def split(self, entries, now):
+        """
+        Splits the generations of a file into kept and evicted ones.
+
+        Args:
+            entries (list): The index entries of the file, oldest first.
+            now (float): The current timestamp.
+
+        Returns:
+            tuple: `(kept, evicted)` lists of entries, oldest first.
+        """
+        if len(entries) <= 2:
+            return list(entries), []
+
+        original, middle, latest = entries[0], entries[1:-1], entries[-1]
+        if self.max_age is not None:
+            middle = [e for e in middle if now - e["time"] <= self.max_age]
+        if self.max_generations is not None:
+            middle = middle[len(middle) - (self.max_generations - 2) :]
+        kept = [original] + middle + [latest]
+        kept_ids = {id(e) for e in kept}
+        return kept, [e for e in entries if id(e) not in kept_ids]
+
+
+def _find_store_base(file_path):
+    """
+    Finds the folder the store of a file belongs to.
+
+    Args:
+        file_path (str): The absolute path to a game file.
+
+    Returns:
+        tuple: `(base, store_dir)` where `base` is the Steam library folder
+               (or the file's folder outside of a library) and `store_dir`
+               the path to the store.
+    """
+    directory = os.path.dirname(file_path)
+    current = directory
+    while True:
+        if os.path.basename(current).lower() == "steamapps":
+            return os.path.dirname(current), os.path.join(current, STORE_DIR_NAME)
+        parent = os.path.dirname(current)
+        if parent == current:
+            return directory, os.path.join(directory, FALLBACK_STORE_DIR_NAME)
+        current = parent
+
+
+class BackupStore:
+    """
+    A generational, content-addressed store of file backups.
+
+    Attributes:
+        base (str): The folder that indexed paths are relative to.
+        path (str): The path to the store folder.
+        codec (str): The compression of new blobs ("zlib", "lzma" or "none").
+        retention (RetentionPolicy): The generations kept for each file.
+    """
+
+    def __init__(self, base, path, codec=DEFAULT_CODEC, retention=None):
+        """
+        Initializes the store. Nothing is created on disk until the first
+        backup.
+
+        Args:
+            base (str): The folder that indexed paths are relative to.
+            path (str): The path to the store folder.
+            codec (str, optional): The compression of new blobs.
+            retention (RetentionPolicy, optional): The retention policy.
+                                                   Defaults to
+                                                   `RetentionPolicy()`.
+        """
+        if codec not in CODEC_SUFFIXES:
+            raise ValueError(f"Unknown backup codec: {codec!r}")
+        self.base = base
+        self.path = path
+        self.codec = codec
+        self.retention = retention or RetentionPolicy()
+        with _store_locks_lock:
+            self._lock = _store_locks.setdefault(
+                os.path.normcase(path), threading.Lock()
+            )
+
+    @classmethod
+    def for_file(cls, file_path, **kwargs):
+        """
+        Returns the store used for the backups of a file.
+
+        Args:
+            file_path (str): The path to the file.
+            **kwargs: The options of the store (`codec`, `retention`).
+
+        Returns:
+            BackupStore: The store.
+        """
+        return cls(*_find_store_base(os.path.abspath(file_path)), **kwargs)
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, INDEX_FILE_NAME)
+
+    def blob_path(self, digest, codec="none"):
+        """
+        Returns the path of the blob holding a content.
+
+        Args:
+            digest (str): The SHA-256 of the uncompressed content.
+            codec (str, optional): The compression of the blob.
+
+        Returns:
+            str: The path to the blob.
+        """
+        return os.path.join(
+            self.path, "objects", digest[:2], digest + CODEC_SUFFIXES[codec]
+        )
+
+    def _key(self, file_path):
+        relative = os.path.relpath(os.path.abspath(file_path), self.base)
+        return relative.replace(os.sep, "/")
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {"version": INDEX_VERSION, "files": {}}
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            return {"version": INDEX_VERSION, "files": {}}
+        return index
+
+    def _save_index(self, index):
+        content = json.dumps(index, indent=2, sort_keys=True).encode("utf-8")
+        atomic_write(self.index_path, content, defer_directory_sync=True)
+
+    def _write_blob(self, file_path, digest):
+        """
+        Writes the blob of a file to a temporary file next to its final path.
+
+        Returns:
+            str: The path to the temporary file.
+        """
+        blob_path = self.blob_path(digest, self.codec)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), suffix=".tmp")
+        os.close(fd)
+        try:
+            if self.codec == "none":
+                copy_file(file_path, tmp_path)
+                copied_digest = hash_file(tmp_path)
+            else:
+                # Hash and compress in a single pass over the file
+                hasher = hashlib.sha256()
+                compressor = _compressor(self.codec)
+                with open(file_path, "rb") as src, open(tmp_path, "wb") as dst:
+                    for chunk in iter(lambda: src.read(_CHUNK_SIZE), b""):
+                        hasher.update(chunk)
+                        dst.write(compressor.compress(chunk))
+                    dst.write(compressor.flush())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                copied_digest = hasher.hexdigest()
+
+            # The file may have changed since it was hashed
+            if copied_digest != digest:
+                raise BackupIntegrityError(
+                    f"{file_path} changed while it was being backed up."
+                )
+        except BaseException:
+            _remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _store_blob(self, file_path, digest):
+        """
+        Adds the content of a file to the store, unless it is already there.
+
+        Returns:
+            str: The codec of the blob holding the content.
+        """
+        for codec in CODEC_SUFFIXES:
+            if os.path.exists(self.blob_path(digest, codec)):
+                return codec
+
+        tmp_path = self._write_blob(file_path, digest)
+        os.replace(tmp_path, self.blob_path(digest, self.codec))
+        return self.codec
+
+    def _collect_garbage(self, index, evicted):
+        """
+        Deletes the blobs of evicted generations that are no longer used.
+
+        Args:
+            index (dict): The index, after eviction.
+            evicted (list): The evicted entries.
+        """
+        used = {
+            (entry["hash"], entry.get("codec", "none"))
+            for entries in index["files"].values()
+            for entry in entries
+        }
+        for entry in evicted:
+            blob = (entry["hash"], entry.get("codec", "none"))
+            if blob not in used:
+                _remove(self.blob_path(*blob))
+                used.add(blob)
+
+    def backup(self, file_path):
+        """
+        Backs up the current content of a file as a new generation.
+
+        Old generations are then evicted according to the retention policy.
+
+        Args:
+            file_path (str): The path to the file.
+
+        Returns:
+            dict: The index entry of the backup ('hash', 'codec', 'size',
+                  'stored_size' and 'time').
+
+        Raises:
+            OSError: If the file cannot be read or the backup cannot be
+                     written.
+        """
+        digest = hash_file(file_path)
+        with self._lock:
+            codec = self._store_blob(file_path, digest)
+
+            index = self._load_index()
+            entries = index["files"].setdefault(self._key(file_path), [])
+            if entries and entries[-1]["hash"] == digest:
+                # This exact content is already the latest generation
+                return entries[-1]
+
+            now = time.time()
+            entry = {
+                "hash": digest,
+                "codec": codec,
+                "size": os.path.getsize(file_path),
+                "stored_size": os.path.getsize(self.blob_path(digest, codec)),
+                "time": now,
+            }
+            entries.append(entry)
+            count_io("backed_up", entry["size"])
+
+            kept, evicted = self.retention.split(entries, now)
+            entries[:] = kept
+            self._save_index(index)
+            self._collect_garbage(index, evicted)
+        return entry
+
+    def entries(self, file_path):
+        """
+        Lists the backup generations of a file.
+
+        Args:
+            file_path (str): The path to the file.
+
+        Returns:
+            list: The index entries, oldest first.
+        """
+        return list(self._load_index()["files"].get(self._key(file_path), []))
+
+    def find(self, file_path, timestamp=None):
+        """
+        Finds the generation of a file to restore.
+
+        Args:
+            file_path (str): The path to the file.
+            timestamp (float, optional): A point in time. Defaults to the
+                                         original file (first generation).
+
+        Returns:
+            dict or None: The newest generation taken at or before
+                          `timestamp` (or the first one without timestamp),
+                          or None if there is none.
+        """
+        entries = self.entries(file_path)
+        if not entries:
+            return None
+        if timestamp is None:
+            return entries[0]
+        position = bisect.bisect_right([entry["time"] for entry in entries], timestamp)
+        return entries[position - 1] if position else None
+
+    def restore(self, file_path, entry):
+        """
+        Restores a file from one of its backups, after verifying it.
+
+        Args:
+            file_path (str): The path to the file.
+            entry (dict): The index entry to restore.
+
+        Returns:
+            bool: True if the file was written, False if it already had the
+                  backed-up content.
+
+        Raises:
+            BackupIntegrityError: If the blob is missing or corrupt. The file
+                                  is not modified in that case.
+            OSError: If the file cannot be written.
+        """
+        codec = entry.get("codec", "none")
+        try:
+            with open(self.blob_path(entry["hash"], codec), "rb") as f:
+                content = _decompress(codec, f.read())
+        except FileNotFoundError:
+            raise BackupIntegrityError(f"The backup of {file_path} is missing.")
+        except (zlib.error, lzma.LZMAError):
+            raise BackupIntegrityError(f"The backup of {file_path} is corrupt.")
+        if hashlib.sha256(content).hexdigest() != entry["hash"]:
+            raise BackupIntegrityError(f"The backup of {file_path} is corrupt.")
+        return atomic_write(file_path, content, defer_directory_sync=True)
+
+
+def backup_file(file_path):
+    """
+    Backs up a file before it is modified.
+
+    Args:
+        file_path (str): The absolute path to the file to be backed up.
+
+    Returns:
+        bool: True if the backup was created (or already existed), False
+              otherwise.
+    """
+    if not os.path.exists(file_path):
+        return False
+    try:
+        with span("backup", path=file_path):
+            BackupStore.for_file(file_path).backup(file_path)
+        return True
+    except OSError:
+        # The copy failed, likely due to permissions
+        return False
+
+
+def has_backup(file_path):
+    """
+    Checks whether a file can be restored.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        bool: True if the store or a legacy backup holds a copy of the file.
+    """
+    return bool(BackupStore.for_file(file_path).entries(file_path)) or os.path.exists(
+        file_path + LEGACY_BACKUP_SUFFIX
+    )
+
+
+def restore_backup(file_path, timestamp=None):
+    """
+    Restores a file from the backup store.
+
+    Args:
+        file_path (str): The path to the file.
+        timestamp (float, optional): Restores the newest generation taken at
+                                     or before this point in time. Defaults
+                                     to the original file (first generation).
+
+    Returns:
+        dict or None: The restored generation, or None if there is no
+                      suitable backup of this file. Legacy backups are
+                      returned as an entry without 'hash'.
+
+    Raises:
+        BackupIntegrityError: If the backup is missing or corrupt.
+        OSError: If the file cannot be written.
+    """
+    store = BackupStore.for_file(file_path)
+    entry = store.find(file_path, timestamp)
+    if entry:
+        with span("restore", path=file_path):
+            if store.restore(file_path, entry):
+                count_io("written", os.path.getsize(file_path))
+        return entry
+
+    legacy_path = file_path + LEGACY_BACKUP_SUFFIX
+    if timestamp is None and os.path.exists(legacy_path):
+        if restore_file(legacy_path, file_path):
+            count_io("written", os.path.getsize(file_path))
+        return {"hash": None, "time": os.path.getmtime(legacy_path)}
+    return None
@@ -0,0 +1,271 @@
+"""
+Benchmark suite.
+
+Times the main workflows against synthetic Steam installations (see
+`synthetic_steam`) at several scales, and compares the timings with a
+stored baseline to catch performance regressions before they reach the
+rigs. Run it with `offbgamessettings bench`.
+
+How it works:
+1.  For each scale (see `SCALES`) and each repetition, a fresh tree is
+    generated in a temporary folder. The generation is not timed. A first,
+    untimed run on a small tree loads the modules imported lazily (the
+    configurators...), so that the first timed run does not pay for them.
+2.  The phases of a run are timed in order, on the same tree:
+    -   `discovery`: the full scan of the libraries, without the cache,
+    -   `check`: the dry run (every file is checked, nothing is written),
+    -   `apply`: the configuration, every change being accepted,
+    -   `revert`: the restoration of the original files from the backups.
+3.  The timings of each phase are summarized as percentiles (see
+    `summarize`).
+
+Baseline:
+    A report can be saved as JSON and used as the baseline of later runs.
+    A phase regresses when its median exceeds the median of the baseline by
+    more than the tolerance (25% by default), and by more than
+    `NOISE_FLOOR` seconds, so that sub-millisecond jitter never fails a run.
+    Timings depend on the machine: compare reports from the same machine.
+
+The discovery cache, the ledger and the backups of the user are never
+touched: discovery runs without the cache, no ledger is given to the
+orchestrator, and backups are stored inside the synthetic libraries.
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Parameters of the synthetic tree of each scale (see `build_steam_tree`)
+SCALES = {
+    "small": {
+        "libraries": 1,
+        "manifests": 20,
+        "devices": 50,
+        "controller_keys": 100,
+    },
+    "medium": {
+        "libraries": 4,
+        "manifests": 500,
+        "devices": 2000,
+        "controller_keys": 1000,
+    },
+    "large": {
+        "libraries": 16,
+        "manifests": 5000,
+        "devices": 20000,
+        "controller_keys": 10000,
+    },
+}
+
+DEFAULT_SCALES = ("small", "medium")
+
+PHASES = ("discovery", "check", "apply", "revert")
+
+# Percentiles reported for each phase
+PERCENTILES = (50, 90, 99)
+
+# Regressions smaller than this (in seconds) are ignored as noise
+NOISE_FLOOR = 0.002
+
+DEFAULT_TOLERANCE = 0.25
+
+REPORT_VERSION = 1
+
+
+def percentile(values, p):
+    """
+    Computes a percentile, interpolating between the closest ranks.
+
+    Args:
+        values (list): The values (not empty).
+        p (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile.
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(timings):
+    """
+    Summarizes the timings of a phase.
+
+    Args:
+        timings (list): The durations, in seconds.
+
+    Returns:
+        dict: The number of 'runs', the 'min', 'max' and each percentile
+              ('p50', 'p90'...), in seconds.
+    """
+    summary = {"runs": len(timings), "min": min(timings), "max": max(timings)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = percentile(timings, p)
+    return {key: round(value, 6) for key, value in summary.items()}
+
+
+def time_phases(root):
+    """
+    Times the phases of a run on a synthetic tree.
+
+    Args:
+        root (str): The Steam root of the tree.
+
+    Returns:
+        dict: The duration of each phase (see `PHASES`), in seconds.
+    """
+    from . import config_orchestrator
+    from .decisions import DecisionPolicy
+    from .game_discovery import iter_sim_racing_games
+
+    timings = {}
+    start = time.perf_counter()
+    games = dict(iter_sim_racing_games(steam_path=root))
+    timings["discovery"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    config_orchestrator.plan_configurations(games)
+    timings["check"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    config_orchestrator.check_and_configure_games(
+        games, policy=DecisionPolicy(default=True), interactive=False
+    )
+    timings["apply"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    config_orchestrator.revert_configurations(games)
+    timings["revert"] = time.perf_counter() - start
+    return timings
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, repeat=5, seed=0, on_progress=None):
+    """
+    Runs the benchmark suite.
+
+    Args:
+        scales (iterable): The names of the scales to run (see `SCALES`).
+        repeat (int): The number of runs of each scale.
+        seed (int): The seed of the first generated tree (each run uses the
+                    next one).
+        on_progress (callable, optional): Called with `(scale, run)` before
+                                          each run.
+
+    Returns:
+        dict: The report: the 'version' of its format, the 'python' version,
+              the 'platform', the 'repeat' count, and the 'results' of each
+              scale (the summary of each phase, see `summarize`).
+
+    Raises:
+        ValueError: If a scale is unknown.
+    """
+    from .synthetic_steam import build_steam_tree
+
+    for scale in scales:
+        if scale not in SCALES:
+            raise ValueError(f"Unknown scale: {scale!r}")
+
+    # Warm-up run, not timed
+    with tempfile.TemporaryDirectory(prefix="offb-bench-") as temp_dir:
+        root = os.path.join(temp_dir, "Steam")
+        build_steam_tree(root, seed=seed, **SCALES["small"])
+        time_phases(root)
+
+    results = {}
+    for scale in scales:
+        timings = {phase: [] for phase in PHASES}
+        for run in range(repeat):
+            if on_progress:
+                on_progress(scale, run)
+            with tempfile.TemporaryDirectory(prefix="offb-bench-") as temp_dir:
+                root = os.path.join(temp_dir, "Steam")
+                build_steam_tree(root, seed=seed + run, **SCALES[scale])
+                for phase, seconds in time_phases(root).items():
+                    timings[phase].append(seconds)
+        results[scale] = {phase: summarize(values) for phase, values in timings.items()}
+
+    return {
+        "version": REPORT_VERSION,
+        "python": platform.python_version(),
+        "platform": f"{sys.platform}-{platform.machine()}",
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def load_report(path):
+    """
+    Loads a saved report.
+
+    Args:
+        path (str): The path of the JSON file.
+
+    Returns:
+        dict: The report.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not a benchmark report.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if not isinstance(report, dict) or report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path} is not a benchmark report (version {REPORT_VERSION})")
+    return report
+
+
+def save_report(path, report):
+    """
+    Saves a report as JSON, atomically.
+
+    Args:
+        path (str): The path of the JSON file.
+        report (dict): The report returned by `run_benchmarks()`.
+    """
+    from .utils import atomic_write
+
+    atomic_write(path, (json.dumps(report, indent=2) + "\n").encode("utf-8"))
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares a report with a baseline.
+
+    Only the scales and phases present in both reports are compared.
+
+    Args:
+        report (dict): The report of the current run.
+        baseline (dict): The report used as the baseline.
+        tolerance (float): The allowed slowdown of the medians (0.25 = 25%).
+
+    Returns:
+        list: The regressions, as dictionaries with the 'scale', 'phase', the
+              'baseline' and 'current' medians (in seconds) and their
+              'ratio'.
+    """
+    regressions = []
+    for scale, phases in report["results"].items():
+        baseline_phases = baseline.get("results", {}).get(scale, {})
+        for phase, summary in phases.items():
+            if phase not in baseline_phases:
+                continue
+            reference = baseline_phases[phase]["p50"]
+            current = summary["p50"]
+            if current > reference * (1 + tolerance) and current - reference > (
+                NOISE_FLOOR
+            ):
+                regressions.append(
+                    {
+                        "scale": scale,
+                        "phase": phase,
+                        "baseline": reference,
+                        "current": current,
+                        "ratio": round(current / reference, 2) if reference else None,
+                    }
+                )
+    return regressions
@@ -12,46 +12,517 @@ Architecture:
     of each game. To add support for a new game, only the factory and a new
     configurator need to be created, without modifying this orchestrator.
 -   It handles the two main workflows: checking/configuring and reverting
-    changes.
+    changes, plus a read-only planning workflow used for dry runs.
+-   Configuration follows a plan-then-apply model: the decisions needed by
+    every configurator are collected first, answered together (by the user
+    or by a `DecisionPolicy`), and only then are the changes applied. Games
+    that need no decision are not held back.
+-   It accepts either the dictionary returned by
+    `get_sim_racing_game_folders()` or the stream of games produced by
+    `iter_sim_racing_games()`. In the latter case, the work is pipelined:
+    each game is configured as soon as it is discovered, while the
+    remaining libraries are still being scanned.
+-   Configurators can optionally run concurrently (`max_workers`), since
+    each game only touches its own files. Results are always returned in
+    discovery order, and a configurator that raises an exception only fails
+    its own game.
+-   Each workflow accepts an `on_result` callback, called as soon as the
+    result of a game is known (in completion order), with the time spent in
+    each phase of its configurator. It is used to stream machine-readable
+    output (see the `output` module). Calls are serialized, even in
+    concurrent mode.
+-   Each configuration runs in a transaction (see `transaction`): the files
+    written by a configurator are committed together once it returns, or
+    not at all if it fails or raises an exception, so that a game is never
+    left half configured. Files are backed up by the commit: an aborted game
+    leaves no backup behind.
+    With a journal folder (`journal_dir`), a commit interrupted by a crash
+    is rolled back on the next start.
 """
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import decisions
+from . import ledger as ledger_module
+from . import tracing, utils
 from .game_configurators.factory import ConfiguratorFactory
+from .results import GameResult, LogEntry, Status
+from .tracing import traced
+from .transaction import Transaction
+
+# Result of a game skipped because the ledger shows it is still configured
+LEDGER_SKIPPED_RESULT = GameResult(
+    Status.OK,
+    [LogEntry(Status.OK, "Unchanged since the last successful run (skipped).")],
+)
+
+# Name of the timing of each configurator method (see `on_result`)
+_PHASES = {
+    "get_pending_decisions": "decisions",
+    "check_and_configure": "configure",
+    "revert_configuration": "revert",
+    "plan": "plan",
+}
 
 
-def check_and_configure_games(games_found):
+def _iter_games(games_found):
     """
-    Checks and configures all detected games.
+    Iterates over the detected games, whatever the form they are given in.
 
-    For each game in the list, this function asks the factory for the
-    appropriate configurator and executes its `check_and_configure` method.
+    Args:
+        games_found (dict or iterable): The dictionary returned by
+            `game_discovery.get_sim_racing_game_folders()`, or an iterable of
+            `(app_id, game_data)` pairs such as the generator returned by
+            `game_discovery.iter_sim_racing_games()`.
+
+    Returns:
+        iterable: The `(app_id, game_data)` pairs.
+    """
+    if isinstance(games_found, dict):
+        return games_found.items()
+    return games_found
+
+
+def _rolled_back(result, transaction, reason):
+    """
+    Turns the result of a configurator whose transaction was rolled back
+    into an error.
 
     Args:
-        games_found (dict): The dictionary of games returned by
-                            `game_discovery.get_sim_racing_game_folders()`.
+        result (GameResult or dict): The result of the configurator.
+        transaction (Transaction): The transaction, with its staged files.
+        reason: Why the transaction was rolled back.
 
     Returns:
-        dict: A results dictionary where the keys are the game names and the
-              values are the results of the configuration operation (status
-              and logs).
+        GameResult: The result, with the "ERROR" status.
+    """
+    files = ", ".join(os.path.basename(path) for path in transaction.staged_paths())
+    logs = list(result["logs"])
+    logs.append(LogEntry(Status.ERROR, "Changes to {} rolled back: {}", files, reason))
+    return GameResult(Status.ERROR, logs, result.get("operations"))
+
+
+def _unexpected_error(error):
+    """
+    Builds the result of a configurator that raised an exception.
+
+    Args:
+        error (Exception): The exception.
+
+    Returns:
+        GameResult: The result, with the "ERROR" status.
+    """
+    return GameResult(
+        Status.ERROR,
+        [LogEntry(Status.ERROR, "An unexpected error occurred: {}", str(error))],
+    )
+
+
+def _in_transaction(configurator, transaction, method, *args):
+    """
+    Runs an operation of a configurator in a transaction, then commits the
+    files it wrote, or aborts them if the operation failed or raised an
+    exception.
+
+    Returns:
+        GameResult or dict: The result of the operation.
+    """
+    configurator.transaction = transaction
+    try:
+        result = method(*args)
+    except Exception as e:
+        result = _unexpected_error(e)
+    finally:
+        configurator.transaction = None
+    try:
+        if not transaction:
+            return result
+        if result["status"] == Status.ERROR:
+            # Another file of the game could not be changed: none of them is
+            return _rolled_back(
+                result, transaction, "the game was not fully configured."
+            )
+        try:
+            transaction.commit()
+        except OSError as e:
+            return _rolled_back(result, transaction, e)
+        if not transaction.backed_up:
+            return result
+        logs = list(result["logs"])
+        for path in transaction.backed_up:
+            logs.append(
+                LogEntry(Status.INFO, "Backup of {} created.", os.path.basename(path))
+            )
+        return GameResult(result["status"], logs, result.get("operations"))
+    finally:
+        # Nothing staged is left behind, whatever happened
+        transaction.abort()
+
+
+def _run_configurator(configurator, method_name, *args, timings=None, transaction=None):
+    """
+    Runs one operation of a configurator, turning any crash into a result.
+
+    An unexpected exception in one configurator must not prevent the other
+    games from being processed, nor lose their results.
+
+    Args:
+        configurator (BaseGameConfigurator): The configurator to run.
+        method_name (str): The name of the method to call
+                           (`check_and_configure` or `revert_configuration`).
+        *args: The arguments of the method.
+        timings (dict, optional): Receives the duration of the operation, in
+                                  seconds (see `_PHASES`).
+        transaction (Transaction, optional): The transaction in which the
+                                             files are written.
+
+    Returns:
+        GameResult or dict: The result of the operation (status and logs).
+    """
+    start = time.perf_counter()
+    try:
+        method = getattr(configurator, method_name)
+        if transaction is not None:
+            method = functools.partial(
+                _in_transaction, configurator, transaction, method
+            )
+        if not tracing.enabled():
+            return method(*args)
+        with tracing.span(
+            f"{_PHASES[method_name]}: {configurator.game_name}",
+            app_id=configurator.app_id,
+        ):
+            return method(*args)
+    except Exception as e:
+        return _unexpected_error(e)
+    finally:
+        if timings is not None:
+            timings[_PHASES[method_name]] = time.perf_counter() - start
+
+
+def _start(
+    executor,
+    configurator,
+    method_name,
+    *args,
+    timings=None,
+    done=None,
+    transaction=None,
+):
+    """
+    Starts an operation of a configurator, in the pool if there is one.
+
+    Args:
+        executor (ThreadPoolExecutor or None): The pool used in concurrent
+                                               mode.
+        configurator (BaseGameConfigurator): The configurator to run.
+        method_name (str): The name of the method to call.
+        *args: The arguments of the method.
+        timings (dict, optional): Receives the duration of the operation.
+        done (callable, optional): Called with the result once it is known.
+        transaction (Transaction, optional): The transaction in which the
+                                             files are written.
+
+    Returns:
+        dict or Future: The result, or a future of the result in concurrent
+                        mode.
+    """
+    if executor:
+        future = executor.submit(
+            _run_configurator,
+            configurator,
+            method_name,
+            *args,
+            timings=timings,
+            transaction=transaction,
+        )
+        if done:
+            future.add_done_callback(lambda f: done(f.result()))
+        return future
+    result = _run_configurator(
+        configurator, method_name, *args, timings=timings, transaction=transaction
+    )
+    if done:
+        done(result)
+    return result
+
+
+def _serialized(on_result):
+    """
+    Wraps an `on_result` callback so that it is never called by two threads
+    at once.
+
+    Args:
+        on_result (callable or None): The callback.
+
+    Returns:
+        callable or None: The wrapped callback.
+    """
+    if on_result is None:
+        return None
+    lock = threading.Lock()
+
+    def call(app_id, game_data, result, timings):
+        with lock:
+            on_result(app_id, game_data, result, timings)
+
+    return call
+
+
+def _add_result(slots, game_name, result, done):
+    """
+    Adds a result that is known right away, and reports it.
+
+    Args:
+        slots (list): The `[game_name, result]` pairs of the run.
+        game_name (str): The name of the game.
+        result (GameResult or dict): The result.
+        done (callable or None): The reporting callback of the game.
+    """
+    slots.append([game_name, result])
+    if done:
+        done(result)
+
+
+def _reporter(on_result, app_id, game_data, timings):
+    """
+    Builds the `done` callback of a game (see `_start`).
+
+    Returns:
+        callable or None: Reports the result of the game to `on_result`.
+    """
+    if on_result is None:
+        return None
+    return lambda result: on_result(app_id, game_data, result, timings)
+
+
+def _collect_results(slots):
+    """
+    Builds the results dictionary, waiting for pending operations.
+
+    Args:
+        slots (list): `[game_name, result]` pairs in discovery order, where
+                      `result` is a result dictionary or a `Future`.
+
+    Returns:
+        dict: The results dictionary, in discovery order.
     """
     results = {}
-    for app_id, game_data in games_found.items():
+    for game_name, result in slots:
+        results[game_name] = result.result() if isinstance(result, Future) else result
+    return results
+
+
+def _create_executor(max_workers):
+    """
+    Creates the thread pool used in concurrent mode.
+
+    Args:
+        max_workers (int): The maximum number of configurators run at once.
+
+    Returns:
+        ThreadPoolExecutor or None: The pool, or None in sequential mode.
+    """
+    if max_workers and max_workers > 1:
+        return ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="configurator"
+        )
+    return None
+
+
+def _iter_configurators(games_found):
+    """
+    Creates the configurator of each detected game.
+
+    Args:
+        games_found (dict or iterable): The detected games (see `_iter_games`).
+
+    Yields:
+        tuple: `(app_id, game_data, configurator)`, where `configurator` is
+               None for games that do not need any configuration.
+    """
+    for app_id, game_data in _iter_games(games_found):
         game_name = game_data["name"]
         game_path = game_data["path"]
         # Use the factory to get the specific configurator for this game
         configurator = ConfiguratorFactory.get_configurator(
             app_id, game_name, game_path
         )
+        yield app_id, game_data, configurator
+
+
+def _track_in_ledger(configurator):
+    """
+    Tells whether the state of a game is recorded in the ledger: only
+    configurators that manage files can be fingerprinted.
+    """
+    return bool(configurator.managed_files())
 
-        if configurator:
-            # The game has a configurator, so we run it
-            results[game_name] = configurator.check_and_configure()
+
+def _update_ledger(ledger, results, tracked, configured_statuses=None):
+    """
+    Records the state of the games processed during a run, then saves the
+    ledger.
+
+    Args:
+        ledger (Ledger): The configuration ledger.
+        results (dict): The results dictionary of the run.
+        tracked (list): `(game_name, app_id, game_data, configurator)`
+                        tuples of the games to record.
+        configured_statuses (tuple, optional): The statuses after which a
+            game may be left configured. Defaults to "OK" and "MODIFIED". The
+            configurator's probe must also confirm it.
+    """
+    for game_name, app_id, game_data, configurator in tracked:
+        status = results[game_name]["status"]
+        if configured_statuses is None:
+            configured = ledger_module.is_configured_status(status)
         else:
-            # The game was detected, but no action is required
-            results[game_name] = {"status": "NOT REQUIRED", "logs": []}
+            configured = status in configured_statuses
+        configured = configured and configurator.probe()
+        ledger.record(
+            app_id, game_data, configurator.managed_files(), configured, status
+        )
+    ledger.save()
+
+
+@traced("check_and_configure_games")
+def check_and_configure_games(
+    games_found,
+    max_workers=1,
+    policy=None,
+    interactive=None,
+    ledger=None,
+    on_result=None,
+    journal_dir=None,
+):
+    """
+    Checks and configures all detected games.
+
+    The work is done in three phases:
+    1.  Each configurator lists the decisions it needs (without modifying
+        anything). Games that need none are configured right away.
+    2.  All the pending decisions are answered at once, interactively or
+        from `policy` (see `decisions.resolve_decisions`).
+    3.  The remaining games are configured with the collected answers.
+
+    The files of each game are written in a transaction of their own (see
+    `transaction`).
+
+    Args:
+        games_found (dict or iterable): The dictionary of games returned by
+            `game_discovery.get_sim_racing_game_folders()`, or the stream of
+            games returned by `game_discovery.iter_sim_racing_games()`.
+        max_workers (int): The maximum number of configurators run
+                           concurrently. The default of 1 runs them one at a
+                           time.
+        policy (DecisionPolicy, optional): Answers the decisions without
+                                           asking the user.
+        interactive (bool, optional): Whether the user may be asked when no
+                                      policy is given (see
+                                      `decisions.resolve_decisions`).
+        ledger (Ledger, optional): The configuration ledger. Games that are
+                                   still configured as recorded are skipped,
+                                   and the state of the others is recorded
+                                   (and saved) after the run.
+        on_result (callable, optional): Called with `(app_id, game_data,
+                                        result, timings)` as soon as the
+                                        result of a game is known.
+        journal_dir (str, optional): The folder of the write-ahead journal
+                                     of the transactions. Without it,
+                                     commits interrupted by a crash cannot
+                                     be rolled back.
+
+    Returns:
+        dict: A results dictionary where the keys are the game names and the
+              values are the results of the configuration operation (status
+              and logs).
+    """
+    executor = _create_executor(max_workers)
+    on_result = _serialized(on_result)
+    slots = []
+    pending = []
+    deferred = []
+    tracked = []
+    try:
+        for app_id, game_data, configurator in _iter_configurators(games_found):
+            game_name = game_data["name"]
+            timings = {}
+            done = _reporter(on_result, app_id, game_data, timings)
+            if not configurator:
+                # The game was detected, but no action is required
+                _add_result(slots, game_name, GameResult(Status.NOT_REQUIRED), done)
+                continue
+
+            if ledger is not None and _track_in_ledger(configurator):
+                current, _ = ledger.check(app_id, game_data)
+                if current:
+                    # Nothing has changed since the last successful run
+                    _add_result(slots, game_name, LEDGER_SKIPPED_RESULT.copy(), done)
+                    continue
+                tracked.append((game_name, app_id, game_data, configurator))
+
+            game_decisions = _run_configurator(
+                configurator, "get_pending_decisions", timings=timings
+            )
+            if isinstance(game_decisions, GameResult):
+                # Listing the decisions failed: report it as the game's result
+                _add_result(slots, game_name, game_decisions, done)
+            elif game_decisions:
+                # Wait until all the decisions have been answered
+                pending.extend(
+                    {"app_id": app_id, "game_name": game_name, "decision": decision}
+                    for decision in game_decisions
+                )
+                deferred.append(
+                    (len(slots), game_name, app_id, configurator, timings, done)
+                )
+                slots.append([game_name, None])
+            else:
+                slots.append(
+                    [
+                        game_name,
+                        _start(
+                            executor,
+                            configurator,
+                            "check_and_configure",
+                            timings=timings,
+                            done=done,
+                            transaction=Transaction(journal_dir, game_name),
+                        ),
+                    ]
+                )
+
+        answers = decisions.resolve_decisions(pending, policy, interactive)
+        for index, game_name, app_id, configurator, timings, done in deferred:
+            configurator.set_answers(answers.get(app_id, {}))
+            slots[index][1] = _start(
+                executor,
+                configurator,
+                "check_and_configure",
+                timings=timings,
+                done=done,
+                transaction=Transaction(journal_dir, game_name),
+            )
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+        # Flush the directories of all the files written during the run
+        utils.sync_pending_directories()
+
+    results = _collect_results(slots)
+    if ledger is not None:
+        _update_ledger(ledger, results, tracked)
     return results
 
 
-def revert_configurations(games_found):
+@traced("revert_configurations")
+def revert_configurations(
+    games_found, max_workers=1, timestamp=None, ledger=None, on_result=None
+):
     """
     Reverts the configurations for all detected games.
 
@@ -59,26 +530,108 @@ def revert_configurations(games_found):
     appropriate configurator and executes its `revert_configuration` method.
 
     Args:
-        games_found (dict): The dictionary of games returned by
-                            `game_discovery.get_sim_racing_game_folders()`.
+        games_found (dict or iterable): The dictionary of games returned by
+            `game_discovery.get_sim_racing_game_folders()`, or the stream of
+            games returned by `game_discovery.iter_sim_racing_games()`.
+        max_workers (int): The maximum number of configurators run
+                           concurrently. The default of 1 runs them one at a
+                           time.
+        timestamp (float, optional): Restores the files to the newest backup
+                                     taken at or before this point in time,
+                                     instead of the original files.
+        ledger (Ledger, optional): The configuration ledger, in which the
+                                   restored games are recorded as no longer
+                                   configured.
+        on_result (callable, optional): Called with `(app_id, game_data,
+                                        result, timings)` as soon as the
+                                        result of a game is known.
 
     Returns:
         dict: A results dictionary where the keys are the game names and the
               values are the results of the revert operation.
     """
-    results = {}
-    for app_id, game_data in games_found.items():
-        game_name = game_data["name"]
-        game_path = game_data["path"]
-        # Use the factory to get the specific configurator for this game
-        configurator = ConfiguratorFactory.get_configurator(
-            app_id, game_name, game_path
-        )
+    executor = _create_executor(max_workers)
+    on_result = _serialized(on_result)
+    slots = []
+    tracked = []
+    try:
+        for app_id, game_data, configurator in _iter_configurators(games_found):
+            game_name = game_data["name"]
+            timings = {}
+            done = _reporter(on_result, app_id, game_data, timings)
+            if configurator:
+                if ledger is not None and _track_in_ledger(configurator):
+                    tracked.append((game_name, app_id, game_data, configurator))
+                # The game has a configurator, so we run the revert
+                result = _start(
+                    executor,
+                    configurator,
+                    "revert_configuration",
+                    timestamp,
+                    timings=timings,
+                    done=done,
+                )
+                slots.append([game_name, result])
+            else:
+                # The game was detected, but no action is required
+                _add_result(slots, game_name, GameResult(Status.NOT_REQUIRED), done)
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+        # Flush the directories of all the files restored during the run
+        utils.sync_pending_directories()
 
-        if configurator:
-            # The game has a configurator, so we run the revert
-            results[game_name] = configurator.revert_configuration()
-        else:
-            # The game was detected, but no action is required
-            results[game_name] = {"status": "NOT REQUIRED", "logs": []}
+    results = _collect_results(slots)
+    if ledger is not None:
+        # Restored games are no longer configured; games without backups were
+        # left untouched, and may still be configured
+        _update_ledger(ledger, results, tracked, configured_statuses=("NOT FOUND",))
     return results
+
+
+@traced("plan_configurations")
+def plan_configurations(games_found, max_workers=1, on_result=None):
+    """
+    Computes the changes that would be made to all detected games.
+
+    For each game in the list, this function asks the factory for the
+    appropriate configurator and executes its `plan` method. Nothing is
+    written or backed up, and no question is asked: changes that need the
+    user's consent are planned as if they were accepted.
+
+    Args:
+        games_found (dict or iterable): The dictionary of games returned by
+            `game_discovery.get_sim_racing_game_folders()`, or the stream of
+            games returned by `game_discovery.iter_sim_racing_games()`.
+        max_workers (int): The maximum number of configurators run
+                           concurrently.
+        on_result (callable, optional): Called with `(app_id, game_data,
+                                        result, timings)` as soon as the
+                                        result of a game is known.
+
+    Returns:
+        dict: A results dictionary where the keys are the game names and the
+              values contain the status, logs and planned 'operations'.
+    """
+    executor = _create_executor(max_workers)
+    on_result = _serialized(on_result)
+    slots = []
+    try:
+        for app_id, game_data, configurator in _iter_configurators(games_found):
+            game_name = game_data["name"]
+            timings = {}
+            done = _reporter(on_result, app_id, game_data, timings)
+            if configurator:
+                result = _start(
+                    executor, configurator, "plan", timings=timings, done=done
+                )
+                slots.append([game_name, result])
+            else:
+                # The game was detected, but no action is required
+                result = GameResult(Status.NOT_REQUIRED, operations=[])
+                _add_result(slots, game_name, result, done)
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+
+    return _collect_results(slots)
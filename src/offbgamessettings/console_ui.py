@@ -7,8 +7,9 @@ and interacting with the user (such as confirmation prompts).
 
 Dependencies:
 -   `colorama`: Used to provide colored output that is compatible with both
-    Windows and Linux terminals. It is initialized once when the module is
-    loaded.
+    Windows and Linux terminals. It is only imported and initialized on the
+    first output, and only if the output goes to a terminal: otherwise, the
+    color codes stay empty.
 
 Structure:
 -   `STATUS_COLORS`: A central dictionary that maps status types (e.g., "OK",
@@ -17,28 +18,112 @@ Structure:
 -   Display Functions: A series of functions (`print_header`, `print_status`,
     etc.) for specific display tasks, such as printing headers, status
     messages, or summary tables.
--   Interaction Functions: `ask_user` for asking the user questions.
+-   `ResultTable`: A summary table printed progressively, one row per game
+    as soon as its result is known, instead of once every game is done.
+-   Interaction Functions: `ask_user` for asking the user questions. Prompts
+    are serialized with a lock, so configurators running concurrently never
+    interleave their questions.
+
+Output:
+    Large result sets are rendered into a buffer and written in a few large
+    writes, rather than with one `print` (and one pass through colorama) per
+    line. When the output is not a terminal, no color code is looked up at
+    all, and the rows of a `ResultTable` are buffered until the table is
+    closed (or the buffer is full). On a terminal, each row is written at
+    once and cut to the width of the terminal.
 """
-from colorama import Fore, Style, init
+import functools
+import sys
+import threading
 
-# Initialize colorama to work on all platforms
-# autoreset=True ensures that each print statement resets the color style
-init(autoreset=True)
 
-# Central dictionary for status colors.
+class _AnsiCodes:
+    """A set of color codes, all empty until colors are enabled."""
+
+    def __init__(self, *names):
+        self.__dict__.update(dict.fromkeys(names, ""))
+
+
+# Filled from `colorama.Fore` and `colorama.Style` by `_enable_colors()`
+Fore = _AnsiCodes("BLACK", "RED", "GREEN", "YELLOW", "BLUE", "CYAN", "WHITE")
+Style = _AnsiCodes("BRIGHT", "RESET_ALL")
+
+# Color of each status.
 # Ensures color consistency across the entire interface.
-STATUS_COLORS = {
-    "OK": Fore.GREEN,
-    "MODIFIED": Fore.GREEN,
-    "INFO": Fore.CYAN,
-    "WARNING": Fore.YELLOW,
-    "ERROR": Fore.RED,
-    "NOT REQUIRED": Fore.BLACK,
-    "RESTORED": Fore.RED,
-    "NOT FOUND": Fore.YELLOW,
+_STATUS_COLOR_NAMES = {
+    "OK": "GREEN",
+    "MODIFIED": "GREEN",
+    "INFO": "CYAN",
+    "WARNING": "YELLOW",
+    "ERROR": "RED",
+    "NOT REQUIRED": "BLACK",
+    "RESTORED": "RED",
+    "NOT FOUND": "YELLOW",
+    "PLANNED": "CYAN",
 }
 
+# Central dictionary for status colors (the codes of `_STATUS_COLOR_NAMES`)
+STATUS_COLORS = dict.fromkeys(_STATUS_COLOR_NAMES, "")
+
+# Width of the status column of the tables (e.g. "NOT REQUIRED")
+_STATUS_WIDTH = max(len(status) for status in _STATUS_COLOR_NAMES)
+
+# Size of the text buffered by a table before it is written, when the output
+# is not a terminal
+_BUFFER_SIZE = 64 * 1024
+
+_colors_checked = False
+
+
+def _isatty(stream):
+    """Tells whether a stream is a terminal."""
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty and isatty())
+
+
+def _enable_colors():
+    """
+    Initializes colorama and the color codes on the first output, if the
+    standard output is a terminal.
+    """
+    global _colors_checked
+    if _colors_checked:
+        return
+    _colors_checked = True
+
+    if not _isatty(sys.stdout):
+        # Redirected output: no color codes, as colorama would strip them
+        return
+
+    import colorama
+
+    # autoreset=True ensures that each print statement resets the color style
+    colorama.init(autoreset=True)
+    for codes, source in ((Fore, colorama.Fore), (Style, colorama.Style)):
+        for name in vars(codes):
+            setattr(codes, name, getattr(source, name))
+    STATUS_COLORS.update(
+        {status: getattr(Fore, name) for status, name in _STATUS_COLOR_NAMES.items()}
+    )
+
+
+def _with_colors(func):
+    """Makes sure the colors are set up before a function prints anything."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _enable_colors()
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+# Ensures that only one question is displayed at a time when configurators
+# run in parallel threads.
+_prompt_lock = threading.Lock()
+
 
+@_with_colors
 def print_header(title):
     """
     Prints a formatted section header to improve readability.
@@ -49,6 +134,38 @@ def print_header(title):
     print(f"\n{Style.BRIGHT}{Fore.CYAN}--- {title} ---{Style.RESET_ALL}")
 
 
+def _format_status(status, message, colors=True):
+    """
+    Formats a status message (see `print_status`).
+
+    Args:
+        status (str): The type of status (e.g., "OK", "ERROR").
+        message (str): The message to display.
+        colors (bool): Whether to add the color codes.
+
+    Returns:
+        str: The formatted line, without line ending.
+    """
+    status = str(status).upper()
+    if not colors:
+        return f"[{status}] {message}"
+    color = STATUS_COLORS.get(status, Fore.WHITE)
+    return f"[{color}{Style.BRIGHT}{status}{Style.RESET_ALL}] {message}"
+
+
+def _write(lines):
+    """
+    Writes lines to the standard output in a single write.
+
+    Args:
+        lines (list): The lines, without line endings.
+    """
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+
+@_with_colors
 def print_status(status, message):
     """
     Prints a status message with the appropriate color.
@@ -59,10 +176,10 @@ def print_status(status, message):
         status (str): The type of status (e.g., "OK", "ERROR").
         message (str): The message to display.
     """
-    color = STATUS_COLORS.get(status.upper(), Fore.WHITE)
-    print(f"[{color}{Style.BRIGHT}{status.upper()}{Style.RESET_ALL}] {message}")
+    print(_format_status(status, message))
 
 
+@_with_colors
 def print_recommendation(message):
     """
     Prints a recommendation message with a distinctive style.
@@ -73,17 +190,188 @@ def print_recommendation(message):
     print(f"  {Fore.BLUE}Recommendation: {Style.RESET_ALL} {message}")
 
 
+@_with_colors
 def ask_user(prompt):
     """
     Asks the user a question and returns their response.
 
+    This function is thread-safe: concurrent callers wait for the current
+    question to be answered before displaying their own.
+
     Args:
         prompt (str): The message to display to the user.
 
     Returns:
         str: The user's response.
     """
-    return input(f"{Fore.YELLOW}{prompt} {Style.RESET_ALL}")
+    with _prompt_lock:
+        return input(f"{Fore.YELLOW}{prompt} {Style.RESET_ALL}")
+
+
+class ResultTable:
+    """
+    A summary table printed progressively, one row per game as soon as its
+    result is known.
+
+    The width of the name column is computed up front from the names that
+    may appear (e.g. the names of the supported games, see
+    `game_discovery.SIM_RACING_APP_IDS`), so a row never waits for the
+    results of the other games. The title and header of the table are
+    printed with its first row (or when it is closed, if it stays empty), so
+    that nothing the run prints before ends up in the middle of the table.
+
+    On a terminal, each row is colored, cut to the width of the terminal,
+    and written at once. Otherwise, the rows are plain text, buffered and
+    written in large blocks.
+
+    Attributes:
+        stream: The text stream written to.
+        interactive (bool): Whether the stream is a terminal.
+        width (int or None): The maximum width of a row (None if unlimited).
+        name_width (int): The width of the name column.
+        count (int): The number of rows added.
+    """
+
+    def __init__(
+        self,
+        names,
+        title="Summary",
+        label="Game",
+        count_label=None,
+        stream=None,
+        width=None,
+    ):
+        """
+        Initializes the table.
+
+        Args:
+            names (iterable): The names that may appear in the first column.
+                              Longer names are cut on a terminal only.
+            title (str or None): The title of the section, if any.
+            label (str): The label of the first column.
+            count_label (str, optional): The label of an additional numeric
+                                         column (e.g. "Games").
+            stream (optional): The text stream to write to. Defaults to the
+                               standard output.
+            width (int, optional): The maximum width of a row. Defaults to
+                                   the width of the terminal, or no limit if
+                                   the stream is not a terminal.
+        """
+        _enable_colors()
+        self.stream = stream if stream is not None else sys.stdout
+        self.interactive = _isatty(self.stream)
+        if width is None and self.interactive:
+            import shutil
+
+            width = shutil.get_terminal_size().columns
+        self.width = width
+        self.title = title
+        self.label = label
+        self.count_label = count_label
+        self.count = 0
+
+        self.name_width = max([len(label)] + [len(name) for name in names])
+        if width:
+            # The name column shrinks when the terminal is too narrow
+            fixed = len(" | ") + _STATUS_WIDTH
+            if count_label:
+                fixed += len(count_label) + len(" | ")
+            self.name_width = max(len(label), min(self.name_width, width - fixed))
+        self._buffer = []
+        self._buffered = 0
+        self._started = False
+
+    def _write(self, text):
+        """Writes text at once on a terminal, or adds it to the buffer."""
+        if self.interactive:
+            self.stream.write(text)
+            self.stream.flush()
+            return
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= _BUFFER_SIZE:
+            self.flush()
+
+    def _fit(self, text):
+        """Cuts a line to the maximum width of a row."""
+        if self.width and len(text) > self.width:
+            return text[: self.width]
+        return text
+
+    def _start(self):
+        """Prints the title and the header of the table, once."""
+        if self._started:
+            return
+        self._started = True
+        head = self.label.ljust(self.name_width)
+        rule = "-" * self.name_width + "-"
+        if self.count_label:
+            head += f" | {self.count_label}"
+            rule += "|" + "-" * (len(self.count_label) + 2)
+        head += " | Status"
+        rule += "|--------"
+
+        text = f"{self._fit(head)}\n{self._fit(rule)}\n"
+        if self.title is not None:
+            title = f"--- {self.title} ---"
+            if self.interactive:
+                title = f"{Style.BRIGHT}{Fore.CYAN}{title}{Style.RESET_ALL}"
+            text = f"\n{title}\n{text}"
+        self._write(text)
+
+    def add(self, name, status, count=None):
+        """
+        Prints the row of a game.
+
+        Args:
+            name (str): The name in the first column.
+            status (str or Status): The status of the game.
+            count (int, optional): The value of the numeric column.
+        """
+        self._start()
+        self.count += 1
+        if self.width and len(name) > self.name_width:
+            name = name[: max(self.name_width - 3, 1)].rstrip() + "..."
+        prefix = f"{name.ljust(self.name_width)} | "
+        if self.count_label:
+            prefix += f"{count:>{len(self.count_label)}} | "
+        status = str(status)
+
+        if not self.interactive:
+            self._write(f"{prefix}{status}\n")
+        elif self.width and len(prefix) + len(status) > self.width:
+            # No room left for the colors
+            self._write(self._fit(prefix + status) + "\n")
+        else:
+            color = STATUS_COLORS.get(status.upper(), Fore.WHITE)
+            self._write(f"{prefix}{color}{Style.BRIGHT}{status}{Style.RESET_ALL}\n")
+
+    def result_callback(self):
+        """
+        Returns an `on_result` callback for the orchestrator, printing the
+        row of each game.
+
+        Returns:
+            callable: The callback.
+        """
+
+        def on_result(app_id, game_data, result, timings):
+            self.add(game_data["name"], result["status"])
+
+        return on_result
+
+    def flush(self):
+        """Writes the buffered rows."""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        self.stream.flush()
+
+    def close(self):
+        """Ends the table, writing the rows still buffered."""
+        self._start()
+        self.flush()
 
 
 def print_summary_table(results):
@@ -93,19 +381,13 @@ def print_summary_table(results):
     Args:
         results (dict): The results dictionary returned by the orchestrator.
     """
-    print_header("Summary")
-
-    max_len = max(len(game) for game in results.keys()) if results else 0
-
-    print(f"{'Game'.ljust(max_len)} | Status")
-    print(f"{'-' * max_len}-|--------")
-
+    table = ResultTable(results)
     for game, data in results.items():
-        status = data["status"]
-        color = STATUS_COLORS.get(status.upper(), Fore.WHITE)
-        print(f"{game.ljust(max_len)} | {color}{Style.BRIGHT}{status}{Style.RESET_ALL}")
+        table.add(game, data["status"])
+    table.close()
 
 
+@_with_colors
 def print_details(results, verbose=False):
     """
     Prints the detailed logs for each game.
@@ -114,32 +396,213 @@ def print_details(results, verbose=False):
     If `verbose` is True, "INFO", "MODIFIED", and "OK" messages are also
     included, providing a complete view of the process.
 
+    The whole section is rendered first, then written at once.
+
     Args:
         results (dict): The results dictionary returned by the orchestrator.
         verbose (bool): If True, displays all log levels.
     """
-    details_to_show = {}
+    colors = _isatty(sys.stdout)
+    lines = []
     for game, data in results.items():
-        logs_to_show = []
+        game_lines = []
         for log in data["logs"]:
-            status = log["status"].upper()
-            # Always show warnings and errors
-            if status in ["WARNING", "ERROR"]:
-                logs_to_show.append(log)
-            # Only show other statuses in verbose mode
-            elif verbose and status in ["INFO", "MODIFIED", "OK"]:
-                logs_to_show.append(log)
-
-        if logs_to_show:
-            details_to_show[game] = {"logs": logs_to_show}
-
-    if not details_to_show:
+            status = str(log["status"]).upper()
+            # Always show warnings and errors, the other statuses in verbose
+            # mode only
+            if status in ("WARNING", "ERROR") or (
+                verbose and status in ("INFO", "MODIFIED", "OK")
+            ):
+                game_lines.append("  " + _format_status(status, log["message"], colors))
+        if game_lines:
+            if colors:
+                lines.append(f"\n{Style.BRIGHT}{game}: {Style.RESET_ALL}")
+            else:
+                lines.append(f"\n{game}: ")
+            lines.extend(game_lines)
+
+    if not lines:
         return
 
     print_header("Details")
+    _write(lines)
 
-    for game, data in details_to_show.items():
-        print(f"\n{Style.BRIGHT}{game}: {Style.RESET_ALL}")
-        for log in data["logs"]:
-            print("  ", end="")
-            print_status(log["status"], log["message"])
+
+@_with_colors
+def print_plan(results):
+    """
+    Prints the operations planned by a dry run, with their diffs.
+
+    Args:
+        results (dict): The results dictionary returned by
+                        `config_orchestrator.plan_configurations()`.
+    """
+    planned = {
+        game: data["operations"]
+        for game, data in results.items()
+        if data.get("operations")
+    }
+    if not planned:
+        print_status("OK", "No changes are needed.")
+        return
+
+    print_header("Planned changes")
+
+    colors = _isatty(sys.stdout)
+    lines = []
+    for game, operations in planned.items():
+        lines.append(
+            f"\n{Style.BRIGHT}{game}: {Style.RESET_ALL}" if colors else f"\n{game}: "
+        )
+        for operation in operations:
+            note = ""
+            if operation.get("decision"):
+                note = " (requires confirmation)"
+            lines.append(f"  [{operation['op']}] {operation['description']}{note}")
+            for line in operation["diff"].splitlines():
+                if not colors:
+                    color = ""
+                elif line.startswith(("+++", "---")):
+                    color = Style.BRIGHT
+                elif line.startswith("+"):
+                    color = Fore.GREEN
+                elif line.startswith("-"):
+                    color = Fore.RED
+                elif line.startswith("@@"):
+                    color = Fore.CYAN
+                else:
+                    color = ""
+                lines.append(
+                    f"    {color}{line}{Style.RESET_ALL}" if color else f"    {line}"
+                )
+    _write(lines)
+
+
+def fleet_table(roots):
+    """
+    Creates the summary table of a fleet run, with the status and number of
+    games of each Steam root.
+
+    Args:
+        roots (iterable): The Steam roots.
+
+    Returns:
+        ResultTable: The table.
+    """
+    return ResultTable(
+        roots, title="Fleet summary", label="Steam root", count_label="Games"
+    )
+
+
+def print_fleet_report(report, verbose=False):
+    """
+    Prints the merged report of a fleet run.
+
+    A summary table shows the status and number of games of each Steam root,
+    followed by the errors of the roots that could not be processed and the
+    detailed logs of their games.
+
+    Args:
+        report (dict): The report returned by `fleet.run_fleet()`.
+        verbose (bool): If True, displays all log levels.
+    """
+    table = fleet_table(report)
+    for root, data in report.items():
+        table.add(root, data["status"], len(data["games"]))
+    table.close()
+    print_fleet_details(report, verbose=verbose)
+
+
+@_with_colors
+def print_fleet_details(report, verbose=False):
+    """
+    Prints the errors of the Steam roots that could not be processed, and
+    the detailed logs of the games of a fleet run.
+
+    Args:
+        report (dict): The report returned by `fleet.run_fleet()`.
+        verbose (bool): If True, displays all log levels.
+    """
+    for root, data in report.items():
+        if data.get("error"):
+            print_status("ERROR", f"{root}: {data['error']}")
+
+    # Show the game logs of all roots in one list
+    print_details(
+        {
+            f"{root} / {game}": game_data
+            for root, data in report.items()
+            for game, game_data in data["games"].items()
+        },
+        verbose=verbose,
+    )
+
+
+@_with_colors
+def print_ledger_status(report):
+    """
+    Prints the configuration state of the games recorded in the ledger.
+
+    Args:
+        report (dict): The report returned by `Ledger.status()`.
+    """
+    print_header("Configuration status")
+
+    max_len = max((len(data["name"]) for data in report.values()), default=0)
+    max_len = max(max_len, len("Game"))
+
+    print(f"{'Game'.ljust(max_len)} | Status")
+    print(f"{'-' * max_len}-|--------")
+
+    for data in report.values():
+        status = "OK" if data["configured"] else "WARNING"
+        label = "CONFIGURED" if data["configured"] else "NEEDS RUN"
+        print(
+            f"{data['name'].ljust(max_len)} | "
+            f"{STATUS_COLORS[status]}{Style.BRIGHT}{label}{Style.RESET_ALL}"
+        )
+
+    for data in report.values():
+        if data["reason"]:
+            print_status("WARNING", f"{data['name']}: {data['reason']}")
+
+
+@_with_colors
+def print_benchmark_report(report, regressions=None):
+    """
+    Prints the timings of a benchmark run (see `benchmark.run_benchmarks`),
+    in milliseconds, and the regressions found against a baseline.
+
+    Args:
+        report (dict): The benchmark report.
+        regressions (list, optional): The regressions returned by
+                                      `benchmark.compare()`, or None if no
+                                      baseline was given.
+    """
+    print_header("Benchmark results")
+
+    columns = ["p50", "p90", "p99", "max"]
+    head = f"{'Scale':<8} | {'Phase':<9} | " + " | ".join(
+        f"{column + ' ms':>9}" for column in columns
+    )
+    lines = [head, "".join("|" if c == "|" else "-" for c in head)]
+    for scale, phases in report["results"].items():
+        for phase, summary in phases.items():
+            lines.append(
+                f"{scale:<8} | {phase:<9} | "
+                + " | ".join(f"{summary[column] * 1000:>9.2f}" for column in columns)
+            )
+    _write(lines)
+
+    if regressions is None:
+        return
+    if not regressions:
+        print_status("OK", "No regression against the baseline.")
+        return
+    for regression in regressions:
+        print_status(
+            "ERROR",
+            f"{regression['scale']} / {regression['phase']}: median "
+            f"{regression['current'] * 1000:.2f} ms, baseline "
+            f"{regression['baseline'] * 1000:.2f} ms.",
+        )
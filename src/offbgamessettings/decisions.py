@@ -0,0 +1,180 @@
+"""
+Collection of the user's decisions.
+
+Some configuration changes need the user's consent (for example, inverting
+the force feedback direction of rFactor 2). Configurators expose these
+questions as *pending decisions* (see `BaseGameConfigurator`), and this module
+answers all of them in one go, before any file is modified.
+
+Two ways of answering are supported:
+-   **Interactively**: the pending changes are listed, then the questions are
+    asked one after the other. This is only done when a terminal is attached
+    to the standard input.
+-   **From a policy** (`DecisionPolicy`): a blanket `--yes` or `--no`, or a
+    policy file. A policy never prompts, so unattended runs (provisioning
+    scripts, scheduled tasks, runs without a TTY) can never block on input.
+
+Policy file format (JSON):
+    {
+        "default": "no",
+        "decisions": {
+            "365960:invert_steering_strength": "yes",
+            "invert_steering_strength": "no"
+        }
+    }
+
+    Keys in `decisions` are either `"<app_id>:<decision_id>"`, a bare
+    `"<decision_id>"` applying to every game, or a bare `"<app_id>"` applying
+    to every decision of a game. The most specific key wins. Values may be
+    booleans or the strings "yes"/"no". Decisions that are not covered use
+    `default`, and are declined if there is no default.
+"""
+import json
+import sys
+
+from . import console_ui
+
+_TRUE_VALUES = {"y", "yes", "true", "1"}
+_FALSE_VALUES = {"n", "no", "false", "0"}
+
+
+def _parse_answer(value):
+    """
+    Converts an answer from a policy file to a boolean.
+
+    Args:
+        value (bool or str): The answer.
+
+    Returns:
+        bool: The parsed answer.
+
+    Raises:
+        ValueError: If the value is not a recognized yes/no answer.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        if value.strip().lower() in _TRUE_VALUES:
+            return True
+        if value.strip().lower() in _FALSE_VALUES:
+            return False
+    raise ValueError(f"Invalid answer in decision policy: {value!r}")
+
+
+class DecisionPolicy:
+    """
+    Answers pending decisions without asking the user.
+
+    Attributes:
+        default (bool or None): The answer used for decisions that are not
+                                explicitly listed (None declines them).
+        decisions (dict): Explicit answers, keyed as described in the module
+                          documentation.
+    """
+
+    def __init__(self, default=None, decisions=None):
+        """
+        Initializes the policy.
+
+        Args:
+            default (bool, optional): The answer for unlisted decisions.
+            decisions (dict, optional): Explicit answers.
+        """
+        self.default = default
+        self.decisions = dict(decisions or {})
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Loads a policy from a JSON file.
+
+        Args:
+            path (str): The path to the policy file.
+
+        Returns:
+            DecisionPolicy: The loaded policy.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a valid policy.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("A decision policy must be a JSON object.")
+
+        default = data.get("default")
+        if default is not None:
+            default = _parse_answer(default)
+        decisions = data.get("decisions", {})
+        if not isinstance(decisions, dict):
+            raise ValueError("'decisions' must be a JSON object.")
+        decisions = {str(key): _parse_answer(value) for key, value in decisions.items()}
+        return cls(default=default, decisions=decisions)
+
+    def answer(self, app_id, decision_id):
+        """
+        Returns the policy's answer to a decision.
+
+        Args:
+            app_id (str): The Steam AppID of the game.
+            decision_id (str): The ID of the decision.
+
+        Returns:
+            bool: True if the change should be applied.
+        """
+        for key in (f"{app_id}:{decision_id}", decision_id, app_id):
+            if key in self.decisions:
+                return self.decisions[key]
+        return bool(self.default)
+
+
+def resolve_decisions(pending, policy=None, interactive=None):
+    """
+    Answers all pending decisions at once.
+
+    Args:
+        pending (list): A list of dictionaries with the 'app_id' and
+                        'game_name' of a game and one of its 'decision'
+                        dictionaries (see `get_pending_decisions`).
+        policy (DecisionPolicy, optional): The policy used to answer. When a
+                                           policy is given, the user is never
+                                           asked anything.
+        interactive (bool, optional): Whether the user may be asked. Defaults
+                                      to True only if the standard input is a
+                                      terminal; otherwise all decisions are
+                                      declined.
+
+    Returns:
+        dict: A dictionary mapping each AppID to a dictionary of answers
+              keyed by decision ID, ready for `set_answers()`.
+    """
+    answers = {}
+    if not pending:
+        return answers
+
+    if policy is None and interactive is None:
+        interactive = sys.stdin is not None and sys.stdin.isatty()
+
+    if policy is None and interactive:
+        # List every pending change before asking anything
+        console_ui.print_header("Pending changes")
+        for item in pending:
+            decision = item["decision"]
+            message = decision.get("details") or decision["prompt"]
+            console_ui.print_status("INFO", f"{item['game_name']}: {message}")
+
+    for item in pending:
+        decision = item["decision"]
+        if policy is not None:
+            answer = policy.answer(item["app_id"], decision["id"])
+        elif interactive:
+            choice = console_ui.ask_user(
+                f"[{item['game_name']}] {decision['prompt']} (y/n): "
+            )
+            answer = choice.strip().lower() == "y"
+        else:
+            # Nobody can answer: never block, and leave the files untouched
+            answer = False
+        answers.setdefault(item["app_id"], {})[decision["id"]] = answer
+    return answers
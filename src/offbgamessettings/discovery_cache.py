@@ -0,0 +1,246 @@
+"""
+Persistent cache for game discovery results.
+
+Game discovery has to read Steam's `libraryfolders.vdf` and parse every
+matching `appmanifest_*.acf` file. Since the tool is commonly run from login
+hooks or scheduled tasks, this module stores the outcome of a scan on disk so
+that later runs can skip the work when nothing has changed.
+
+How it works:
+-   Every file or directory the scan depends on is identified by a
+    *signature*: its `(mtime, size, inode)` triple, as returned by
+    `file_signature()`.
+-   The cache records the signature of `libraryfolders.vdf`, of each
+    library's `steamapps` directory and of each relevant manifest, together
+    with the data that was extracted from them.
+-   On the next run, a part of the scan is only redone when its signature no
+    longer matches. An unchanged library is answered from the cache without
+    listing its `steamapps` folder or opening its manifests.
+
+Robustness:
+-   The cache file carries a `version` field (`CACHE_VERSION`). A cache
+    written by another version, or a file that cannot be read or parsed, is
+    simply ignored and rebuilt. Entries of the wrong shape (e.g. a library
+    entry that is not an object) are dropped one by one, as cache misses.
+-   The cache is written atomically (temporary file + `os.replace`), so an
+    interrupted run can never leave a half-written cache behind.
+-   All cache errors are swallowed: the cache is an optimization, never a
+    reason for discovery to fail.
+"""
+import json
+import os
+import platform
+
+# Version of the on-disk cache format. Bump it whenever the structure changes
+# so that caches written by older versions are discarded instead of misread.
+CACHE_VERSION = 2
+
+CACHE_FILE_NAME = "discovery_cache.json"
+
+
+def get_cache_dir():
+    """
+    Returns the directory used to store the application's cache files.
+
+    Uses `%LOCALAPPDATA%` on Windows and `$XDG_CACHE_HOME` (defaulting to
+    `~/.cache`) on other systems.
+
+    Returns:
+        str: The absolute path to the cache directory (it may not exist yet).
+    """
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+    return os.path.join(base, "offbgamessettings")
+
+
+def default_cache_path():
+    """
+    Returns the default location of the discovery cache file.
+
+    Returns:
+        str: The absolute path to the discovery cache file.
+    """
+    return os.path.join(get_cache_dir(), CACHE_FILE_NAME)
+
+
+def file_signature(path):
+    """
+    Computes the signature used to detect changes to a file or directory.
+
+    Args:
+        path (str): The path to the file or directory.
+
+    Returns:
+        list or None: `[mtime_ns, size, inode]`, or None if the path cannot
+                      be accessed. A list is used so that signatures compare
+                      equal after a JSON round trip.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def entry_signature(entry):
+    """
+    Computes the signature of an `os.DirEntry` returned by `os.scandir`.
+
+    The stat information cached by the entry is reused, which avoids an
+    extra system call per file on Windows.
+
+    Args:
+        entry (os.DirEntry): The directory entry.
+
+    Returns:
+        list or None: `[mtime_ns, size, inode]`, or None if the entry cannot
+                      be accessed anymore.
+    """
+    try:
+        st = entry.stat()
+        return [st.st_mtime_ns, st.st_size, entry.inode()]
+    except OSError:
+        return None
+
+
+def new_cache(steam_path):
+    """
+    Creates an empty cache structure for a Steam installation.
+
+    Args:
+        steam_path (str): The root path of the Steam installation.
+
+    Returns:
+        dict: An empty cache.
+    """
+    return {
+        "version": CACHE_VERSION,
+        "steam_path": steam_path,
+        "libraryfolders": {"signature": None, "paths": []},
+        "libraries": {},
+    }
+
+
+def _is_signature(value):
+    """Tells whether a cached value is a signature, or None."""
+    return value is None or (
+        isinstance(value, list) and all(isinstance(item, int) for item in value)
+    )
+
+
+def _valid_manifest_entry(entry):
+    """Tells whether a cached manifest entry has the expected shape."""
+    if not isinstance(entry, dict) or not _is_signature(entry.get("signature")):
+        return False
+    details = entry.get("details")
+    return details is None or (
+        isinstance(details, dict)
+        and all(isinstance(value, str) or value is None for value in details.values())
+    )
+
+
+def _valid_library_entry(entry):
+    """Tells whether a cached library entry has the expected shape."""
+    return (
+        isinstance(entry, dict)
+        and _is_signature(entry.get("signature"))
+        and isinstance(entry.get("manifests", {}), dict)
+    )
+
+
+def _sanitize(cache):
+    """
+    Drops the entries of a loaded cache that do not have the expected
+    shape, so that they are treated as cache misses.
+
+    Args:
+        cache (dict): The loaded cache, with valid top-level keys.
+
+    Returns:
+        dict: The same cache.
+    """
+    library_folders = cache["libraryfolders"]
+    paths = library_folders.get("paths")
+    if not _is_signature(library_folders.get("signature")) or not (
+        isinstance(paths, list) and all(isinstance(path, str) for path in paths)
+    ):
+        cache["libraryfolders"] = {"signature": None, "paths": []}
+
+    libraries = {}
+    for library_path, entry in cache["libraries"].items():
+        if not _valid_library_entry(entry):
+            continue
+        manifests = entry.get("manifests", {})
+        entry["manifests"] = {
+            name: manifest
+            for name, manifest in manifests.items()
+            if _valid_manifest_entry(manifest)
+        }
+        if len(entry["manifests"]) != len(manifests):
+            # The list of manifests is incomplete: the folder is listed again
+            entry["signature"] = None
+        libraries[library_path] = entry
+    cache["libraries"] = libraries
+    return cache
+
+
+def load_cache(cache_path, steam_path):
+    """
+    Loads the discovery cache from disk.
+
+    An empty cache is returned if the file does not exist, cannot be parsed,
+    was written by another cache version or belongs to another Steam
+    installation. Malformed entries are dropped.
+
+    Args:
+        cache_path (str): The path to the cache file.
+        steam_path (str): The root path of the Steam installation.
+
+    Returns:
+        dict: The cache structure.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return new_cache(steam_path)
+
+    if (
+        not isinstance(cache, dict)
+        or cache.get("version") != CACHE_VERSION
+        or cache.get("steam_path") != steam_path
+        or not isinstance(cache.get("libraryfolders"), dict)
+        or not isinstance(cache.get("libraries"), dict)
+    ):
+        return new_cache(steam_path)
+    return _sanitize(cache)
+
+
+def save_cache(cache_path, cache):
+    """
+    Writes the discovery cache to disk atomically.
+
+    Args:
+        cache_path (str): The path to the cache file.
+        cache (dict): The cache structure to save.
+
+    Returns:
+        bool: True if the cache was saved, False otherwise.
+    """
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,233 @@
+"""
+Fleet mode: configuration of many offline Steam installations.
+
+Image-build servers hold mounted disk images or mirrors of the Steam folders
+of many rigs. Instead of locating the single Steam installation of the
+current user, fleet mode runs discovery and configuration against a list of
+explicit Steam roots and merges the outcome into a single report.
+
+How it works:
+-   Each root is processed in its own worker process (`ProcessPoolExecutor`),
+    so the roots are handled in parallel with bounded concurrency
+    (`max_workers`), and a crash in one root cannot affect the others.
+-   Inside a worker, the usual pipeline runs: `iter_sim_racing_games()` with
+    the root as `steam_path`, then the orchestrator. Fleet runs are always
+    unattended: decisions are answered by the given `DecisionPolicy`, or
+    declined when there is none.
+-   When tracing is enabled (see `tracing`), each worker traces the roots it
+    processes, and their spans are merged into the trace of the parent.
+-   The per-root results are merged into a report keyed by root, in the
+    order the roots were given. An `on_report` callback can also receive
+    the report of each root as soon as its worker finishes, e.g. to stream
+    the machine-readable records of its games (see the `output` module).
+
+Limitation:
+    Additional libraries listed in a root's `libraryfolders.vdf` are only
+    scanned if their recorded path exists on the machine running the fleet.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import config_orchestrator, tracing
+from .game_discovery import iter_sim_racing_games
+
+# Order of severity used to summarize the status of a root: the status of the
+# root is the most severe status among its games.
+_STATUS_SEVERITY = [
+    "NOT REQUIRED",
+    "INFO",
+    "OK",
+    "NOT FOUND",
+    "PLANNED",
+    "RESTORED",
+    "MODIFIED",
+    "WARNING",
+    "ERROR",
+]
+
+
+def aggregate_status(results):
+    """
+    Summarizes the results of several games as a single status.
+
+    Args:
+        results (dict): A results dictionary returned by the orchestrator.
+
+    Returns:
+        str: The most severe status among the games, or "NOT FOUND" if there
+             are no games.
+    """
+    if not results:
+        return "NOT FOUND"
+
+    def severity(status):
+        status = status.upper()
+        if status in _STATUS_SEVERITY:
+            return _STATUS_SEVERITY.index(status)
+        return _STATUS_SEVERITY.index("WARNING")
+
+    return max((data["status"] for data in results.values()), key=severity)
+
+
+def process_root(
+    root,
+    action="configure",
+    policy=None,
+    timestamp=None,
+    records=False,
+    trace=False,
+    trace_memory=False,
+):
+    """
+    Runs discovery and the requested action against one Steam root.
+
+    This function is executed in a worker process. Any error is captured in
+    the returned report instead of being raised.
+
+    Args:
+        root (str): The root of the Steam installation.
+        action (str): "configure", "revert" or "plan".
+        policy (DecisionPolicy, optional): Answers the decisions of the
+                                           "configure" action.
+        timestamp (float, optional): The point in time restored by the
+                                     "revert" action.
+        records (bool): Whether to add the output record of each game, with
+                        its timings, to the report (see `output`).
+        trace (bool): Whether to trace the work (see `tracing`), and add the
+                      recorded 'trace' events to the report.
+        trace_memory (bool): Whether the trace records the peak memory of
+                             each span.
+
+    Returns:
+        dict: A report with the 'status' of the root, the 'games' results
+              dictionary, an 'error' message (None on success) and, if
+              requested, the 'records' of the games and the 'trace' events.
+    """
+    if not trace:
+        return _process_root(root, action, policy, timestamp, records)
+
+    tracer = tracing.start(memory=trace_memory)
+    try:
+        with tracing.span("process_root", root=root):
+            report = _process_root(root, action, policy, timestamp, records)
+    finally:
+        tracing.stop()
+    report["trace"] = tracer.trace()["traceEvents"]
+    return report
+
+
+def _process_root(root, action, policy, timestamp, records):
+    """Runs discovery and the requested action (see `process_root`)."""
+    if not os.path.isfile(os.path.join(root, "steamapps", "libraryfolders.vdf")):
+        return {
+            "status": "ERROR",
+            "games": {},
+            "error": "No Steam installation found (missing libraryfolders.vdf).",
+        }
+
+    on_result = None
+    game_records = []
+    if records:
+        from .output import build_record
+
+        def on_result(app_id, game_data, result, timings):
+            game_records.append(
+                build_record(app_id, game_data, result, action, timings, root=root)
+            )
+
+    try:
+        games = iter_sim_racing_games(steam_path=root)
+        if action == "plan":
+            results = config_orchestrator.plan_configurations(
+                games, on_result=on_result
+            )
+        elif action == "revert":
+            results = config_orchestrator.revert_configurations(
+                games, timestamp=timestamp, on_result=on_result
+            )
+        else:
+            results = config_orchestrator.check_and_configure_games(
+                games, policy=policy, interactive=False, on_result=on_result
+            )
+    except Exception as e:
+        return {"status": "ERROR", "games": {}, "error": f"{type(e).__name__}: {e}"}
+
+    report = {"status": aggregate_status(results), "games": results, "error": None}
+    if records:
+        report["records"] = game_records
+    return report
+
+
+def run_fleet(
+    roots,
+    action="configure",
+    policy=None,
+    max_workers=None,
+    timestamp=None,
+    on_report=None,
+    records=None,
+):
+    """
+    Processes many Steam roots in parallel worker processes.
+
+    Args:
+        roots (list): The roots of the Steam installations.
+        action (str): "configure", "revert" or "plan".
+        policy (DecisionPolicy, optional): Answers the decisions of the
+                                           "configure" action.
+        max_workers (int, optional): The maximum number of roots processed at
+                                     once. Defaults to the number of CPUs.
+        timestamp (float, optional): The point in time restored by the
+                                     "revert" action.
+        on_report (callable, optional): Called with `(root, report)` as soon
+                                        as each root is processed (in
+                                        completion order). The reports then
+                                        include the 'records' of the games.
+        records (bool, optional): Whether the reports include the 'records'
+                                  of the games. Defaults to whether
+                                  `on_report` is given.
+
+    Returns:
+        dict: The merged report, mapping each root (in the given order) to
+              its report (see `process_root`).
+    """
+    roots = list(dict.fromkeys(roots))
+    if not roots:
+        return {}
+
+    workers = min(max_workers or os.cpu_count() or 1, len(roots))
+    tracer = tracing.current()
+    reports = {}
+    if records is None:
+        records = on_report is not None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                process_root,
+                root,
+                action,
+                policy,
+                timestamp,
+                records,
+                tracer is not None,
+                tracer is not None and tracer.memory,
+            ): root
+            for root in roots
+        }
+        for future in as_completed(futures):
+            root = futures[future]
+            try:
+                reports[root] = future.result()
+            except Exception as e:
+                # The worker itself failed (e.g. it was killed)
+                reports[root] = {
+                    "status": "ERROR",
+                    "games": {},
+                    "error": f"Worker failed: {type(e).__name__}: {e}",
+                }
+            if "trace" in reports[root]:
+                tracer.merge(reports[root].pop("trace"))
+            if on_report:
+                on_report(root, reports[root])
+    # Merge the reports in the order the roots were given
+    return {root: reports[root] for root in roots}
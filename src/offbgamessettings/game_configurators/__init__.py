@@ -3,14 +3,21 @@ Sub-package for specific game configurators.
 
 This package contains all modules responsible for the configuration logic
 specific to each game or family of games. The architecture is designed to be
-extensible: to support a new game, simply add a new configurator module here.
+extensible: to support a new game, declare its rule set, or add a new
+configurator module here for needs the rules cannot express.
 
 Design:
 - `base_configurator.py`: Defines the abstract base class that all other
   configurators must inherit from.
 - `factory.py`: Provides a factory to instantiate the correct configurator
-  based on the game's AppID.
-- `*_configurator.py`: Each file implements the logic for a specific game
-  (e.g., `dirt_wrc_configurator.py`).
+  based on the game's AppID. Configurator modules are only imported when
+  one of their games is found.
+- `rules.py`: Declarative rules (an XML node must exist, a JSON value must
+  be negative, a file must exist, an INI key must have a value...) grouped
+  into per-game rule sets.
+- `rule_set_configurator.py`: The generic configurator enforcing a rule set,
+  reading, backing up and writing each target file once per run.
+- `*_configurator.py`: Each file declares the rules of a specific game, or
+  implements its logic (e.g., `dirt_wrc_configurator.py`).
 """
 # This empty file makes this directory a Python package.
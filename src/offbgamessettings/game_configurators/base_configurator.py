@@ -9,9 +9,43 @@ and reverting configurations.
 Using an ABC allows the factory to treat all configurators
 uniformly, which simplifies the overall design and makes it easier to add
 new game configurations.
+
+Decisions:
+    Some changes require the user's consent. Instead of prompting in the
+    middle of a file operation, a configurator lists the questions it needs
+    answered in `get_pending_decisions()`, which must not have any side
+    effect. The orchestrator collects the decisions of every game, answers
+    them all at once (interactively or from a policy) and hands the answers
+    back with `set_answers()` before `check_and_configure()` is called.
+
+Dry runs:
+    `plan()` returns the operations `check_and_configure()` would perform,
+    with a unified diff of each file, without writing anything.
+
+Results:
+    Operations return a `GameResult` (see `results`): the final status and
+    the log entries of the run. `_log()` records an entry from a message
+    template and its parameters; the message is only formatted if it is
+    displayed.
+
+Transactions:
+    Game files are written with `_write()`. When the orchestrator runs the
+    configurator in a transaction (see `transaction`), the writes are only
+    staged, and committed together once the configurator returns, so that
+    a game is never left half configured.
+
+Probes:
+    On re-runs, games are almost always already configured. `probe()` is a
+    cheap first stage that answers "definitely configured" from a byte-level
+    search in the memory-mapped files (see `utils.mapped_file`). Only when
+    the probe is inconclusive are the files fully parsed.
 """
 from abc import ABC, abstractmethod
 
+from .. import console_ui
+from ..results import GameResult, LogEntry, Status
+from ..utils import atomic_write, count_io
+
 
 class BaseGameConfigurator(ABC):
     """
@@ -26,6 +60,11 @@ class BaseGameConfigurator(ABC):
         game_path (str): The installation path of the game.
         logs (list): A list to store log messages during operations.
         status (str): The final status of the configuration check.
+        answers (dict): The answers to the pending decisions, keyed by
+                        decision ID (see `set_answers`).
+        transaction (Transaction or None): The transaction in which the
+                                           game files are written, set by
+                                           the orchestrator.
     """
 
     def __init__(self, app_id, game_name, game_path):
@@ -41,7 +80,100 @@ class BaseGameConfigurator(ABC):
         self.game_name = game_name
         self.game_path = game_path
         self.logs = []
-        self.status = "OK"
+        self.status = Status.OK
+        self.answers = {}
+        self.transaction = None
+
+    def get_pending_decisions(self):
+        """
+        Lists the questions that must be answered before applying changes.
+
+        This method must only read the game files: it is called for every
+        game before anything is modified. Configurators that never need the
+        user's consent do not have to override it.
+
+        Returns:
+            list: A list of decision dictionaries with an 'id' (unique within
+                  the configurator), a 'prompt' (a yes/no question) and an
+                  optional 'details' message.
+        """
+        return []
+
+    def set_answers(self, answers):
+        """
+        Provides the answers to the decisions returned by
+        `get_pending_decisions()`.
+
+        Args:
+            answers (dict): A dictionary mapping decision IDs to a boolean
+                            (True to apply the change).
+        """
+        self.answers = dict(answers)
+
+    def _confirm(self, decision_id, prompt):
+        """
+        Returns whether the change behind a decision should be applied.
+
+        The answer collected beforehand is used when available. Otherwise,
+        for configurators run on their own, the user is asked directly.
+
+        Args:
+            decision_id (str): The ID of the decision.
+            prompt (str): The question to ask if no answer was provided.
+
+        Returns:
+            bool: True if the change should be applied.
+        """
+        if decision_id in self.answers:
+            return bool(self.answers[decision_id])
+        return (
+            console_ui.ask_user(f"[{self.game_name}] {prompt} (y/n): ").lower() == "y"
+        )
+
+    def _log(self, status, template, *params):
+        """
+        Records a log entry.
+
+        Args:
+            status (str or Status): The status of the message.
+            template (str): The message, or its template (`str.format`
+                            syntax) if `params` are given.
+            *params: The parameters of the template.
+        """
+        self.logs.append(LogEntry(status, template, *params))
+
+    def _write(self, file_path, content, backup=False):
+        """
+        Writes a game file: staged in the transaction of the run if there is
+        one, written atomically right away otherwise.
+
+        Args:
+            file_path (str): The path to the file.
+            content (bytes): The new content of the file.
+            backup (bool): Whether the transaction backs up the file when it
+                           is committed. Without a transaction, the caller
+                           backs the file up first.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        if self.transaction is not None:
+            # Counted by the transaction, once committed
+            self.transaction.stage(file_path, content, backup=backup)
+        elif atomic_write(file_path, content, defer_directory_sync=True):
+            count_io("written", len(content))
+
+    def _result(self, operations=None):
+        """
+        Builds the result of the current operation.
+
+        Args:
+            operations (list, optional): The planned operations (dry runs).
+
+        Returns:
+            GameResult: The status and logs of the configurator.
+        """
+        return GameResult(self.status, self.logs, operations)
 
     @abstractmethod
     def check_and_configure(self):
@@ -53,19 +185,74 @@ class BaseGameConfigurator(ABC):
         OpenFFBoard's requirements.
 
         Returns:
-            dict: A dictionary containing the final 'status' and a list of 'logs'.
+            GameResult or dict: The final 'status' and a list of 'logs'.
         """
         pass
 
+    def managed_files(self):
+        """
+        Lists the game files this configurator checks or modifies.
+
+        They are fingerprinted in the configuration ledger (see `ledger`),
+        so that the game is only checked again when one of them changes.
+        Configurators that do not manage any file do not have to override
+        it; their games are always checked.
+
+        Returns:
+            list: The absolute paths of the files (existing or not).
+        """
+        return []
+
+    def probe(self):
+        """
+        Checks cheaply whether the game is definitely configured.
+
+        The probe must never give a false positive: when in doubt (unusual
+        encoding, commented-out entries, duplicated keys...), it answers
+        False and the full check runs. Configurators without a fast path do
+        not have to override it.
+
+        Returns:
+            bool: True if the game is definitely configured, False if a full
+                  check is needed.
+        """
+        return False
+
+    def plan(self):
+        """
+        Computes the changes `check_and_configure` would make, without
+        making them.
+
+        This method must never write or back up anything: it is used for
+        dry runs. Changes that depend on a decision are planned as if the
+        decision was accepted. Configurators that do not modify files do not
+        have to override it.
+
+        Returns:
+            GameResult or dict: The 'status' ("PLANNED" when there are
+                  changes), a list of 'logs' and a list of 'operations'.
+                  Each operation has an 'op' type ("create_file",
+                  "insert_node", "change_key" or "set_key"), the 'path' of the file, a
+                  'description', the ID of the 'decision' it depends on (or
+                  None) and a unified 'diff' of the file content.
+        """
+        return self._result(operations=[])
+
     @abstractmethod
-    def revert_configuration(self):
+    def revert_configuration(self, timestamp=None):
         """
         Restores the original game configuration from a backup.
 
         This method should find the backup files created by the
         configurator and use them to restore the original game files.
 
+        Args:
+            timestamp (float, optional): A point in time. When given, the
+                                         files are restored to the newest
+                                         backup taken at or before it,
+                                         instead of the original files.
+
         Returns:
-            dict: A dictionary containing the final 'status' and a list of 'logs'.
+            GameResult or dict: The final 'status' and a list of 'logs'.
         """
         pass
@@ -10,260 +10,116 @@ Configuration rules:
         game to recognize the device.
     -   The configuration adds a `<device>` node with the hardware device ID
         of the OpenFFBoard: `{FFB01209-0000-0000-0000-504944564944}`.
+    -   The node is spliced into the existing file (see `xml_splice`), so
+        the diff against the vanilla file is a single added line.
 2.  **openffboard.xml**:
     -   An `action map` file must be created in the
         `actionmaps` directory to define how the steering wheel axes are
         used in-game (e.g., steering).
     -   This configurator creates this file if it is missing.
 
-The path to the configuration files varies slightly between games
-(e.g., DiRT Rally 2.0 vs. WRC), which is handled by the `_get_paths` method.
-"""
-import os
-import shutil
-import xml.etree.ElementTree as ET
-
-from ..utils import backup_file
-from .base_configurator import BaseGameConfigurator
-
-
-class DirtWrcConfigurator(BaseGameConfigurator):
-    def _get_paths(self):
-        """
-        Determines the paths of the configuration files based on the game's AppID.
-
-        Returns:
-            tuple: (device_defines_path, actionmaps_path) or (None, None) if
-                   the game's AppID is not recognized.
-        """
-        if self.app_id == "1849250":  # EA SPORTS WRC
-            device_path = os.path.join(
-                self.game_path,
-                "WRC",
-                "Content",
-                "input",
-                "Windows",
-                "devices",
-                "device_defines.xml",
-            )
-            actionmaps_path = os.path.join(
-                self.game_path,
-                "WRC",
-                "Content",
-                "input",
-                "Windows",
-                "actionmaps",
-            )
-            return device_path, actionmaps_path
-        elif self.app_id == "690790":  # DiRT Rally 2.0
-            device_path = os.path.join(
-                self.game_path, "input", "devices", "device_defines.xml"
-            )
-            actionmaps_path = os.path.join(self.game_path, "input", "actionmaps")
-            return device_path, actionmaps_path
-        return None, None
-
-    def check_and_configure(self):
-        """
-        Checks and configures the `device_defines.xml` and `openffboard.xml` files.
-        """
-        device_defines_path, actionmaps_path = self._get_paths()
-
-        if not device_defines_path or not os.path.exists(device_defines_path):
-            self.logs.append(
-                {
-                    "status": "WARNING",
-                    "message": (
-                        "Could not find device_defines.xml. The game may be corrupt or "
-                        "incomplete."
-                    ),
-                }
-            )
-            self.status = "WARNING"
-            return {"status": self.status, "logs": self.logs}
-
-        # --- 1. Check and modify device_defines.xml ---
-        try:
-            tree = ET.parse(device_defines_path)
-            root = tree.getroot()
-            device_id = "{FFB01209-0000-0000-0000-504944564944}"
-
-            # Check if the OpenFFBoard device node already exists
-            if not root.findall(f".//device[@id='{device_id}']"):
-                # Back up the file before modifying it
-                if backup_file(device_defines_path):
-                    self.logs.append(
-                        {
-                            "status": "INFO",
-                            "message": (
-                                "Backup of "
-                                f"{os.path.basename(device_defines_path)} created."
-                            ),
-                        }
-                    )
-                    # Create and add the new device element
-                    new_device = ET.Element(
-                        "device",
-                        {
-                            "id": device_id,
-                            "name": "openffboard",
-                            "priority": "100",
-                            "type": "wheel",
-                            "official": "false",
-                        },
-                    )
-                    root.append(new_device)
-                    tree.write(
-                        device_defines_path,
-                        encoding="utf-8",
-                        xml_declaration=True,
-                    )
-                    self.logs.append(
-                        {
-                            "status": "MODIFIED",
-                            "message": (
-                                "OpenFFBoard device added to " "device_defines.xml."
-                            ),
-                        }
-                    )
-                    self.status = "MODIFIED"
-                else:
-                    self.logs.append(
-                        {
-                            "status": "ERROR",
-                            "message": (
-                                "Failed to create backup for "
-                                f"{os.path.basename(device_defines_path)}."
-                            ),
-                        }
-                    )
-                    self.status = "ERROR"
-            else:
-                self.logs.append(
-                    {
-                        "status": "OK",
-                        "message": (
-                            "OpenFFBoard device is already configured in "
-                            "device_defines.xml."
-                        ),
-                    }
-                )
+Both rules are declared in a rule set (see `rules`), enforced by the
+generic `RuleSetConfigurator`. The path to the configuration files varies
+slightly between games (e.g., DiRT Rally 2.0 vs. WRC), hence one rule set
+per game, built by `_codemasters_rules()`.
 
-        except ET.ParseError:
-            self.logs.append(
-                {
-                    "status": "ERROR",
-                    "message": (
-                        f"Failed to parse {os.path.basename(device_defines_path)}. "
-                        "The file may be corrupt."
-                    ),
-                }
-            )
-            self.status = "ERROR"
-
-        # --- 2. Check and create openffboard.xml in actionmaps ---
-        if actionmaps_path and os.path.isdir(actionmaps_path):
-            openffboard_xml_path = os.path.join(actionmaps_path, "openffboard.xml")
-            if not os.path.exists(openffboard_xml_path):
-                # XML content for the basic action mapping
-                xml_content = (
-                    '<action_map name="openffboard" device_name="openffboard" '
-                    'library="lib_direct_input">'
-                    "<axis_defaults>"
-                    '<axis name="di_x_axis">'
-                    '<action deadzone="0" name="driving.steer.left" />'
-                    '<action deadzone="0" name="driving.steer.right" />'
-                    "</axis>"
-                    "</axis_defaults>"
-                    '<group name="driving">'
-                    '<group name="steer">'
-                    '<action name="left">'
-                    '<axis name="di_x_axis" type="lower" />'
-                    "</action>"
-                    '<action name="right">'
-                    '<axis name="di_x_axis" type="upper" />'
-                    "</action>"
-                    "</group>"
-                    "</group>"
-                    "</action_map>"
-                )
-                try:
-                    with open(openffboard_xml_path, "w", encoding="utf-8") as f:
-                        f.write(xml_content)
-                    self.logs.append(
-                        {
-                            "status": "MODIFIED",
-                            "message": "Action map file openffboard.xml created.",
-                        }
-                    )
-                    if self.status != "ERROR":
-                        self.status = "MODIFIED"
-                except IOError:
-                    self.logs.append(
-                        {
-                            "status": "ERROR",
-                            "message": ("Could not write to openffboard.xml."),
-                        }
-                    )
-                    self.status = "ERROR"
-            else:
-                self.logs.append(
-                    {
-                        "status": "OK",
-                        "message": "Action map file openffboard.xml already exists.",
-                    }
-                )
-        else:
-            self.logs.append(
-                {"status": "WARNING", "message": "Actionmaps directory not found."}
-            )
-            if self.status not in ["ERROR", "MODIFIED"]:
-                self.status = "WARNING"
-
-        return {"status": self.status, "logs": self.logs}
-
-    def revert_configuration(self):
-        """
-        Restores `device_defines.xml` from the backup.
-
-        Note: The `openffboard.xml` file is not deleted because it
-        does not overwrite any existing files, and its deletion is not critical.
-        """
-        device_defines_path, _ = self._get_paths()
-
-        if not device_defines_path:
-            self.status = "NOT REQUIRED"
-            return {"status": self.status, "logs": self.logs}
-
-        backup_path = device_defines_path + ".bak_offb_settings"
-        if os.path.exists(backup_path):
-            try:
-                shutil.copy2(backup_path, device_defines_path)
-                self.logs.append(
-                    {
-                        "status": "RESTORED",
-                        "message": (
-                            f"{os.path.basename(device_defines_path)} restored "
-                            "from backup."
-                        ),
-                    }
-                )
-                self.status = "RESTORED"
-            except IOError:
-                self.logs.append(
-                    {
-                        "status": "ERROR",
-                        "message": (
-                            "Failed to restore "
-                            f"{os.path.basename(device_defines_path)}."
-                        ),
-                    }
-                )
-                self.status = "ERROR"
-        else:
-            self.logs.append(
-                {"status": "INFO", "message": "No backup found to restore."}
-            )
-            self.status = "NOT FOUND"
-
-        return {"status": self.status, "logs": self.logs}
+Fast path:
+    Before parsing `device_defines.xml`, the memory-mapped file is searched
+    for a `<device>` tag carrying the OpenFFBoard ID (outside of comments).
+    If it is found, the file is not parsed at all.
+"""
+from .rule_set_configurator import RuleSetConfigurator
+from .rules import FileExists, RuleSet, XmlNodeExists
+
+# Hardware device ID of the OpenFFBoard
+OPENFFBOARD_DEVICE_ID = "{FFB01209-0000-0000-0000-504944564944}"
+
+# Attributes of the `<device>` node added to device_defines.xml
+OPENFFBOARD_DEVICE_ATTRIBUTES = {
+    "id": OPENFFBOARD_DEVICE_ID,
+    "name": "openffboard",
+    "priority": "100",
+    "type": "wheel",
+    "official": "false",
+}
+
+# XML content for the basic action mapping (openffboard.xml)
+ACTION_MAP_CONTENT = (
+    '<action_map name="openffboard" device_name="openffboard" '
+    'library="lib_direct_input">'
+    "<axis_defaults>"
+    '<axis name="di_x_axis">'
+    '<action deadzone="0" name="driving.steer.left" />'
+    '<action deadzone="0" name="driving.steer.right" />'
+    "</axis>"
+    "</axis_defaults>"
+    '<group name="driving">'
+    '<group name="steer">'
+    '<action name="left">'
+    '<axis name="di_x_axis" type="lower" />'
+    "</action>"
+    '<action name="right">'
+    '<axis name="di_x_axis" type="upper" />'
+    "</action>"
+    "</group>"
+    "</group>"
+    "</action_map>"
+)
+
+
+def _codemasters_rules(name, input_dir):
+    """
+    Builds the rule set of a Codemasters game.
+
+    Args:
+        name (str): The name of the game.
+        input_dir (tuple): The path of the `input` folder of the game,
+                           relative to the game folder.
+
+    Returns:
+        RuleSet: The rules of the game.
+    """
+    return RuleSet(
+        name,
+        [
+            XmlNodeExists(
+                input_dir + ("devices", "device_defines.xml"),
+                "device",
+                OPENFFBOARD_DEVICE_ATTRIBUTES,
+                name="OpenFFBoard device",
+                missing_message=(
+                    "Could not find device_defines.xml. The game may be corrupt or "
+                    "incomplete."
+                ),
+            ),
+            FileExists(
+                input_dir + ("actionmaps", "openffboard.xml"),
+                ACTION_MAP_CONTENT,
+                name="Action map file",
+            ),
+        ],
+    )
+
+
+DIRT_RALLY_2_RULES = _codemasters_rules("DiRT Rally 2.0", ("input",))
+EA_SPORTS_WRC_RULES = _codemasters_rules(
+    "EA SPORTS WRC", ("WRC", "Content", "input", "Windows")
+)
+
+# Rule set of each supported game, by AppID
+RULE_SETS = {
+    "690790": DIRT_RALLY_2_RULES,
+    "1849250": EA_SPORTS_WRC_RULES,
+}
+
+
+class DirtWrcConfigurator(RuleSetConfigurator):
+    """
+    Configures a Codemasters game from the rule set of its AppID.
+
+    Note: Reverting does not delete the `openffboard.xml` file, because it
+    does not overwrite any existing files, and its deletion is not critical.
+    """
+
+    def __init__(self, app_id, game_name, game_path):
+        super().__init__(app_id, game_name, game_path, RULE_SETS.get(app_id))
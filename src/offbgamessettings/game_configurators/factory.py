@@ -5,24 +5,33 @@ This module is the central point for dispatching configuration tasks. The
 `ConfiguratorFactory` class uses a mapping table (`CONFIGURATOR_MAP`)
 to associate a Steam AppID with the appropriate concrete configurator class.
 
+The table holds the dotted paths of the classes (relative to this package),
+not the classes themselves: a configurator module, and what it imports
+(`xml.etree`, `json`...), is only loaded when one of its games is installed.
+
+An entry may also point to a `RuleSet` (see `rules`) instead of a class:
+the game is then configured by a `RuleSetConfigurator` enforcing it.
+
 This design decouples the main application logic from the specific
 implementation of each game configurator, making the system easy to extend:
-to support a new game, simply create a new configurator class and
-add it to the mapping table.
+to support a new game, declare its rule set (or, for unusual needs, create
+a new configurator class) and add it to the mapping table.
 """
-from .dirt_wrc_configurator import DirtWrcConfigurator
+import importlib
+
 from .recommendation_configurator import RecommendationConfigurator
-from .rfactor2_configurator import Rfactor2Configurator
 
 # --- Mapping table from AppID to configurator class ---
 # This is the core of the factory. To add support for a new game,
-# simply add a new entry here.
+# simply add a new entry here ("<module>.<class or rule set>", relative to
+# this package).
 CONFIGURATOR_MAP = {
-    "1849250": DirtWrcConfigurator,  # EA SPORTS WRC
-    "690790": DirtWrcConfigurator,  # DiRT Rally 2.0
-    "365960": Rfactor2Configurator,  # rFactor 2
-    "1134570": RecommendationConfigurator,  # F1 2020 (recommendation example)
-    "1692250": RecommendationConfigurator,  # F1 22 (recommendation example)
+    "1849250": ".dirt_wrc_configurator.EA_SPORTS_WRC_RULES",  # EA SPORTS WRC
+    "690790": ".dirt_wrc_configurator.DIRT_RALLY_2_RULES",  # DiRT Rally 2.0
+    "365960": ".rfactor2_configurator.RFACTOR_2_RULES",  # rFactor 2
+    # F1 2020 and F1 22 (recommendation examples)
+    "1134570": ".recommendation_configurator.RecommendationConfigurator",
+    "1692250": ".recommendation_configurator.RecommendationConfigurator",
 }
 
 # --- Specific recommendations for games that need them ---
@@ -39,6 +48,23 @@ RECOMMENDATIONS = {
 }
 
 
+def resolve_configurator_class(dotted_path):
+    """
+    Imports a configurator class, or a rule set, from its entry in
+    `CONFIGURATOR_MAP`.
+
+    Args:
+        dotted_path (str): The path of the class or rule set, e.g.
+                           ".rfactor2_configurator.RFACTOR_2_RULES".
+
+    Returns:
+        type or RuleSet: The configurator class, or the rule set.
+    """
+    module_name, _, class_name = dotted_path.rpartition(".")
+    module = importlib.import_module(module_name, package=__package__)
+    return getattr(module, class_name)
+
+
 class ConfiguratorFactory:
     """
     A static factory for creating instances of game configurators.
@@ -58,11 +84,18 @@ class ConfiguratorFactory:
             BaseGameConfigurator or None: An instance of a game configurator if
                                         a mapping exists, otherwise None.
         """
-        config_class = CONFIGURATOR_MAP.get(app_id)
+        dotted_path = CONFIGURATOR_MAP.get(app_id)
 
-        if not config_class:
+        if not dotted_path:
             # No configurator is defined for this game
             return None
+        config_class = resolve_configurator_class(dotted_path)
+
+        if not isinstance(config_class, type):
+            # A rule set, enforced by the generic configurator
+            from .rule_set_configurator import RuleSetConfigurator
+
+            return RuleSetConfigurator(app_id, game_name, game_path, config_class)
 
         # Special case for the recommendation configurator, which needs
         # additional arguments during its initialization.
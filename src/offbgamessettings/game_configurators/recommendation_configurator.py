@@ -17,6 +17,7 @@ How it works:
 -   The `revert_configuration` method does nothing, as no changes
     were made.
 """
+from ..results import Status
 from .base_configurator import BaseGameConfigurator
 
 
@@ -39,26 +40,24 @@ class RecommendationConfigurator(BaseGameConfigurator):
         super().__init__(app_id, game_name, game_path)
         self.recommendations = recommendations
         # The default status is INFO because it only gives advice
-        self.status = "INFO"
+        self.status = Status.INFO
 
     def check_and_configure(self):
         """
         Adds the predefined recommendations to the logs for display.
         """
         for rec in self.recommendations:
-            self.logs.append({"status": "INFO", "message": rec})
-        return {"status": self.status, "logs": self.logs}
+            self._log("INFO", rec)
+        return self._result()
 
-    def revert_configuration(self):
+    def revert_configuration(self, timestamp=None):
         """
         Does nothing because no changes are made by this configurator.
 
         Returns:
-            dict: A "NOT REQUIRED" status to indicate that no action
+            GameResult: A "NOT REQUIRED" status to indicate that no action
                   was necessary.
         """
-        self.status = "NOT REQUIRED"
-        self.logs.append(
-            {"status": "INFO", "message": "No changes to revert for recommendations."}
-        )
-        return {"status": self.status, "logs": self.logs}
+        self.status = Status.NOT_REQUIRED
+        self._log("INFO", "No changes to revert for recommendations.")
+        return self._result()
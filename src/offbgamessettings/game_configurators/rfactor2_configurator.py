@@ -8,183 +8,53 @@ Configuration rule (Controller.JSON file):
 - The value of the 'Steering effects strength' parameter must be negative to
   be compatible with the OpenFFBoard. A positive value results in
   inverted force feedback (the wheel turns in the wrong direction).
-- If a positive value is detected, the configurator prompts the user
-  to apply the correction.
+- If a positive value is detected, the configurator asks for the user's
+  confirmation (through a pending decision, see `BaseGameConfigurator`)
+  before applying the correction.
 - The correction simply consists of inverting the sign of the value
-  (e.g., 8000 becomes -8000).
-"""
-import json
-import os
-import shutil
-
-from .. import console_ui
-from ..utils import backup_file
-from .base_configurator import BaseGameConfigurator
-
-
-class Rfactor2Configurator(BaseGameConfigurator):
-    def _get_controller_json_path(self):
-        """
-        Builds the path to the `Controller.JSON` file.
-
-        Returns:
-            str: The absolute path to the configuration file.
-        """
-        return os.path.join(self.game_path, "UserData", "player", "Controller.JSON")
-
-    def check_and_configure(self):
-        """
-        Checks and corrects the value of 'Steering effects strength' in
-        the `Controller.JSON` file.
-        """
-        controller_json_path = self._get_controller_json_path()
-
-        if not os.path.exists(controller_json_path):
-            self.logs.append(
-                {
-                    "status": "WARNING",
-                    "message": (
-                        "Controller.JSON file not found. The user profile may not "
-                        "have been created yet."
-                    ),
-                }
-            )
-            self.status = "WARNING"
-            return {"status": self.status, "logs": self.logs}
+  (e.g., 8000 becomes -8000). Only the bytes of that value are rewritten
+  (see `json_patch`); the rest of the file stays as rFactor 2 wrote it.
 
-        try:
-            with open(controller_json_path, "r+", encoding="utf-8") as f:
-                data = json.load(f)
-                strength = data.get("Steering effects strength", 0)
+The rule is declared in a rule set (see `rules`), enforced by the generic
+`RuleSetConfigurator`.
 
-                # If the force is positive, it must be inverted
-                if strength > 0:
-                    self.logs.append(
-                        {
-                            "status": "INFO",
-                            "message": (
-                                f"The value of 'Steering effects strength' is positive "
-                                f"({strength})."
-                            ),
-                        }
-                    )
-                    # Ask for user confirmation before modifying
-                    choice = console_ui.ask_user(
-                        "Do you want to apply the recommended negative value? "
-                        "(y/n): "
-                    ).lower()
-
-                    if choice == "y":
-                        if backup_file(controller_json_path):
-                            self.logs.append(
-                                {
-                                    "status": "INFO",
-                                    "message": "Backup of Controller.JSON created.",
-                                }
-                            )
-                            # Invert the value and rewrite the JSON file
-                            data["Steering effects strength"] = -strength
-                            f.seek(0)
-                            json.dump(data, f, indent=2)
-                            f.truncate()
-                            self.logs.append(
-                                {
-                                    "status": "MODIFIED",
-                                    "message": (
-                                        "The value of 'Steering effects strength' "
-                                        "has been inverted."
-                                    ),
-                                }
-                            )
-                            self.status = "MODIFIED"
-                        else:
-                            self.logs.append(
-                                {
-                                    "status": "ERROR",
-                                    "message": (
-                                        "Failed to create backup for "
-                                        "Controller.JSON."
-                                    ),
-                                }
-                            )
-                            self.status = "ERROR"
-                    else:
-                        self.logs.append(
-                            {
-                                "status": "INFO",
-                                "message": (
-                                    "Modification skipped at " "the user's request."
-                                ),
-                            }
-                        )
-                else:
-                    self.logs.append(
-                        {
-                            "status": "OK",
-                            "message": (
-                                "The value of 'Steering effects strength' is "
-                                "already configured correctly."
-                            ),
-                        }
-                    )
-
-        except json.JSONDecodeError:
-            self.logs.append(
-                {
-                    "status": "ERROR",
-                    "message": (
-                        f"Failed to parse {os.path.basename(controller_json_path)}. "
-                        "The file may be corrupt."
-                    ),
-                }
-            )
-            self.status = "ERROR"
-        except Exception as e:
-            self.logs.append(
-                {
-                    "status": "ERROR",
-                    "message": ("An unexpected error occurred: " f"{e}"),
-                }
-            )
-            self.status = "ERROR"
-
-        return {"status": self.status, "logs": self.logs}
-
-    def revert_configuration(self):
-        """
-        Restores `Controller.JSON` from the backup.
-        """
-        controller_json_path = self._get_controller_json_path()
-        backup_path = controller_json_path + ".bak_offb_settings"
-
-        if os.path.exists(backup_path):
-            try:
-                shutil.copy2(backup_path, controller_json_path)
-                self.logs.append(
-                    {
-                        "status": "RESTORED",
-                        "message": (
-                            f"{os.path.basename(controller_json_path)} restored "
-                            "from backup."
-                        ),
-                    }
-                )
-                self.status = "RESTORED"
-            except IOError:
-                self.logs.append(
-                    {
-                        "status": "ERROR",
-                        "message": (
-                            "Failed to restore "
-                            f"{os.path.basename(controller_json_path)}."
-                        ),
-                    }
-                )
-                self.status = "ERROR"
-        else:
-            self.logs.append(
-                {"status": "INFO", "message": "No backup found to restore."}
-            )
-            self.status = "NOT FOUND"
-
-        return {"status": self.status, "logs": self.logs}
+Fast path:
+    `Controller.JSON` holds several hundred keys. Before loading it, the
+    memory-mapped file is searched for `"Steering effects strength": -`. If
+    the key appears exactly once with a negative value, the file is already
+    configured and is not parsed.
+"""
+from .rule_set_configurator import RuleSetConfigurator
+from .rules import JsonKeyNegative, RuleSet
+
+STEERING_STRENGTH_KEY = "Steering effects strength"
+STEERING_STRENGTH_PATH = (STEERING_STRENGTH_KEY,)
+
+# Decision asked to the user before inverting the FFB direction
+INVERT_STRENGTH_DECISION = "invert_steering_strength"
+INVERT_STRENGTH_PROMPT = "Do you want to apply the recommended negative value?"
+
+RFACTOR_2_RULES = RuleSet(
+    "rFactor 2",
+    [
+        JsonKeyNegative(
+            ("UserData", "player", "Controller.JSON"),
+            STEERING_STRENGTH_PATH,
+            decision=INVERT_STRENGTH_DECISION,
+            prompt=INVERT_STRENGTH_PROMPT,
+            missing_message=(
+                "Controller.JSON file not found. The user profile may not have "
+                "been created yet."
+            ),
+        )
+    ],
+)
+
+
+class Rfactor2Configurator(RuleSetConfigurator):
+    """
+    Configures rFactor 2 from `RFACTOR_2_RULES`.
+    """
+
+    def __init__(self, app_id, game_name, game_path):
+        super().__init__(app_id, game_name, game_path, RFACTOR_2_RULES)
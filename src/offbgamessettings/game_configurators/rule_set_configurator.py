@@ -0,0 +1,420 @@
+"""
+Generic configurator enforcing a declarative rule set.
+
+A `RuleSetConfigurator` applies the rules of a `RuleSet` (see `rules`) to a
+game. It replaces the hand-written open, parse, check, back up and write
+sequence of each configurator with a single engine.
+
+How it works:
+1.  The rules are grouped by target file. Files that must be patched in
+    place (any rule other than `FileExists`) are required: if one is
+    missing, the game is reported as incomplete and left untouched.
+2.  Each file is probed first: when the byte-level probes of all its rules
+    succeed on the memory-mapped file, it is neither read nor parsed.
+3.  Otherwise, the file is read once, and its rules are checked against a
+    single shared `Document`, parsed at most once.
+4.  Changes that need the user's consent are exposed as pending decisions.
+    The evaluation is kept for `check_and_configure()`, which reuses it as
+    long as the files have not changed in the meantime.
+5.  The accepted changes of each file are applied in a single patch, the
+    file is backed up once and written once (atomically, or staged in the
+    transaction of the run and backed up when it is committed, see
+    `BaseGameConfigurator._write`).
+
+Reverting restores every file patched in place from the backup store.
+Created files (`FileExists`) are left in place, as they never overwrite
+anything.
+"""
+import os
+
+from ..backup_store import backup_file, restore_backup
+from ..discovery_cache import file_signature
+from ..results import Status
+from ..tracing import span
+from ..utils import mapped_file, unified_diff
+from .base_configurator import BaseGameConfigurator
+from .rules import RawDocument
+
+# Precedence of the statuses of a configuration run
+_STATUS_PRECEDENCE = (Status.OK, Status.WARNING, Status.MODIFIED, Status.ERROR)
+
+
+class RuleSetConfigurator(BaseGameConfigurator):
+    """
+    A configurator driven by a rule set.
+
+    Attributes:
+        rule_set (RuleSet or None): The rules of the game.
+    """
+
+    def __init__(self, app_id, game_name, game_path, rule_set):
+        """
+        Initializes the configurator.
+
+        Args:
+            app_id (str): The Steam AppID of the game.
+            game_name (str): The name of the game.
+            game_path (str): The installation path of the game.
+            rule_set (RuleSet or None): The rules of the game.
+        """
+        super().__init__(app_id, game_name, game_path)
+        self.rule_set = rule_set
+        self._evaluation = None
+
+    def _targets(self):
+        """
+        Lists the target files and their rules.
+
+        Returns:
+            list: `(absolute_path, rules)` pairs, in the order of the rules.
+        """
+        if self.rule_set is None:
+            return []
+        return [
+            (os.path.join(self.game_path, *path), rules)
+            for path, rules in self.rule_set.targets().items()
+        ]
+
+    def _set_status(self, status):
+        """Raises the status of the run, following `_STATUS_PRECEDENCE`."""
+        if _STATUS_PRECEDENCE.index(status) > _STATUS_PRECEDENCE.index(self.status):
+            self.status = Status(status)
+
+    def _report(self, status, template, *params):
+        """Logs a message and raises the status of the run accordingly."""
+        self._log(status, template, *params)
+        self._set_status(status)
+
+    def managed_files(self):
+        """
+        Lists the target files of the rules.
+        """
+        return [path for path, _ in self._targets()]
+
+    def _probe_target(self, path, rules):
+        """
+        Tells whether all the rules of a file are definitely satisfied,
+        from the memory-mapped file only.
+        """
+        try:
+            with mapped_file(path) as data:
+                return all(rule.probe(data) for rule in rules)
+        except FileNotFoundError:
+            return all(rule.probe(None) for rule in rules)
+        except (OSError, ValueError):
+            return False
+
+    def probe(self):
+        """
+        Checks cheaply whether every rule is definitely satisfied.
+        """
+        targets = self._targets()
+        return bool(targets) and all(
+            self._probe_target(path, rules) for path, rules in targets
+        )
+
+    def _evaluate_target(self, path, rules):
+        """
+        Checks the rules of one file, reading and parsing it at most once.
+
+        Args:
+            path (str): The path of the file.
+            rules (list): The rules targeting the file.
+
+        Returns:
+            dict: The 'path', 'rules', original 'content' (None if the file
+                  is missing), 'signature', shared 'document', the 'changes'
+                  keyed by rule, and the `(status, template, *params)`
+                  'problem' that
+                  prevented the check (None if there is none).
+        """
+        target = {
+            "path": path,
+            "rules": rules,
+            "content": None,
+            "signature": file_signature(path),
+            "document": None,
+            "changes": {},
+            "problem": None,
+        }
+        if self._probe_target(path, rules):
+            # Every rule is satisfied: the file is neither read nor parsed
+            return target
+
+        file_name = os.path.basename(path)
+        try:
+            with open(path, "rb") as f:
+                target["content"] = f.read()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            target["problem"] = ("ERROR", "Failed to read {}: {}", file_name, str(e))
+            return target
+
+        content = target["content"]
+        for rule in rules:
+            if rule.creates_file and content is None:
+                if not os.path.isdir(os.path.dirname(path)):
+                    directory = os.path.basename(os.path.dirname(path))
+                    target["problem"] = (
+                        "WARNING",
+                        "{} directory not found.",
+                        directory.capitalize(),
+                    )
+                    return target
+                target["changes"][rule] = rule.check(None)
+                # The other rules are checked against the created file
+                content = rule.template
+
+        format_rules = [rule for rule in rules if not rule.creates_file]
+        document_class = format_rules[0].document_class if format_rules else RawDocument
+        target["document"] = document_class(content, format_rules)
+        try:
+            for rule in format_rules:
+                change = rule.check(target["document"])
+                if change is not None:
+                    target["changes"][rule] = change
+        except ValueError as e:
+            target["problem"] = (
+                "ERROR",
+                "Failed to parse {}. The file may be corrupt ({}).",
+                file_name,
+                e,
+            )
+        return target
+
+    def _evaluate(self):
+        """
+        Checks every rule, without modifying anything.
+
+        Returns:
+            tuple: `(targets, problem)`, the evaluated targets (see
+                   `_evaluate_target`), and the message reporting a missing
+                   required file (None if there is none, in which case
+                   `targets` is empty).
+        """
+        targets = self._targets()
+        for path, rules in targets:
+            if not all(rule.creates_file for rule in rules) and not os.path.exists(
+                path
+            ):
+                message = next(
+                    (rule.missing_message for rule in rules if rule.missing_message),
+                    f"Could not find {os.path.basename(path)}. The game may be "
+                    "corrupt or incomplete.",
+                )
+                return [], message
+        evaluated = []
+        for path, rules in targets:
+            with span("evaluate", path=path):
+                evaluated.append(self._evaluate_target(path, rules))
+        return evaluated, None
+
+    def _current_evaluation(self):
+        """
+        Returns the evaluation made for the pending decisions if the files
+        have not changed since, or a new one.
+        """
+        evaluation = self._evaluation
+        self._evaluation = None
+        if evaluation is not None and all(
+            file_signature(target["path"]) == target["signature"]
+            for target in evaluation[0]
+        ):
+            return evaluation
+        return self._evaluate()
+
+    def _render(self, target, changes):
+        """
+        Computes the new content of a file with some of its changes applied.
+
+        Args:
+            target (dict): The evaluated target.
+            changes (list): The changes to apply.
+
+        Returns:
+            bytes or None: The new content, or None if the file is missing
+                           and its creation is not part of the changes.
+        """
+        content = target["content"]
+        format_changes = []
+        for change in changes:
+            if change["rule"].creates_file:
+                content = change["value"]
+            else:
+                format_changes.append(change)
+        if content is None:
+            return None
+        if not format_changes:
+            return content
+        if target["content"] is None:
+            # A created file: patch the template instead of the original
+            return type(target["document"])(content, target["document"].rules).apply(
+                format_changes
+            )
+        return target["document"].apply(format_changes)
+
+    def get_pending_decisions(self):
+        """
+        Lists the decisions of the rules whose change needs the user's
+        consent.
+        """
+        self._evaluation = self._evaluate()
+        decisions = []
+        seen = set()
+        for target in self._evaluation[0]:
+            for rule, change in target["changes"].items():
+                if rule.decision and rule.decision not in seen:
+                    seen.add(rule.decision)
+                    decisions.append(
+                        {
+                            "id": rule.decision,
+                            "prompt": rule.prompt,
+                            "details": change["details"],
+                        }
+                    )
+        return decisions
+
+    def plan(self):
+        """
+        Computes the changes of every rule without writing anything.
+        """
+        targets, problem = self._evaluate()
+        if problem:
+            self._report("WARNING", problem)
+            return self._result(operations=[])
+
+        operations = []
+        for target in targets:
+            if target["problem"]:
+                self._report(*target["problem"])
+                continue
+            for rule, change in target["changes"].items():
+                operations.append(
+                    {
+                        "op": rule.op,
+                        "path": target["path"],
+                        "description": change["description"],
+                        "decision": rule.decision,
+                        "diff": unified_diff(
+                            "/".join(rule.path),
+                            target["content"],
+                            self._render(target, [change]),
+                        ),
+                    }
+                )
+
+        if operations and self.status == "OK":
+            self.status = Status.PLANNED
+        return self._result(operations=operations)
+
+    def _apply_target(self, target):
+        """
+        Applies the accepted changes of one file: one backup, one write.
+
+        Args:
+            target (dict): The evaluated target.
+        """
+        path = target["path"]
+        file_name = os.path.basename(path)
+
+        accepted = []
+        for rule in target["rules"]:
+            change = target["changes"].get(rule)
+            if change is None:
+                self._log("OK", *rule.satisfied_message(file_name))
+                continue
+            if change["details"]:
+                self._log("INFO", change["details"])
+            # Use the collected answer, or ask for confirmation
+            if rule.decision and not self._confirm(rule.decision, rule.prompt):
+                self._log("INFO", "Modification skipped at the user's request.")
+                continue
+            accepted.append(change)
+        if not accepted:
+            return
+
+        try:
+            new_content = self._render(target, accepted)
+        except ValueError as e:
+            self._report("ERROR", "Failed to update {}: {}", file_name, str(e))
+            return
+        if new_content is None:
+            # The file would have to be created first
+            return
+
+        backup = target["content"] is not None
+        if backup and self.transaction is None:
+            # Back up the file before modifying it (in a transaction, the
+            # backup is taken when the transaction is committed)
+            if not backup_file(path):
+                self._report("ERROR", "Failed to create backup for {}.", file_name)
+                return
+            self._log("INFO", "Backup of {} created.", file_name)
+
+        try:
+            self._write(path, new_content, backup=backup)
+        except OSError:
+            self._report("ERROR", "Could not write to {}.", file_name)
+            return
+        for change in accepted:
+            self._log("MODIFIED", *change["rule"].applied_message(file_name, change))
+        self._set_status("MODIFIED")
+
+    def check_and_configure(self):
+        """
+        Checks every rule and applies the accepted changes, file by file.
+        """
+        targets, problem = self._current_evaluation()
+        if problem:
+            self._report("WARNING", problem)
+            return self._result()
+
+        for target in targets:
+            if target["problem"]:
+                self._report(*target["problem"])
+                continue
+            with span("apply", path=target["path"]):
+                self._apply_target(target)
+
+        return self._result()
+
+    def revert_configuration(self, timestamp=None):
+        """
+        Restores the files patched in place from the backup store.
+
+        Args:
+            timestamp (float, optional): Restores the backups taken at or
+                                         before this point in time instead of
+                                         the original files.
+        """
+        paths = [
+            path
+            for path, rules in self._targets()
+            if not all(rule.creates_file for rule in rules)
+        ]
+        if not paths:
+            self.status = Status.NOT_REQUIRED
+            return self._result()
+
+        restored = False
+        for path in paths:
+            file_name = os.path.basename(path)
+            try:
+                entry = restore_backup(path, timestamp)
+            except IOError as e:
+                # Unreadable or corrupt backup: the file is left untouched
+                self._log("ERROR", "Failed to restore {}: {}", file_name, str(e))
+                self.status = Status.ERROR
+                continue
+            if entry:
+                self._log("RESTORED", "{} restored from backup.", file_name)
+                restored = True
+
+        if self.status != "ERROR":
+            if restored:
+                self.status = Status.RESTORED
+            else:
+                self._log("INFO", "No backup found to restore.")
+                self.status = Status.NOT_FOUND
+        return self._result()
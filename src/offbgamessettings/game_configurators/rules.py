@@ -0,0 +1,547 @@
+"""
+Declarative configuration rules.
+
+Instead of hand-coding how each file is opened, parsed, checked, backed up
+and written, a game is described by a `RuleSet`: an ordered list of rules,
+each one stating a property that one of its files must have. The generic
+`RuleSetConfigurator` enforces them.
+
+Rules:
+-   `XmlNodeExists`: an element with given attributes must exist in an XML
+    file. Missing elements are spliced before the closing tag of the root
+    (see `xml_splice`).
+-   `JsonKeyNegative`: a numeric JSON value must be negative. Its sign is
+    inverted in place (see `json_patch`).
+-   `FileExists`: a file must exist. It is created with a template content.
+-   `IniKeyEquals`: an INI key must have a given value. It is set in place,
+    or added to its section (see `ini_patch`).
+
+Paths are tuples of components relative to the game folder. A rule may need
+the user's consent before its change is applied (`decision` and `prompt`,
+see `BaseGameConfigurator`).
+
+Documents:
+    The rules targeting the same file share one `Document` per run, so the
+    file is read once and parsed at most once, whatever the number of rules.
+    Each rule first tries a byte-level `probe()` of the memory-mapped file;
+    the document is only parsed when a probe is inconclusive. All the
+    accepted changes of a file are then applied together, in a single patch
+    (`Document.apply`).
+"""
+import io
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+
+from .. import ini_patch, json_patch, xml_splice
+
+
+class DocumentError(ValueError):
+    """Raised when a target file cannot be parsed."""
+
+
+class Document(ABC):
+    """
+    The content of a target file, shared by the rules that target it.
+
+    Attributes:
+        content (bytes): The content of the file.
+    """
+
+    def __init__(self, content, rules):
+        """
+        Initializes the document.
+
+        Args:
+            content (bytes): The content of the file.
+            rules (list): The rules targeting the file.
+        """
+        self.content = content
+        self.rules = rules
+
+    @abstractmethod
+    def apply(self, changes):
+        """
+        Applies changes to the document, in a single patch.
+
+        Args:
+            changes (list): The changes returned by the rules' `check()`.
+
+        Returns:
+            bytes: The new content of the file.
+        """
+
+
+class RawDocument(Document):
+    """
+    The document of a file that no rule patches (e.g. a file that must only
+    exist). It is never parsed.
+    """
+
+    def apply(self, changes):
+        if changes:
+            raise ValueError("A raw document cannot be patched")
+        return self.content
+
+
+class XmlDocument(Document):
+    """An XML file, parsed on first access to `root`."""
+
+    def __init__(self, content, rules):
+        super().__init__(content, rules)
+        self._root = None
+
+    @property
+    def root(self):
+        """
+        The root element of the document.
+
+        Raises:
+            DocumentError: If the document is not well-formed.
+        """
+        if self._root is None:
+            try:
+                self._root = ET.fromstring(self.content)
+            except ET.ParseError as e:
+                raise DocumentError(str(e))
+        return self._root
+
+    def apply(self, changes):
+        """
+        Appends the new elements to the root, keeping the other bytes of the
+        file. Files that cannot be patched that way are re-serialized.
+        """
+        elements = [change["value"] for change in changes]
+        try:
+            new_content, _ = xml_splice.append_children(self.content, elements)
+            return new_content
+        except xml_splice.SpliceError:
+            # Unusual layout or encoding: rewrite the whole file
+            root = self.root
+            root.extend(elements)
+            buffer = io.BytesIO()
+            ET.ElementTree(root).write(buffer, encoding="utf-8", xml_declaration=True)
+            return buffer.getvalue()
+
+
+class JsonDocument(Document):
+    """A JSON file, scanned once for the key paths of all its rules."""
+
+    def __init__(self, content, rules):
+        super().__init__(content, rules)
+        self._spans = None
+
+    @property
+    def spans(self):
+        """The byte span of each requested key path (see `json_patch`)."""
+        if self._spans is None:
+            self._spans = json_patch.find_spans(
+                self.content, [rule.key_path for rule in self.rules]
+            )
+        return self._spans
+
+    def value(self, key_path, default=None):
+        """
+        Decodes the value of a key path.
+
+        Args:
+            key_path (tuple): The key path.
+            default: The value returned when the key is missing.
+        """
+        if key_path not in self.spans:
+            return default
+        start, end = self.spans[key_path]
+        return json.loads(self.content[start:end])
+
+    def apply(self, changes):
+        """Rewrites the bytes of the changed values only."""
+        return json_patch.patch_values(
+            self.content,
+            {change["rule"].key_path: change["value"] for change in changes},
+            spans=self.spans,
+        )
+
+
+class IniDocument(Document):
+    """An INI file, scanned once for the keys of all its rules."""
+
+    def __init__(self, content, rules):
+        super().__init__(content, rules)
+        self._values = None
+
+    @property
+    def values(self):
+        """The current value of each requested `(section, key)` pair."""
+        if self._values is None:
+            self._values = ini_patch.read_values(
+                self.content, [(rule.section, rule.key) for rule in self.rules]
+            )
+        return self._values
+
+    def apply(self, changes):
+        """Sets the changed values, keeping the other bytes of the file."""
+        return ini_patch.patch_values(
+            self.content,
+            {
+                (change["rule"].section, change["rule"].key): change["value"]
+                for change in changes
+            },
+        )
+
+
+class Rule(ABC):
+    """
+    Base class of the rules.
+
+    Attributes:
+        path (tuple): The path of the target file, relative to the game
+                      folder.
+        decision (str or None): The ID of the decision the change depends on.
+        prompt (str or None): The question asked for the decision.
+        missing_message (str or None): Reported when the target file does not
+                                       exist.
+        op (str): The type of the planned operation (see
+                  `BaseGameConfigurator.plan`).
+        document_class (type): The `Document` class of the target file.
+        creates_file (bool): Whether the rule creates its target file.
+    """
+
+    op = None
+    document_class = None
+    creates_file = False
+
+    def __init__(self, path, decision=None, prompt=None, missing_message=None):
+        self.path = tuple(path)
+        self.decision = decision
+        self.prompt = prompt
+        self.missing_message = missing_message
+
+    def probe(self, data):
+        """
+        Checks cheaply whether the rule is definitely satisfied.
+
+        Like `BaseGameConfigurator.probe`, it must never give a false
+        positive.
+
+        Args:
+            data (bytes-like or None): The content of the target file
+                                       (usually memory-mapped), or None if
+                                       the file does not exist.
+
+        Returns:
+            bool: True if the rule is definitely satisfied.
+        """
+        return False
+
+    @abstractmethod
+    def check(self, document):
+        """
+        Checks the rule against the document of its target file.
+
+        Args:
+            document (Document): The document.
+
+        Returns:
+            dict or None: None if the rule is satisfied, otherwise the change
+                          to apply, with the 'rule', the new 'value', a
+                          'description' and optional 'details'.
+
+        Raises:
+            ValueError: If the document cannot be checked.
+        """
+
+    def _change(self, value, description, details=None):
+        return {
+            "rule": self,
+            "value": value,
+            "description": description,
+            "details": details,
+        }
+
+    @abstractmethod
+    def satisfied_message(self, file_name):
+        """
+        Returns the message logged when the rule is already satisfied, as a
+        `(template, *params)` tuple (see `results.LogEntry`).
+        """
+
+    @abstractmethod
+    def applied_message(self, file_name, change):
+        """
+        Returns the message logged once the change has been applied, as a
+        `(template, *params)` tuple.
+        """
+
+
+class XmlNodeExists(Rule):
+    """
+    An element with given attributes must exist in an XML file.
+
+    The element is identified by its tag and one of its attributes (`key`):
+    an element with the same tag and value of that attribute, anywhere in
+    the document, satisfies the rule.
+    """
+
+    op = "insert_node"
+    document_class = XmlDocument
+
+    def __init__(self, path, tag, attributes, key="id", name=None, **kwargs):
+        """
+        Initializes the rule.
+
+        Args:
+            path (tuple): The path of the XML file.
+            tag (str): The tag of the element.
+            attributes (dict): The attributes of the element to add.
+            key (str): The attribute that identifies the element.
+            name (str, optional): A human-readable name of the element.
+            **kwargs: The options of `Rule`.
+        """
+        super().__init__(path, **kwargs)
+        self.tag = tag
+        self.attributes = dict(attributes)
+        self.key = key
+        self.name = name or f"<{tag}> element"
+        # The value is searched as raw bytes, then the text before it must
+        # be the start of the tag ending with `key="` (see `probe`)
+        self._value_bytes = self.attributes[key].encode("utf-8")
+        self._tag_start_pattern = re.compile(
+            rb"<"
+            + re.escape(tag.encode("utf-8"))
+            + rb"\b[^<>]*\b"
+            + re.escape(key.encode("utf-8"))
+            + rb"\s*=\s*[\"']$"
+        )
+
+    def probe(self, data):
+        """
+        Searches the element without parsing the file, skipping the tags
+        that are commented out or inside CDATA sections.
+        """
+        if data is None:
+            return False
+        position = data.find(self._value_bytes)
+        while position != -1:
+            start = data.rfind(b"<", 0, position)
+            found = start != -1 and self._tag_start_pattern.match(data[start:position])
+            position = data.find(self._value_bytes, position + 1)
+            if not found:
+                continue
+            if data.rfind(b"<!--", 0, start) > data.rfind(b"-->", 0, start):
+                continue
+            if data.rfind(b"<![CDATA[", 0, start) > data.rfind(b"]]>", 0, start):
+                continue
+            return True
+        return False
+
+    def check(self, document):
+        if self.probe(document.content):
+            return None
+        value = self.attributes[self.key]
+        if any(
+            element.get(self.key) == value for element in document.root.iter(self.tag)
+        ):
+            return None
+        return self._change(
+            ET.Element(self.tag, self.attributes),
+            f"Add the <{self.tag}> node of the {self.name}.",
+        )
+
+    def satisfied_message(self, file_name):
+        return "{} is already configured in {}.", self.name, file_name
+
+    def applied_message(self, file_name, change):
+        return "{} added to {}.", self.name, file_name
+
+
+class JsonKeyNegative(Rule):
+    """
+    A numeric JSON value must be negative. A positive value is inverted; a
+    missing key is left alone.
+    """
+
+    op = "change_key"
+    document_class = JsonDocument
+
+    def __init__(self, path, key_path, **kwargs):
+        """
+        Initializes the rule.
+
+        Args:
+            path (tuple): The path of the JSON file.
+            key_path (tuple): The key path of the value (see `json_patch`).
+            **kwargs: The options of `Rule`.
+        """
+        super().__init__(path, **kwargs)
+        self.key_path = tuple(key_path)
+        self.label = "/".join(map(str, self.key_path))
+        self._sign_pattern = None
+        if len(self.key_path) == 1 and isinstance(self.key_path[0], str):
+            # Byte pattern of a top-level key, capturing the sign of its value
+            self._sign_pattern = re.compile(
+                rb'"'
+                + re.escape(json.dumps(self.key_path[0])[1:-1].encode("utf-8"))
+                + rb'"\s*:\s*(-?)'
+            )
+
+    def probe(self, data):
+        """
+        Searches the key in the raw bytes: it must appear exactly once, with
+        a negative value. Nested keys are never probed.
+        """
+        if data is None or self._sign_pattern is None:
+            return False
+        signs = [bytes(m.group(1)) for m in self._sign_pattern.finditer(data)]
+        # With a duplicated key, only a full parse knows which one wins
+        return signs == [b"-"]
+
+    def check(self, document):
+        if self.probe(document.content):
+            return None
+        value = document.value(self.key_path, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise DocumentError(f"'{self.label}' is not a number ({value!r}).")
+        if value <= 0:
+            return None
+        return self._change(
+            -value,
+            f"Invert '{self.label}' ({value} -> {-value}).",
+            details=f"The value of '{self.label}' is positive ({value}).",
+        )
+
+    def satisfied_message(self, file_name):
+        return "The value of '{}' is already configured correctly.", self.label
+
+    def applied_message(self, file_name, change):
+        return "The value of '{}' has been inverted.", self.label
+
+
+class FileExists(Rule):
+    """
+    A file must exist. A missing file is created with a template content,
+    provided that its directory exists. An existing file is never modified
+    by this rule.
+    """
+
+    op = "create_file"
+    creates_file = True
+
+    def __init__(self, path, template, name="File", **kwargs):
+        """
+        Initializes the rule.
+
+        Args:
+            path (tuple): The path of the file.
+            template (str or bytes): The content of the created file (str is
+                                     encoded in UTF-8).
+            name (str): A human-readable name of the file.
+            **kwargs: The options of `Rule`.
+        """
+        super().__init__(path, **kwargs)
+        self.template = (
+            template.encode("utf-8") if isinstance(template, str) else template
+        )
+        self.name = name
+
+    def probe(self, data):
+        return data is not None
+
+    def check(self, document):
+        """Checks the file, given its document, or None if it is missing."""
+        if document is not None:
+            return None
+        return self._change(
+            self.template, f"Create the {self.name.lower()} {self.path[-1]}."
+        )
+
+    def satisfied_message(self, file_name):
+        return "{} {} already exists.", self.name, file_name
+
+    def applied_message(self, file_name, change):
+        return "{} {} created.", self.name, file_name
+
+
+class IniKeyEquals(Rule):
+    """An INI key must have a given value. A missing key is added."""
+
+    op = "set_key"
+    document_class = IniDocument
+
+    def __init__(self, path, section, key, value, **kwargs):
+        """
+        Initializes the rule.
+
+        Args:
+            path (tuple): The path of the INI file.
+            section (str or None): The section of the key (None for the keys
+                                   before the first section).
+            key (str): The key.
+            value: The expected value, compared as a string.
+            **kwargs: The options of `Rule`.
+        """
+        super().__init__(path, **kwargs)
+        self.section = section
+        self.key = key
+        self.value = str(value)
+        self.label = f"[{section}] {key}" if section is not None else key
+
+    def check(self, document):
+        current = document.values.get((self.section, self.key))
+        if current == self.value:
+            return None
+        description = f"Set {self.label} to {self.value}"
+        if current is None:
+            return self._change(self.value, f"{description}.")
+        return self._change(self.value, f"{description} (currently {current}).")
+
+    def satisfied_message(self, file_name):
+        return "{} is already set to {} in {}.", self.label, self.value, file_name
+
+    def applied_message(self, file_name, change):
+        return "{} set to {} in {}.", self.label, self.value, file_name
+
+
+class RuleSet:
+    """
+    The rules of a game (or of a family of games sharing a file layout).
+
+    Attributes:
+        name (str): A human-readable name of the rule set.
+        rules (list): The rules, in the order they are checked.
+    """
+
+    def __init__(self, name, rules):
+        """
+        Initializes the rule set.
+
+        Args:
+            name (str): A human-readable name of the rule set.
+            rules (list): The rules.
+
+        Raises:
+            ValueError: If two rules handle the same file as different
+                        formats.
+        """
+        self.name = name
+        self.rules = list(rules)
+        for path, rules in self.targets().items():
+            classes = {rule.document_class for rule in rules if not rule.creates_file}
+            if len(classes) > 1:
+                raise ValueError(
+                    f"{os.path.join(*path)} is targeted by rules of different formats."
+                )
+
+    def targets(self):
+        """
+        Groups the rules by target file.
+
+        Returns:
+            dict: The rules of each target path, in the order of their first
+                  rule.
+        """
+        targets = {}
+        for rule in self.rules:
+            targets.setdefault(rule.path, []).append(rule)
+        return targets
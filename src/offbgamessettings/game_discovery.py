@@ -7,21 +7,34 @@ This module is responsible for locating the user's Steam installation
 How it works:
 1.  `find_steam_path()`: Attempts to find the Steam root directory using
     OS-specific methods (Windows registry, common Linux paths).
-2.  `get_sim_racing_game_folders()`:
+2.  `iter_sim_racing_games()` (and its dictionary-returning wrapper
+    `get_sim_racing_game_folders()`):
     -   Reads Steam's `libraryfolders.vdf` file to find all game library
         folders.
-    -   Scans each library folder for `appmanifest_*.acf` files.
+    -   Scans each library folder for `appmanifest_*.acf` files. The
+        libraries are scanned concurrently in a bounded thread pool, and the
+        results are merged in library order.
     -   Filters these manifests using a predefined list of sim racing game
         AppIDs (`SIM_RACING_APP_IDS`).
-    -   Extracts the game name and installation path from each matching
-        manifest.
-    -   Returns a structured dictionary containing the information of the
-        found games.
+    -   Extracts the game name, installation path and build ID (used by the
+        configuration ledger to notice game updates) from each matching
+        manifest with `read_manifest_fields()`, a streaming reader that only
+        looks at the top-level `AppState` keys and stops as soon as it has
+        found them.
+    -   Yields the found games as soon as each library has been scanned,
+        so that configuration can start before discovery is finished.
+
+Caching:
+    When a cache path is given, `iter_sim_racing_games()` uses the
+    `discovery_cache` module to skip re-reading `libraryfolders.vdf`,
+    re-listing unchanged `steamapps` folders and re-parsing unchanged
+    manifests.
 """
 import os
 import platform
 
-import vdf
+from . import discovery_cache
+from .tracing import span, traced
 
 # Dictionary of Steam AppIDs for popular sim racing games.
 # This list is used to filter installed games and only act on relevant titles.
@@ -41,6 +54,32 @@ SIM_RACING_APP_IDS = {
     "480": "Spacewar",  # Often used for testing, useful for development
 }
 
+# Maximum number of Steam libraries scanned at the same time.
+# Libraries are usually spread over a handful of disks, and the scan is
+# I/O bound, so a small pool is enough to overlap slow drives.
+DEFAULT_SCAN_WORKERS = 8
+
+# Fields read from each game manifest (`appmanifest_*.acf`).
+MANIFEST_FIELDS = ("name", "installdir", "buildid", "StateFlags")
+
+# Manifest fields holding paths, which must survive non-UTF-8 bytes.
+_VDF_PATH_FIELDS = {"installdir"}
+
+# Escape sequences of the VDF format (see `_unescape_vdf`).
+_VDF_ESCAPES = {
+    b"n": b"\n",
+    b"t": b"\t",
+    b"v": b"\v",
+    b"b": b"\b",
+    b"r": b"\r",
+    b"f": b"\f",
+    b"a": b"\a",
+    b"\\": b"\\",
+    b"?": b"?",
+    b"'": b"'",
+    b'"': b'"',
+}
+
 
 def _get_steam_path_windows():
     """
@@ -76,6 +115,7 @@ def _get_steam_path_linux():
     return None
 
 
+@traced("find_steam_path")
 def find_steam_path():
     """
     Finds the root path of the Steam installation based on the OS.
@@ -94,71 +134,617 @@ def find_steam_path():
         return None
 
 
-def get_sim_racing_game_folders():
+def _get_library_paths(steam_path, cache=None):
     """
-    Finds and returns the installation folders of sim racing games installed via Steam.
+    Reads `libraryfolders.vdf` and returns the paths of all Steam libraries.
 
-    The process involves reading Steam libraries, finding game manifests, and
-    filtering by the relevant AppIDs.
+    Args:
+        steam_path (str): The root path of the Steam installation.
+        cache (dict, optional): The discovery cache. When the signature of
+                                `libraryfolders.vdf` matches the cached one,
+                                the file is not parsed again.
 
     Returns:
-        dict: A dictionary where each key is a game AppID and the value is
-              another dictionary containing the 'name' and 'path' of the game.
-              Ex: {'244210': {'name': 'Assetto Corsa', 'path': '...'}}
+        list or None: The library paths (the main Steam folder first), or
+                      None if `libraryfolders.vdf` is missing or malformed.
     """
-    steam_path = find_steam_path()
-    if not steam_path:
-        return {}
-
     library_folders_path = os.path.join(steam_path, "steamapps", "libraryfolders.vdf")
 
     if not os.path.exists(library_folders_path):
-        return {}
+        return None
+
+    signature = None
+    if cache is not None:
+        signature = discovery_cache.file_signature(library_folders_path)
+        cached = cache["libraryfolders"]
+        if signature is not None and cached.get("signature") == signature:
+            return list(cached.get("paths", []))
 
-    with open(library_folders_path, "r", encoding="utf-8") as f:
+    # Only needed when the library list has changed since the last run
+    import vdf
+
+    with span("parse libraryfolders.vdf"), open(
+        library_folders_path, "r", encoding="utf-8"
+    ) as f:
         try:
             # Load the VDF file that lists all Steam libraries
             library_folders = vdf.load(f)["libraryfolders"]
         except KeyError:
-            return {}
+            return None
         except Exception:
             # Some versions of the `vdf` package may raise different
             # errors when the file is malformed; be permissive and
             # treat any parsing error as an absent library file.
-            return {}
+            return None
 
-    games_found = {}
-    # Include the main Steam folder as well as all other library folders
-    steam_library_paths = [steam_path] + [
+    # Include the main Steam folder as well as all other library folders.
+    # Steam usually lists its own folder too, and a library may be listed
+    # through a symbolic link as well as by its real path: duplicates
+    # (after resolving the links) are dropped to avoid scanning the same
+    # library twice.
+    steam_library_paths = []
+    seen = set()
+    for path in [steam_path] + [
         data["path"] for _, data in library_folders.items() if "path" in data
-    ]
+    ]:
+        key = os.path.normcase(os.path.realpath(path))
+        if key not in seen:
+            seen.add(key)
+            steam_library_paths.append(path)
+
+    if cache is not None:
+        cache["libraryfolders"] = {"signature": signature, "paths": steam_library_paths}
+    return steam_library_paths
+
+
+def _unescape_vdf(value):
+    """
+    Resolves the backslash escape sequences supported by the VDF format.
+
+    Args:
+        value (bytes): The raw content of a quoted VDF string.
+
+    Returns:
+        bytes: The unescaped value.
+    """
+    if b"\\" not in value:
+        return value
+    out = bytearray()
+    i = 0
+    while i < len(value):
+        byte = value[i : i + 1]
+        if byte == b"\\" and i + 1 < len(value):
+            nxt = value[i + 1 : i + 2]
+            out += _VDF_ESCAPES.get(nxt, b"\\" + nxt)
+            i += 2
+        else:
+            out += byte
+            i += 1
+    return bytes(out)
+
+
+def _iter_vdf_tokens(f):
+    """
+    Splits a binary VDF stream into tokens, one line at a time.
+
+    Only the part of the file that is actually consumed is read, so a caller
+    that stops iterating early never reads the rest of the file.
+
+    Args:
+        f (file): A file object opened in binary mode.
+
+    Yields:
+        tuple: `(kind, value)` where `kind` is `"{"`, `"}"` or `"str"`, and
+               `value` is the raw (undecoded) bytes of a string token.
+
+    Raises:
+        ValueError: If a quoted string is not terminated before the end of
+                    the file.
+    """
+    pending = None  # Quoted string spanning several lines
+    for line in f:
+        pos = 0
+        end = len(line)
+        if pending is not None:
+            close = _find_closing_quote(line, 0)
+            if close < 0:
+                pending += line
+                continue
+            yield "str", _unescape_vdf(pending + line[:close])
+            pending = None
+            pos = close + 1
+
+        while pos < end:
+            char = line[pos : pos + 1]
+            if char in b" \t\r\n":
+                pos += 1
+            elif char == b"/" and line[pos + 1 : pos + 2] == b"/":
+                break  # Comment until the end of the line
+            elif char in (b"{", b"}"):
+                yield char.decode(), None
+                pos += 1
+            elif char == b'"':
+                close = _find_closing_quote(line, pos + 1)
+                if close < 0:
+                    pending = line[pos + 1 :]
+                    break
+                yield "str", _unescape_vdf(line[pos + 1 : close])
+                pos = close + 1
+            else:
+                start = pos
+                while pos < end and line[pos : pos + 1] not in b' \t\r\n{}"':
+                    pos += 1
+                token = line[start:pos]
+                # Conditionals such as [$WIN32] are not relevant here
+                if not token.startswith(b"["):
+                    yield "str", token
+
+    if pending is not None:
+        raise ValueError("Unterminated string in VDF file.")
+
+
+def _find_closing_quote(line, pos):
+    """
+    Finds the index of the quote closing a VDF string, skipping escapes.
+
+    Args:
+        line (bytes): The line being tokenized.
+        pos (int): The index of the first character of the string content.
+
+    Returns:
+        int: The index of the closing quote, or -1 if it is not on this line.
+    """
+    while True:
+        close = line.find(b'"', pos)
+        if close < 0:
+            return -1
+        # Count the backslashes right before the quote
+        backslashes = 0
+        index = close - 1
+        while index >= pos and line[index : index + 1] == b"\\":
+            backslashes += 1
+            index -= 1
+        if backslashes % 2 == 0:
+            return close
+        pos = close + 1
+
+
+def _decode_vdf_value(key, value):
+    """
+    Decodes a raw VDF value without ever raising `UnicodeDecodeError`.
+
+    Manifests are normally UTF-8, but files written by old Steam clients or
+    edited by hand may contain legacy encodings. Paths keep undecodable bytes
+    through `surrogateescape` so they still point to the right folder on
+    POSIX systems, while display values use replacement characters.
+
+    Args:
+        key (str): The name of the field.
+        value (bytes): The raw value.
+
+    Returns:
+        str: The decoded value.
+    """
+    errors = "surrogateescape" if key in _VDF_PATH_FIELDS else "replace"
+    return value.decode("utf-8", errors=errors)
+
+
+def read_manifest_fields(acf_path, keys=MANIFEST_FIELDS):
+    """
+    Reads selected top-level fields from an `appmanifest_*.acf` file.
+
+    Unlike `vdf.load`, this reader never builds the full document. It
+    tokenizes the file as a stream, skips nested blocks such as
+    `InstalledDepots`, `UserConfig` or `MountedDepots` without storing them,
+    and stops reading as soon as all the requested keys have been found.
+
+    Keys are matched case-insensitively, as Steam is not always consistent
+    about their case.
+
+    Args:
+        acf_path (str): The path to the manifest file.
+        keys (tuple): The names of the `AppState` fields to read.
+
+    Returns:
+        dict or None: A dictionary mapping each requested key that was found
+                      to its value, or None if the file is not a valid
+                      manifest.
+    """
+    wanted = {key.lower(): key for key in keys}
+    found = {}
+    with open(acf_path, "rb") as f:
+        tokens = _iter_vdf_tokens(f)
+        try:
+            # The root of the manifest must be an `"AppState" {` block
+            kind, root = next(tokens, (None, None))
+            if kind != "str" or root.lower() != b"appstate":
+                return None
+            if next(tokens, (None, None))[0] != "{":
+                return None
+
+            for kind, key in tokens:
+                if kind == "}":
+                    # End of the AppState block
+                    return found
+                if kind != "str":
+                    return None
+
+                kind, value = next(tokens, (None, None))
+                if kind == "{":
+                    # Skip the nested block without building it
+                    depth = 1
+                    for kind, _ in tokens:
+                        if kind == "{":
+                            depth += 1
+                        elif kind == "}":
+                            depth -= 1
+                            if depth == 0:
+                                break
+                    else:
+                        return None
+                    continue
+                if kind != "str":
+                    return None
+
+                name = wanted.get(key.decode("utf-8", errors="replace").lower())
+                if name is not None and name not in found:
+                    found[name] = _decode_vdf_value(name, value)
+                    if len(found) == len(wanted):
+                        # Everything was found, the rest of the file is not read
+                        return found
+        except ValueError:
+            return None
+
+    # The file ended without closing the AppState block
+    return None
+
+
+def _read_manifest(acf_path):
+    """
+    Reads the game details from an `appmanifest_*.acf` file.
+
+    Args:
+        acf_path (str): The path to the manifest file.
+
+    Returns:
+        dict or None: A dictionary with the 'name', 'installdir', 'buildid'
+                      and 'StateFlags' of the game (when present), or None if
+                      the manifest is malformed.
+    """
+    try:
+        with span("read manifest", path=acf_path):
+            return read_manifest_fields(acf_path)
+    except OSError:
+        return None
+
+
+def _app_id_from_manifest_name(name):
+    """
+    Extracts the AppID from a manifest file name.
+
+    Args:
+        name (str): The file name (e.g., `appmanifest_244210.acf`).
+
+    Returns:
+        str or None: The AppID, or None if the name is not a manifest name.
+    """
+    if name.startswith("appmanifest_") and name.endswith(".acf"):
+        return name.split("_")[1].split(".")[0]
+    return None
+
+
+def _list_manifests(steamapps_path, with_signatures=False):
+    """
+    Lists the sim racing game manifests of a `steamapps` folder.
+
+    `os.scandir` is used so that the directory is read in a single pass and,
+    when signatures are requested, the stat information carried by each
+    `DirEntry` is reused instead of probing every file separately.
+
+    Args:
+        steamapps_path (str): The path to the `steamapps` folder.
+        with_signatures (bool): If True, the cache signature of each manifest
+                                is computed from its `DirEntry`.
+
+    Returns:
+        list or None: A list of `(name, path, signature)` tuples sorted by
+                      file name (`signature` is None unless requested), or
+                      None if the folder does not exist.
+    """
+    manifests = []
+    try:
+        with os.scandir(steamapps_path) as entries:
+            for entry in entries:
+                app_id = _app_id_from_manifest_name(entry.name)
+                if app_id not in SIM_RACING_APP_IDS:
+                    continue
+                signature = None
+                if with_signatures:
+                    signature = discovery_cache.entry_signature(entry)
+                    if signature is None:
+                        # The manifest was removed while the folder was listed
+                        continue
+                manifests.append((entry.name, entry.path, signature))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    # Sort the entries so that the results do not depend on the order in
+    # which the file system returns them.
+    manifests.sort()
+    return manifests
+
+
+def _scan_library(library_path, cached_library=None):
+    """
+    Scans a Steam library for sim racing game manifests.
+
+    When a cache entry is given, it is used to avoid redundant work: if the
+    `steamapps` directory is unchanged, it is not listed again, and manifests
+    whose signature is unchanged are not opened again.
+
+    Args:
+        library_path (str): The root path of the Steam library.
+        cached_library (dict, optional): The cache entry of this library from
+                                         a previous scan. Pass an empty dict
+                                         to enable caching without prior data.
+
+    Returns:
+        tuple: `(games, library_entry)` where `games` is a dictionary of the
+               games found (same format as `get_sim_racing_game_folders()`)
+               and `library_entry` is the updated cache entry, or None if
+               caching is disabled or the library has no `steamapps` folder.
+    """
+    steamapps_path = os.path.join(library_path, "steamapps")
+
+    use_cache = cached_library is not None
+    cached_manifests = {}
+    dir_signature = None
+    if use_cache:
+        cached_manifests = cached_library.get("manifests", {})
+        dir_signature = discovery_cache.file_signature(steamapps_path)
+        if dir_signature is None:
+            return {}, None
 
-    for library_path in steam_library_paths:
-        steamapps_path = os.path.join(library_path, "steamapps")
-        if not os.path.isdir(steamapps_path):
+    if (
+        use_cache
+        and dir_signature is not None
+        and cached_library.get("signature") == dir_signature
+    ):
+        # The directory is unchanged: the cached list of manifests is
+        # complete, only the manifests themselves need to be checked.
+        manifest_list = []
+        for name in sorted(cached_manifests):
+            path = os.path.join(steamapps_path, name)
+            signature = discovery_cache.file_signature(path)
+            if signature is not None:
+                manifest_list.append((name, path, signature))
+    else:
+        manifest_list = _list_manifests(steamapps_path, with_signatures=use_cache)
+        if manifest_list is None:
+            return {}, None
+
+    games_found = {}
+    manifests = {}
+    for name, acf_path, signature in manifest_list:
+        app_id = _app_id_from_manifest_name(name)
+
+        if use_cache:
+            cached = cached_manifests.get(name)
+            if cached and cached.get("signature") == signature:
+                details = cached.get("details")
+            else:
+                details = _read_manifest(acf_path)
+            manifests[name] = {"signature": signature, "details": details}
+        else:
+            details = _read_manifest(acf_path)
+
+        if not details:
             continue
 
-        # Iterate through all files in the steamapps folder
-        for item in os.listdir(steamapps_path):
-            if item.startswith("appmanifest_") and item.endswith(".acf"):
-                # Extract the AppID from the filename (e.g., appmanifest_244210.acf)
-                app_id = item.split("_")[1].split(".")[0]
-                if app_id in SIM_RACING_APP_IDS:
-                    acf_path = os.path.join(steamapps_path, item)
-                    with open(acf_path, "r", encoding="utf-8") as f:
-                        try:
-                            # Load the game manifest to get details
-                            acf_data = vdf.load(f)["AppState"]
-                        except (KeyError, vdf.VDFMalformedError):
-                            continue
-
-                    game_name = acf_data.get("name")
-                    install_dir = acf_data.get("installdir")
-
-                    if game_name and install_dir:
-                        game_path = os.path.join(steamapps_path, "common", install_dir)
-                        if os.path.isdir(game_path):
-                            # Add the found game to the results dictionary
-                            games_found[app_id] = {"name": game_name, "path": game_path}
-
-    return games_found
+        game_name = details.get("name")
+        install_dir = details.get("installdir")
+
+        if game_name and install_dir:
+            game_path = os.path.join(steamapps_path, "common", install_dir)
+            if os.path.isdir(game_path):
+                # Add the found game to the results dictionary
+                games_found[app_id] = {
+                    "name": game_name,
+                    "path": game_path,
+                    "buildid": details.get("buildid"),
+                    "manifest": acf_path,
+                }
+
+    library_entry = None
+    if use_cache:
+        library_entry = {"signature": dir_signature, "manifests": manifests}
+    return games_found, library_entry
+
+
+def _iter_library_scans(library_paths, cache=None, max_workers=DEFAULT_SCAN_WORKERS):
+    """
+    Scans several Steam libraries concurrently.
+
+    Libraries often live on different disks, so they are scanned in a bounded
+    thread pool: a slow drive no longer delays the others. The results are
+    yielded in the order of `library_paths` as soon as they are available,
+    whatever the completion order.
+
+    Args:
+        library_paths (list): The root paths of the Steam libraries.
+        cache (dict, optional): The discovery cache (see `_scan_library`).
+        max_workers (int): The maximum number of libraries scanned at once.
+                           A value of 1 scans them sequentially.
+
+    Yields:
+        tuple: `(library_path, games, library_entry)` for each library, where
+               `games` and `library_entry` are returned by `_scan_library()`.
+    """
+
+    def scan(library_path):
+        cached_library = None
+        if cache is not None:
+            cached_library = cache["libraries"].get(library_path, {})
+        with span("scan library", path=library_path):
+            return _scan_library(library_path, cached_library)
+
+    workers = min(max_workers, len(library_paths))
+    if workers <= 1:
+        for library_path in library_paths:
+            yield (library_path,) + scan(library_path)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="library-scan"
+    ) as executor:
+        # `map` submits every scan at once and yields the results in
+        # submission order as they complete
+        for library_path, result in zip(
+            library_paths, executor.map(scan, library_paths)
+        ):
+            yield (library_path,) + result
+
+
+def _has_manifest(library_path, app_id):
+    """
+    Checks whether a Steam library holds the manifest of a game, without
+    reading it.
+
+    Args:
+        library_path (str): The root path of the Steam library.
+        app_id (str): The Steam AppID of the game.
+
+    Returns:
+        bool: True if the manifest file exists.
+    """
+    return os.path.exists(
+        os.path.join(library_path, "steamapps", f"appmanifest_{app_id}.acf")
+    )
+
+
+def iter_sim_racing_games(
+    cache_path=None,
+    rebuild_cache=False,
+    max_workers=DEFAULT_SCAN_WORKERS,
+    steam_path=None,
+):
+    """
+    Yields the sim racing games installed via Steam as they are discovered.
+
+    Games are yielded library by library, as soon as each library has been
+    scanned, so callers can start working on the first games while the
+    remaining libraries are still being scanned in the background. If a game
+    is found in several libraries, only its occurrence in the last of them
+    is yielded (the last library wins, as in `get_sim_racing_game_folders()`
+    before games were streamed): a game that a later library also has a
+    manifest for is held back until that library is scanned.
+
+    The discovery cache, when enabled, is saved once the generator has been
+    fully consumed.
+
+    Args:
+        cache_path (str, optional): The path to the discovery cache file (see
+                                    `discovery_cache`). If None, the cache is
+                                    not used and everything is read from disk.
+        rebuild_cache (bool): If True, the existing cache is ignored and a
+                              fresh one is written after the scan.
+        max_workers (int): The maximum number of libraries scanned in
+                           parallel.
+        steam_path (str, optional): The root of the Steam installation to
+                                    scan (e.g. a mounted disk image). If
+                                    None, the local installation is located
+                                    with `find_steam_path()`.
+
+    Yields:
+        tuple: `(app_id, game_data)` where `game_data` is a dictionary
+               containing the 'name' and 'path' of the game, its Steam
+               'buildid' (None if unknown) and the path of its appmanifest
+               ('manifest').
+               Ex: ('244210', {'name': 'Assetto Corsa', 'path': '...', ...})
+    """
+    if steam_path is None:
+        steam_path = find_steam_path()
+    if not steam_path:
+        return
+
+    cache = None
+    if cache_path:
+        if rebuild_cache:
+            cache = discovery_cache.new_cache(steam_path)
+        else:
+            with span("load discovery cache"):
+                cache = discovery_cache.load_cache(cache_path, steam_path)
+
+    steam_library_paths = _get_library_paths(steam_path, cache)
+    if steam_library_paths is None:
+        return
+
+    yielded = set()
+    # Games held back until the later libraries having their manifest are
+    # scanned, keyed by AppID
+    held_back = {}
+    libraries = {}
+    scans = _iter_library_scans(steam_library_paths, cache, max_workers)
+    for index, (library_path, games, library_entry) in enumerate(scans):
+        if library_entry is not None:
+            libraries[library_path] = library_entry
+        later_paths = steam_library_paths[index + 1 :]
+        for app_id, game_data in games.items():
+            if app_id in yielded:
+                continue
+            if any(_has_manifest(path, app_id) for path in later_paths):
+                held_back[app_id] = game_data
+                continue
+            held_back.pop(app_id, None)
+            yielded.add(app_id)
+            yield app_id, game_data
+    # Later manifests that turned out not to be valid installations
+    yield from held_back.items()
+
+    if cache is not None:
+        cache["libraries"] = libraries
+        with span("save discovery cache"):
+            discovery_cache.save_cache(cache_path, cache)
+
+
+def get_sim_racing_game_folders(
+    cache_path=None,
+    rebuild_cache=False,
+    max_workers=DEFAULT_SCAN_WORKERS,
+    steam_path=None,
+):
+    """
+    Finds and returns the installation folders of sim racing games installed via Steam.
+
+    The process involves reading Steam libraries, finding game manifests, and
+    filtering by the relevant AppIDs. This is a convenience wrapper that
+    collects the output of `iter_sim_racing_games()` into a dictionary.
+
+    Args:
+        cache_path (str, optional): The path to the discovery cache file (see
+                                    `discovery_cache`). If None, the cache is
+                                    not used and everything is read from disk.
+        rebuild_cache (bool): If True, the existing cache is ignored and a
+                              fresh one is written after the scan.
+        max_workers (int): The maximum number of libraries scanned in
+                           parallel.
+        steam_path (str, optional): The root of the Steam installation to
+                                    scan. If None, the local installation is
+                                    located with `find_steam_path()`.
+
+    Returns:
+        dict: A dictionary where each key is a game AppID and the value is
+              another dictionary containing the 'name', 'path', 'buildid'
+              and 'manifest' of the game (see `iter_sim_racing_games`).
+              Ex: {'244210': {'name': 'Assetto Corsa', 'path': '...', ...}}
+    """
+    return dict(
+        iter_sim_racing_games(
+            cache_path=cache_path,
+            rebuild_cache=rebuild_cache,
+            max_workers=max_workers,
+            steam_path=steam_path,
+        )
+    )
@@ -0,0 +1,170 @@
+"""
+Targeted in-place patching of INI values.
+
+Many games keep their settings in INI files (`[Section]` headers followed by
+`key=value` lines) with comments and a layout of their own. `configparser`
+drops the comments and rewrites every line. This module only rewrites the
+bytes of the values being changed.
+
+How it works:
+-   The document is split into lines once. Section headers are tracked, and
+    the byte span of the value of each requested `(section, key)` pair is
+    recorded. Sections and keys are matched case-insensitively, as Windows
+    does; the last occurrence of a duplicated key wins.
+-   Keys before the first section header belong to the section `None`.
+-   `patch_values()` rebuilds the document in a single pass: the values
+    found are replaced, and the missing keys are added at the end of their
+    section (after its last non-blank line), or in a new section at the end
+    of the document, with the file's line endings.
+
+Every other byte (comments, blank lines, spacing around `=`, the other
+values) is kept as is. The document must be UTF-8 (a BOM is allowed).
+"""
+import re
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+_SECTION_PATTERN = re.compile(rb"^[ \t]*\[([^\]\r\n]*)\][ \t]*(?:[;#].*)?$")
+_KEY_PATTERN = re.compile(rb"^[ \t]*([^=;#\[\r\n][^=\r\n]*?)[ \t]*=[ \t]*(.*?)[ \t]*$")
+
+
+class IniPatchError(ValueError):
+    """Raised when a document cannot be read or patched."""
+
+
+def _normalize(name):
+    return None if name is None else name.strip().lower()
+
+
+def _scan(content, keys):
+    """
+    Walks the lines of a document.
+
+    Args:
+        content (bytes): The document.
+        keys (iterable): The `(section, key)` pairs to locate.
+
+    Returns:
+        tuple: `(spans, section_ends)`, the `(start, end)` byte span of the
+               value of each pair found, and the offset after the last
+               non-blank line of each section (keyed by normalized name).
+    """
+    wanted = {
+        (_normalize(section), _normalize(key)): (section, key) for section, key in keys
+    }
+    spans = {}
+    section_ends = {}
+    section = None
+    pos = len(_UTF8_BOM) if content.startswith(_UTF8_BOM) else 0
+    section_ends[None] = pos
+
+    for line in content[pos:].splitlines(keepends=True):
+        start = pos
+        pos += len(line)
+        text = line.rstrip(b"\r\n")
+        if not text.strip():
+            continue
+
+        header = _SECTION_PATTERN.match(text)
+        if header:
+            section = _normalize(header.group(1).decode("utf-8"))
+        else:
+            match = _KEY_PATTERN.match(text)
+            if match:
+                key = _normalize(match.group(1).decode("utf-8"))
+                if (section, key) in wanted:
+                    spans[wanted[(section, key)]] = (
+                        start + match.start(2),
+                        start + match.end(2),
+                    )
+        section_ends[section] = pos
+    return spans, section_ends
+
+
+def read_values(content, keys):
+    """
+    Reads the values of several keys.
+
+    Args:
+        content (bytes): The UTF-8 INI document.
+        keys (iterable): The `(section, key)` pairs to read.
+
+    Returns:
+        dict: The value (str) of each pair found. Missing keys are omitted.
+
+    Raises:
+        IniPatchError: If the document is not valid UTF-8.
+    """
+    try:
+        spans, _ = _scan(content, keys)
+        return {
+            pair: content[start:end].decode("utf-8")
+            for pair, (start, end) in spans.items()
+        }
+    except UnicodeDecodeError as e:
+        raise IniPatchError(f"The document is not valid UTF-8: {e}")
+
+
+def patch_values(content, changes):
+    """
+    Sets the values of several keys, keeping every other byte.
+
+    Args:
+        content (bytes): The UTF-8 INI document.
+        changes (dict): The new value (str) of each `(section, key)` pair.
+
+    Returns:
+        bytes: The patched document.
+
+    Raises:
+        IniPatchError: If the document is not valid UTF-8.
+    """
+    try:
+        spans, section_ends = _scan(content, changes)
+    except UnicodeDecodeError as e:
+        raise IniPatchError(f"The document is not valid UTF-8: {e}")
+    line_ending = b"\r\n" if b"\r\n" in content else b"\n"
+
+    replacements = []
+    insertions = {}  # offset -> new lines
+    new_sections = {}
+    for (section, key), value in changes.items():
+        value = str(value).encode("utf-8")
+        if (section, key) in spans:
+            start, end = spans[(section, key)]
+            replacements.append((start, end, value))
+            continue
+        line = key.encode("utf-8") + b"=" + value + line_ending
+        end = section_ends.get(_normalize(section))
+        if end is None:
+            new_sections.setdefault(section, []).append(line)
+        else:
+            # After the last non-blank line of the section
+            insertions.setdefault(end, []).append(line)
+
+    # New sections are separated from the existing content by a blank line
+    separator = line_ending if content.strip(_UTF8_BOM + b" \t\r\n") else b""
+    for section, lines in new_sections.items():
+        header = separator + b"[" + section.encode("utf-8") + b"]" + line_ending
+        insertions.setdefault(len(content), []).extend([header] + lines)
+        separator = line_ending
+
+    edits = replacements
+    for offset, lines in insertions.items():
+        if _ends_without_newline(content, offset):
+            lines.insert(0, line_ending)
+        edits.append((offset, offset, b"".join(lines)))
+    # Rebuild the document in a single pass over the sorted edits
+    parts = []
+    previous_end = 0
+    for start, end, text in sorted(edits, key=lambda edit: edit[:2]):
+        parts.append(content[previous_end:start])
+        parts.append(text)
+        previous_end = end
+    parts.append(content[previous_end:])
+    return b"".join(parts)
+
+
+def _ends_without_newline(content, offset):
+    """Tells whether the line before `offset` lacks its line ending."""
+    start = len(_UTF8_BOM) if content.startswith(_UTF8_BOM) else 0
+    return offset > start and content[offset - 1 : offset] not in (b"\n", b"\r")
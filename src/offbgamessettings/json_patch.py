@@ -0,0 +1,201 @@
+"""
+Targeted in-place patching of JSON values.
+
+Game settings files such as rFactor 2's `Controller.JSON` hold hundreds of
+keys written by the game itself. Loading them into dictionaries and dumping
+them again to change one number reformats the whole file. This module
+rewrites only the bytes of the values being changed.
+
+How it works:
+-   A lightweight scanner walks the document once, without building any
+    Python object. It only tracks the current key path and records the
+    byte span (`start`, `end`) of the values whose path is requested.
+-   Paths are tuples of object keys and array indexes, e.g.
+    `("Steering effects strength",)` or `("devices", 0, "gain")`. As with
+    `json.loads`, the last occurrence of a duplicated key wins.
+-   `read_values()` decodes only the requested spans, and `patch_values()`
+    replaces them with the JSON encoding of the new values, from the end of
+    the document to its start so that earlier offsets stay valid. Several
+    keys are patched in a single pass.
+
+Every other byte (key order, indentation, line endings, number formatting of
+the other values) is kept as is. The document must be UTF-8 (a BOM is
+allowed); malformed documents raise `JSONPatchError`.
+"""
+import json
+import re
+
+_WHITESPACE_PATTERN = re.compile(rb"[ \t\r\n]*")
+_UTF8_BOM = b"\xef\xbb\xbf"
+_SCALAR_PATTERN = re.compile(
+    rb"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null"
+)
+_STRING_PATTERN = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+class JSONPatchError(ValueError):
+    """Raised when a document is malformed or a path cannot be patched."""
+
+
+class _Scanner:
+    """
+    Walks a JSON document and records the spans of the requested values.
+
+    Attributes:
+        content (bytes): The document.
+        targets (set): The requested paths.
+        prefixes (set): Every prefix of the requested paths, used to skip
+                        the containers that hold none of them.
+        spans (dict): The span of each value found, keyed by path.
+    """
+
+    def __init__(self, content, paths):
+        self.content = content
+        self.targets = set(paths)
+        self.prefixes = {path[:i] for path in self.targets for i in range(len(path))}
+        self.spans = {}
+
+    def error(self, pos, message):
+        return JSONPatchError(f"{message} at offset {pos}.")
+
+    def skip_whitespace(self, pos):
+        return _WHITESPACE_PATTERN.match(self.content, pos).end()
+
+    def scan(self):
+        pos = len(_UTF8_BOM) if self.content.startswith(_UTF8_BOM) else 0
+        pos = self.value(self.skip_whitespace(pos), ())
+        if self.skip_whitespace(pos) != len(self.content):
+            raise self.error(pos, "Extra data")
+        return self.spans
+
+    def value(self, pos, path):
+        """Scans the value starting at `pos` and returns the offset after it."""
+        if pos >= len(self.content):
+            raise self.error(pos, "Unexpected end of document")
+
+        char = self.content[pos : pos + 1]
+        if char == b"{":
+            end = self.container(pos, path, b"}")
+        elif char == b"[":
+            end = self.container(pos, path, b"]")
+        else:
+            pattern = _STRING_PATTERN if char == b'"' else _SCALAR_PATTERN
+            match = pattern.match(self.content, pos)
+            if not match:
+                raise self.error(pos, "Invalid value")
+            end = match.end()
+
+        if path in self.targets:
+            self.spans[path] = (pos, end)
+        return end
+
+    def container(self, pos, path, closing):
+        """Scans an object (`closing` is `}`) or an array (`]`)."""
+        is_object = closing == b"}"
+        descend = path in self.prefixes
+        pos = self.skip_whitespace(pos + 1)
+        if self.content[pos : pos + 1] == closing:
+            return pos + 1
+
+        index = 0
+        while True:
+            if is_object:
+                match = _STRING_PATTERN.match(self.content, pos)
+                if not match:
+                    raise self.error(pos, "Expected a key")
+                key = json.loads(match.group(0)) if descend else None
+                pos = self.skip_whitespace(match.end())
+                if self.content[pos : pos + 1] != b":":
+                    raise self.error(pos, "Expected ':'")
+                pos = self.skip_whitespace(pos + 1)
+            else:
+                key = index
+                index += 1
+
+            # Paths are only tracked inside the containers that lead to a
+            # requested value
+            child_path = path + (key,) if descend else None
+            pos = self.skip_whitespace(self.value(pos, child_path))
+
+            char = self.content[pos : pos + 1]
+            if char == closing:
+                return pos + 1
+            if char != b",":
+                raise self.error(pos, f"Expected ',' or '{closing.decode()}'")
+            pos = self.skip_whitespace(pos + 1)
+
+
+def find_spans(content, paths):
+    """
+    Locates the values of several key paths in a JSON document.
+
+    Args:
+        content (bytes): The UTF-8 JSON document.
+        paths (iterable): The key paths (tuples of keys and indexes).
+
+    Returns:
+        dict: The `(start, end)` byte span of each path found.
+
+    Raises:
+        JSONPatchError: If the document is malformed.
+    """
+    return _Scanner(content, paths).scan()
+
+
+def read_values(content, paths):
+    """
+    Reads the values of several key paths without parsing the whole document.
+
+    Args:
+        content (bytes): The UTF-8 JSON document.
+        paths (iterable): The key paths (tuples of keys and indexes).
+
+    Returns:
+        dict: The decoded value of each path found. Missing paths are
+              omitted.
+
+    Raises:
+        JSONPatchError: If the document is malformed.
+    """
+    return {
+        path: json.loads(content[start:end])
+        for path, (start, end) in find_spans(content, paths).items()
+    }
+
+
+def patch_values(content, changes, spans=None):
+    """
+    Replaces the values of several key paths, keeping every other byte.
+
+    Args:
+        content (bytes): The UTF-8 JSON document.
+        changes (dict): The new value of each key path.
+        spans (dict, optional): The spans returned by `find_spans()` for
+                                this document, to avoid scanning it again.
+
+    Returns:
+        bytes: The patched document.
+
+    Raises:
+        JSONPatchError: If the document is malformed or a path is missing.
+    """
+    if spans is None:
+        spans = find_spans(content, changes)
+    missing = [path for path in changes if path not in spans]
+    if missing:
+        raise JSONPatchError(f"Key not found: {'/'.join(map(str, missing[0]))}")
+
+    parts = []
+    end_of_previous = len(content)
+    # Patch from the end so that the spans before stay valid
+    for path, (start, end) in sorted(
+        ((path, spans[path]) for path in changes),
+        key=lambda item: item[1],
+        reverse=True,
+    ):
+        value = json.dumps(changes[path], ensure_ascii=False).encode("utf-8")
+        parts.append(content[end:end_of_previous])
+        parts.append(value)
+        end_of_previous = start
+    parts.append(content[:end_of_previous])
+    return b"".join(reversed(parts))
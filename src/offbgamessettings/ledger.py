@@ -0,0 +1,272 @@
+"""
+Configuration ledger.
+
+Once a rig is configured, nothing changes until Steam updates a game or
+something rewrites its files. The ledger remembers the state of each game
+after a run, so that later runs can skip the games that are still
+configured, and so that "is this rig configured?" can be answered without
+discovering or parsing anything.
+
+What is recorded, per game (AppID):
+-   the Steam `buildid` from the appmanifest, and the signature of the
+    appmanifest itself;
+-   for each file managed by the configurator (`managed_files()`), its
+    signature (mtime, size, inode) and SHA-256;
+-   whether the game was left configured, and the status of the run.
+
+A game is only considered current when it was left configured, its
+`buildid` is unchanged, and each managed file still has the same signature,
+or the same content when only its signature changed (e.g. a file touched
+without being modified). Anything else re-queues the game for a full check.
+
+Ledger file (JSON, next to the discovery cache):
+    {
+        "version": 1,
+        "games": {
+            "<app_id>": {
+                "name": "...", "configured": true, "status": "MODIFIED",
+                "time": 1700000000.0, "buildid": "...", "manifest": "...",
+                "manifest_signature": [...],
+                "files": {"<path>": {"signature": [...], "sha256": "..."}}
+            }
+        }
+    }
+"""
+import json
+import os
+import time
+
+from . import discovery_cache
+from .utils import atomic_write
+
+LEDGER_VERSION = 1
+LEDGER_FILE_NAME = "ledger.json"
+
+# Statuses after which the configurator has left the game configured
+_CONFIGURED_STATUSES = ("OK", "MODIFIED")
+
+
+def default_ledger_path():
+    """
+    Returns the default path of the ledger file.
+
+    Returns:
+        str: The path to the ledger, in the user's cache directory.
+    """
+    return os.path.join(discovery_cache.get_cache_dir(), LEDGER_FILE_NAME)
+
+
+def fingerprint_file(file_path):
+    """
+    Computes the fingerprint of a managed file.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        dict or None: The 'signature' and 'sha256' of the file, or None if
+                      it does not exist.
+    """
+    from .backup_store import hash_file
+
+    signature = discovery_cache.file_signature(file_path)
+    if signature is None:
+        return None
+    try:
+        return {"signature": signature, "sha256": hash_file(file_path)}
+    except OSError:
+        return None
+
+
+class Ledger:
+    """
+    The recorded state of the configured games.
+
+    Attributes:
+        path (str or None): The path to the ledger file (None for a ledger
+                            that is never saved).
+        games (dict): The entry of each recorded game, keyed by AppID.
+    """
+
+    def __init__(self, path=None, games=None):
+        """
+        Initializes the ledger.
+
+        Args:
+            path (str, optional): The path to the ledger file.
+            games (dict, optional): The recorded games.
+        """
+        self.path = path
+        self.games = dict(games or {})
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads the ledger from a file.
+
+        A missing, unreadable or outdated ledger is not an error: it simply
+        results in an empty ledger, and every game is checked.
+
+        Args:
+            path (str): The path to the ledger file.
+
+        Returns:
+            Ledger: The loaded ledger.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != LEDGER_VERSION:
+            return cls(path)
+        return cls(path, data.get("games"))
+
+    def save(self):
+        """
+        Saves the ledger atomically. Errors are ignored: the ledger only
+        saves work, it is never required.
+        """
+        if not self.path:
+            return
+        content = json.dumps(
+            {"version": LEDGER_VERSION, "games": self.games}, indent=2, sort_keys=True
+        ).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, content)
+        except OSError:
+            pass
+
+    def record(self, app_id, game_data, files, configured, status):
+        """
+        Records the state of a game after a run.
+
+        Args:
+            app_id (str): The Steam AppID of the game.
+            game_data (dict): The discovered game data ('name', 'path',
+                              'buildid' and 'manifest').
+            files (list): The paths of the files managed by its configurator.
+            configured (bool): Whether the game was left configured.
+            status (str): The status of the run.
+        """
+        manifest = game_data.get("manifest")
+        self.games[app_id] = {
+            "name": game_data["name"],
+            "path": game_data["path"],
+            "configured": configured,
+            "status": status,
+            "time": time.time(),
+            "buildid": game_data.get("buildid"),
+            "manifest": manifest,
+            "manifest_signature": (
+                discovery_cache.file_signature(manifest) if manifest else None
+            ),
+            "files": {path: fingerprint_file(path) for path in files},
+        }
+
+    def _current_buildid(self, entry):
+        """
+        Reads the current `buildid` of a recorded game, only opening the
+        appmanifest if it has changed since it was recorded.
+        """
+        manifest = entry.get("manifest")
+        if not manifest:
+            return entry.get("buildid")
+        signature = discovery_cache.file_signature(manifest)
+        if signature is not None and signature == entry.get("manifest_signature"):
+            return entry.get("buildid")
+        # Only imported when a manifest has changed (`status` stays fast)
+        from .game_discovery import read_manifest_fields
+
+        fields = (
+            read_manifest_fields(manifest, keys=("buildid",)) if signature else None
+        )
+        return fields.get("buildid") if fields else None
+
+    def check(self, app_id, game_data=None):
+        """
+        Checks whether a game is still configured as recorded.
+
+        Args:
+            app_id (str): The Steam AppID of the game.
+            game_data (dict, optional): The freshly discovered game data. Its
+                                        'buildid' is used when given;
+                                        otherwise the appmanifest is checked.
+
+        Returns:
+            tuple: `(current, reason)`, where `current` is True if the game
+                   can be skipped, and `reason` explains why not (None when
+                   current).
+        """
+        entry = self.games.get(app_id)
+        if entry is None:
+            return False, "Not recorded yet."
+        if not entry.get("configured"):
+            return False, f"Not configured at the last run ({entry.get('status')})."
+
+        if game_data is not None:
+            if game_data.get("path") != entry.get("path"):
+                return False, "The game has moved."
+            buildid = game_data.get("buildid")
+        else:
+            buildid = self._current_buildid(entry)
+        if buildid != entry.get("buildid"):
+            return False, (
+                f"Updated by Steam (build {entry.get('buildid')} -> {buildid})."
+            )
+
+        for path, fingerprint in entry.get("files", {}).items():
+            if fingerprint is None:
+                # The file did not exist at the last run
+                if os.path.exists(path):
+                    return False, f"{os.path.basename(path)} has been created."
+                continue
+            signature = discovery_cache.file_signature(path)
+            if signature is None:
+                return False, f"{os.path.basename(path)} is missing."
+            if signature != fingerprint["signature"]:
+                from .backup_store import hash_file
+
+                try:
+                    unchanged = hash_file(path) == fingerprint["sha256"]
+                except OSError:
+                    unchanged = False
+                if not unchanged:
+                    return False, f"{os.path.basename(path)} has changed."
+        return True, None
+
+    def status(self):
+        """
+        Checks every recorded game.
+
+        Returns:
+            dict: For each recorded AppID, a dictionary with the 'name' of
+                  the game, whether it is still 'configured', the 'reason'
+                  when it is not, and the 'time' of the last run.
+        """
+        report = {}
+        for app_id, entry in sorted(
+            self.games.items(), key=lambda item: item[1].get("name", "")
+        ):
+            current, reason = self.check(app_id)
+            report[app_id] = {
+                "name": entry.get("name", app_id),
+                "configured": current,
+                "reason": reason,
+                "time": entry.get("time"),
+            }
+        return report
+
+
+def is_configured_status(status):
+    """
+    Tells whether a run with this status leaves a game configured.
+
+    Args:
+        status (str): The status returned by `check_and_configure()`.
+
+    Returns:
+        bool: True for "OK" and "MODIFIED".
+    """
+    return status in _CONFIGURED_STATUSES
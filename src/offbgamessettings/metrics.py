@@ -0,0 +1,253 @@
+"""
+Prometheus metrics of a run.
+
+Rigs run node_exporter with its textfile collector, which exposes the
+`*.prom` files of a folder. With `--metrics-file PATH`, the outcome of each
+run is written there, so that configuration drift and slow runs can be
+alerted on.
+
+How it works:
+-   A `MetricsCollector` receives the result of each game through the
+    `on_result` callback of the orchestrator, with the time spent in each
+    phase of its configurator. Nothing is parsed from the console output.
+-   Discovery is streamed into the orchestrator, so its duration is the
+    time spent waiting for the discovery stream (see `timed_discovery`).
+-   The bytes written and backed up come from the I/O counters of `utils`,
+    measured from the creation of the collector. Only game files are
+    counted, not the tool's own files (ledger, backup index, metrics...).
+-   `write()` renders the exposition text and writes it atomically (see
+    `utils.atomic_write`): the collector never reads a partial file.
+
+With `--watch`, the file is rewritten after each re-run, and the metrics
+cover the whole session.
+
+Metrics (all of them describe the last run):
+-   `offbgamessettings_game_status{app_id, game, status}`: 1 for the status
+    of each game, 0 for the other statuses.
+-   `offbgamessettings_games{status}`: the number of games per status.
+-   `offbgamessettings_discovery_duration_seconds`: histogram of the
+    discovery duration.
+-   `offbgamessettings_configure_duration_seconds`: histogram of the time
+    spent by the configurator of each game (all phases).
+-   `offbgamessettings_backed_up_bytes`, `offbgamessettings_written_bytes`:
+    the size of the game files backed up, and the bytes of game files
+    written (configured or restored).
+-   `offbgamessettings_last_run_timestamp_seconds{action}`: the end of the
+    run, to alert on rigs that stopped reporting.
+"""
+import threading
+import time
+
+from .results import Status
+from .utils import atomic_write, io_counters
+
+PREFIX = "offbgamessettings"
+
+# Upper bounds of the histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    """Escapes a label value of the exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    """Formats a set of labels (e.g. `{app_id="365960"}`)."""
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+        + "}"
+    )
+
+
+def _number(value):
+    """Formats a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    A cumulative histogram, in the Prometheus sense.
+
+    Attributes:
+        buckets (tuple): The upper bounds of the buckets.
+        counts (list): The number of observations of each bucket (not
+                       cumulative).
+        total (float): The sum of the observations.
+        count (int): The number of observations.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Adds an observation.
+
+        Args:
+            value (float): The observed value.
+        """
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name):
+        """
+        Renders the samples of the histogram.
+
+        Args:
+            name (str): The name of the metric.
+
+        Returns:
+            list: The lines of the samples.
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(le=_number(bound))} {cumulative}")
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {_number(round(self.total, 6))}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class MetricsCollector:
+    """
+    Collects the metrics of a run.
+
+    Attributes:
+        action (str): "configure", "revert" or "plan".
+        games (dict): The `(name, status)` of each game, keyed by AppID.
+        discovery (Histogram): The discovery durations.
+        configure (Histogram): The configurator durations.
+    """
+
+    def __init__(self, action="configure"):
+        """
+        Initializes the collector, and starts measuring the I/O of the run.
+
+        Args:
+            action (str): "configure", "revert" or "plan".
+        """
+        self.action = action
+        self.games = {}
+        self.discovery = Histogram()
+        self.configure = Histogram()
+        self._io_start = io_counters()
+        self._lock = threading.Lock()
+
+    def on_result(self, app_id, game_data, result, timings):
+        """
+        Records the result of a game (an `on_result` callback of the
+        orchestrator).
+
+        Args:
+            app_id (str): The Steam AppID of the game.
+            game_data (dict): The discovered game data.
+            result (GameResult or dict): The result of the game.
+            timings (dict): The duration of each phase, in seconds.
+        """
+        with self._lock:
+            self.games[app_id] = (game_data["name"], str(result["status"]))
+            if timings:
+                self.configure.observe(sum(timings.values()))
+
+    def timed_discovery(self, games):
+        """
+        Measures the time spent waiting for a stream of discovered games.
+        The duration is observed once the stream is exhausted.
+
+        Args:
+            games (iterable): The `(app_id, game_data)` pairs.
+
+        Yields:
+            tuple: The same pairs.
+        """
+        iterator = iter(games)
+        elapsed = 0.0
+        while True:
+            start = time.perf_counter()
+            game = next(iterator, None)
+            elapsed += time.perf_counter() - start
+            if game is None:
+                break
+            yield game
+        with self._lock:
+            self.discovery.observe(elapsed)
+
+    def render(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        io = io_counters()
+        statuses = [str(status) for status in Status]
+        with self._lock:
+            games = dict(self.games)
+            lines = []
+
+            name = f"{PREFIX}_game_status"
+            lines.append(f"# HELP {name} Status of each game after the last run.")
+            lines.append(f"# TYPE {name} gauge")
+            for app_id, (game, current) in sorted(games.items()):
+                for status in statuses:
+                    labels = _labels(app_id=app_id, game=game, status=status)
+                    lines.append(f"{name}{labels} {int(status == current)}")
+
+            name = f"{PREFIX}_games"
+            lines.append(f"# HELP {name} Number of games per status in the last run.")
+            lines.append(f"# TYPE {name} gauge")
+            for status in statuses:
+                count = sum(1 for _, current in games.values() if current == status)
+                lines.append(f"{name}{_labels(status=status)} {count}")
+
+            for histogram, name, help_text in (
+                (self.discovery, "discovery", "Time spent discovering the games"),
+                (self.configure, "configure", "Time spent configuring each game"),
+            ):
+                name = f"{PREFIX}_{name}_duration_seconds"
+                lines.append(f"# HELP {name} {help_text}, in seconds.")
+                lines.append(f"# TYPE {name} histogram")
+                lines.extend(histogram.render(name))
+
+        for counter, help_text in (
+            ("backed_up", "Size of the game files backed up by the last run."),
+            ("written", "Bytes of game files written by the last run."),
+        ):
+            name = f"{PREFIX}_{counter}_bytes"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {io[counter] - self._io_start[counter]}")
+
+        name = f"{PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# HELP {name} End of the last run (Unix time).")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{_labels(action=self.action)} {round(time.time(), 3)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Writes the metrics to a file, atomically. A new file gets the
+        permissions given by the umask, so that the textfile collector,
+        usually running as another user, can read it.
+
+        Args:
+            path (str): The path of the file (e.g. in the folder of the
+                        node_exporter textfile collector, ending in `.prom`).
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        atomic_write(path, self.render().encode("utf-8"))
@@ -0,0 +1,177 @@
+"""
+Machine-readable output.
+
+Fleet tooling needs the results as data, not as colored text. With
+`--output ndjson` or `--output json`, one record per game is written as
+soon as its configurator finishes (see the `on_result` callback of the
+orchestrator), so that a collector can process the results while the run
+is still going.
+
+Record (one per game):
+    {
+        "app_id": "365960", "name": "rFactor 2", "path": "...",
+        "action": "configure", "status": "MODIFIED",
+        "logs": [{"status": "INFO", "message": "..."}, ...],
+        "timings": {"decisions": 0.0012, "configure": 0.0034}
+    }
+Dry runs add the planned "operations"; fleet runs add the Steam "root".
+Timings are in seconds, per phase of the configurator ("decisions",
+"configure", "revert" or "plan"). A Steam root that could not be processed
+in fleet mode yields a record with its "root", "status" and "error" only.
+
+Formats:
+-   `ndjson`: one JSON object per line.
+-   `json`: a single JSON array. It is streamed too: the opening bracket is
+    written with the first record, and the closing one by `close()`.
+
+Nothing is buffered beyond the current record: the stream is flushed after
+each one.
+"""
+import json
+import sys
+
+# Supported values of the `--output` option (besides the default "text")
+FORMATS = ("ndjson", "json")
+
+
+def build_record(app_id, game_data, result, action, timings=None, root=None):
+    """
+    Builds the output record of a game.
+
+    Args:
+        app_id (str): The Steam AppID of the game.
+        game_data (dict): The discovered game data ('name' and 'path').
+        result (GameResult or dict): The result of the configurator.
+        action (str): "configure", "revert" or "plan".
+        timings (dict, optional): The duration of each phase, in seconds.
+        root (str, optional): The Steam root of the game (fleet mode).
+
+    Returns:
+        dict: The record, ready to be serialized.
+    """
+    record = {
+        "app_id": app_id,
+        "name": game_data["name"],
+        "path": game_data["path"],
+        "action": action,
+        "status": str(result["status"]),
+        "logs": [
+            {"status": str(log["status"]), "message": log["message"]}
+            for log in result["logs"]
+        ],
+        "timings": {
+            phase: round(seconds, 6) for phase, seconds in (timings or {}).items()
+        },
+    }
+    if "operations" in result:
+        record["operations"] = result["operations"]
+    if root is not None:
+        record["root"] = root
+    return record
+
+
+class RecordWriter:
+    """
+    Streams records to a text stream.
+
+    Attributes:
+        stream: The text stream written to (e.g. `sys.stdout`).
+        output_format (str): "ndjson" or "json".
+        count (int): The number of records written.
+    """
+
+    def __init__(self, stream, output_format="ndjson", close_stream=False):
+        """
+        Initializes the writer.
+
+        Args:
+            stream: The text stream to write to.
+            output_format (str): "ndjson" or "json".
+            close_stream (bool): Whether `close()` also closes the stream.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format!r}")
+        self.stream = stream
+        self.output_format = output_format
+        self.count = 0
+        self._close_stream = close_stream
+
+    @classmethod
+    def open(cls, path, output_format="ndjson"):
+        """
+        Creates a writer to a file, or to the standard output.
+
+        Args:
+            path (str or None): The path of the file, or None (or "-") for
+                                the standard output.
+            output_format (str): "ndjson" or "json".
+
+        Returns:
+            RecordWriter: The writer.
+
+        Raises:
+            OSError: If the file cannot be created.
+        """
+        if path in (None, "-"):
+            return cls(sys.stdout, output_format)
+        return cls(open(path, "w", encoding="utf-8"), output_format, close_stream=True)
+
+    def write(self, record):
+        """
+        Writes a record, and flushes it.
+
+        Args:
+            record (dict): The record (see `build_record`).
+        """
+        line = json.dumps(record, ensure_ascii=False)
+        if self.output_format == "json":
+            line = ("[\n" if self.count == 0 else ",\n") + line
+        else:
+            line += "\n"
+        self.stream.write(line)
+        self.stream.flush()
+        self.count += 1
+
+    def result_callback(self, action):
+        """
+        Returns an `on_result` callback for the orchestrator, writing the
+        record of each game.
+
+        Args:
+            action (str): "configure", "revert" or "plan".
+
+        Returns:
+            callable: The callback.
+        """
+
+        def on_result(app_id, game_data, result, timings):
+            self.write(build_record(app_id, game_data, result, action, timings))
+
+        return on_result
+
+    def write_root_report(self, root, report):
+        """
+        Writes the records of a Steam root processed in fleet mode.
+
+        Args:
+            root (str): The Steam root.
+            report (dict): Its report, with the 'records' of its games (see
+                           `fleet.process_root`).
+        """
+        if report.get("error"):
+            self.write({"root": root, "status": "ERROR", "error": report["error"]})
+        for record in report.get("records", ()):
+            self.write(record)
+
+    def close(self):
+        """
+        Ends the output (the JSON array is closed, even when empty).
+        """
+        if self.output_format == "json":
+            self.stream.write("[]\n" if self.count == 0 else "\n]\n")
+        self.stream.flush()
+        if self._close_stream:
+            self.stream.close()
@@ -0,0 +1,210 @@
+"""
+Compact result model.
+
+Each configurator operation returns a result: a status and a list of log
+entries, plus the planned operations of a dry run. Fleet runs aggregate the
+results of thousands of games, so their shape matters: a dictionary per log
+entry, holding a message formatted up front, costs far more than the few
+fields it carries, and most messages (OK, INFO) are never displayed unless
+`--verbose` is set.
+
+Design:
+-   `Status` enumerates the statuses. It derives from `str`, so a status
+    still compares, hashes, prints and serializes to JSON as its plain
+    string (e.g. "OK").
+-   `LogEntry` stores its status, a message template and the parameters of
+    the template, in `__slots__`. The message is only formatted when it is
+    read (`LogEntry.message`). Templates are interned, so the entries built
+    from the same template share a single string, even after being sent
+    across processes (fleet mode).
+-   `GameResult` stores the status, log entries and optional planned
+    operations of a game, in `__slots__`.
+
+Compatibility:
+    Both types are read-only mappings with the keys of the dictionaries they
+    replace (`result["status"]`, `log["message"]`...), and compare equal to
+    those dictionaries. `to_dict()` returns the plain dictionary form.
+    Configurators may still return plain dictionaries: every consumer only
+    relies on the mapping interface.
+"""
+import sys
+from collections.abc import Mapping
+from enum import Enum
+
+
+class Status(str, Enum):
+    """The status of an operation, or of a log entry."""
+
+    OK = "OK"
+    INFO = "INFO"
+    MODIFIED = "MODIFIED"
+    WARNING = "WARNING"
+    ERROR = "ERROR"
+    NOT_REQUIRED = "NOT REQUIRED"
+    RESTORED = "RESTORED"
+    NOT_FOUND = "NOT FOUND"
+    PLANNED = "PLANNED"
+
+    # Statuses print as their value on every Python version
+    def __str__(self):
+        return self.value
+
+    def __format__(self, format_spec):
+        return self.value.__format__(format_spec)
+
+
+def as_status(status):
+    """
+    Converts a status string to a `Status` member.
+
+    Args:
+        status (str or Status): The status.
+
+    Returns:
+        Status or str: The member, or the string itself if it is not a known
+                       status.
+    """
+    try:
+        return Status(status)
+    except ValueError:
+        return status
+
+
+class LogEntry(Mapping):
+    """
+    A log message, formatted lazily.
+
+    Attributes:
+        status (Status): The status of the message.
+        template (str): The message, or its template when `params` are given
+                        (formatted with `str.format`).
+        params (tuple): The parameters of the template.
+    """
+
+    __slots__ = ("status", "template", "params")
+
+    _KEYS = ("status", "message")
+
+    def __init__(self, status, template, *params):
+        """
+        Initializes the entry.
+
+        Args:
+            status (str or Status): The status of the message.
+            template (str): The message, or its template if `params` are
+                            given. Templates are interned; plain messages
+                            (e.g. with an error text) are not.
+            *params: The parameters of the template.
+        """
+        self.status = as_status(status)
+        self.template = sys.intern(template) if params else template
+        self.params = params
+
+    @property
+    def message(self):
+        """The formatted message."""
+        if not self.params:
+            return self.template
+        return self.template.format(*self.params)
+
+    def __getitem__(self, key):
+        if key == "status":
+            return self.status
+        if key == "message":
+            return self.message
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __reduce__(self):
+        # Rebuilt through `__init__`, so the template is interned again
+        return (type(self), (self.status, self.template) + self.params)
+
+    def __repr__(self):
+        return f"LogEntry({str(self.status)!r}, {self.message!r})"
+
+    def to_dict(self):
+        """
+        Returns the plain dictionary form of the entry.
+
+        Returns:
+            dict: The 'status' (str) and formatted 'message'.
+        """
+        return {"status": str(self.status), "message": self.message}
+
+
+class GameResult(Mapping):
+    """
+    The result of an operation on a game.
+
+    Attributes:
+        status (Status): The final status of the operation.
+        logs (list): The log entries (`LogEntry`, or dictionaries).
+        operations (list or None): The planned operations of a dry run (see
+                                   `BaseGameConfigurator.plan`).
+    """
+
+    __slots__ = ("status", "logs", "operations")
+
+    def __init__(self, status, logs=None, operations=None):
+        """
+        Initializes the result.
+
+        Args:
+            status (str or Status): The final status.
+            logs (list, optional): The log entries.
+            operations (list, optional): The planned operations.
+        """
+        self.status = as_status(status)
+        self.logs = logs if logs is not None else []
+        self.operations = operations
+
+    def __getitem__(self, key):
+        if key == "status":
+            return self.status
+        if key == "logs":
+            return self.logs
+        if key == "operations" and self.operations is not None:
+            return self.operations
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield "status"
+        yield "logs"
+        if self.operations is not None:
+            yield "operations"
+
+    def __len__(self):
+        return 2 if self.operations is None else 3
+
+    def __repr__(self):
+        return f"GameResult({str(self.status)!r}, {len(self.logs)} logs)"
+
+    def copy(self):
+        """
+        Returns a shallow copy of the result, with its own list of logs.
+        """
+        return GameResult(self.status, list(self.logs), self.operations)
+
+    def to_dict(self):
+        """
+        Returns the plain dictionary form of the result.
+
+        Returns:
+            dict: The 'status' (str), the 'logs' as dictionaries, and the
+                  'operations' if there are any.
+        """
+        data = {
+            "status": str(self.status),
+            "logs": [
+                log.to_dict() if isinstance(log, LogEntry) else dict(log)
+                for log in self.logs
+            ],
+        }
+        if self.operations is not None:
+            data["operations"] = self.operations
+        return data
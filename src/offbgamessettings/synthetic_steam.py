@@ -0,0 +1,369 @@
+"""
+Synthetic Steam installations.
+
+The tests build tiny fixtures by hand, which say nothing about performance.
+This module generates realistic Steam roots on disk, at any scale, for the
+benchmark suite (see `benchmark`) and for tests that need a full tree.
+
+What is generated:
+-   A Steam root with `steamapps/libraryfolders.vdf`, listing the root
+    itself and `libraries - 1` additional libraries. Additional libraries
+    live at varied depths under `<root>/drives`. With `symlinks`, every
+    other library is listed through a symbolic link, and one more link
+    aliases a library already listed (discovery must not scan it twice).
+-   `manifests` appmanifests spread over the libraries, with a varied
+    number of nested `InstalledDepots` blocks:
+    -   one valid manifest (and game folder) per supported game of the
+        catalog (`game_discovery.SIM_RACING_APP_IDS`),
+    -   a `broken` fraction of damaged manifests of supported games, in the
+        other libraries (truncated, empty, binary garbage, or missing their
+        `installdir`), which discovery must skip,
+    -   unrelated games for the rest, which discovery filters out by name.
+-   The configuration files of the configurable games, unconfigured: a
+    `device_defines.xml` with `devices` entries for the Codemasters games,
+    and a `Controller.JSON` with about `controller_keys` keys for rFactor 2.
+    Their layout varies (line endings, byte order mark, comments).
+
+The generation is deterministic for a given `seed`. Symbolic links are
+skipped where they cannot be created (e.g. Windows without the privilege):
+the library is then listed by its real path.
+"""
+import json
+import os
+import random
+
+from .game_discovery import SIM_RACING_APP_IDS
+
+# Install folder of the games whose configuration files are generated
+_INSTALL_DIRS = {
+    "690790": "DiRT Rally 2.0",
+    "1849250": "EA SPORTS WRC",
+    "365960": "rFactor 2",
+}
+
+# AppIDs of the unrelated games start here
+_FILLER_APP_ID = 2_000_000
+
+_BROKEN_KINDS = ("truncated", "empty", "binary", "no_installdir")
+
+
+def _vdf(key, value, depth=0):
+    """
+    Serializes a VDF block.
+
+    Args:
+        key (str): The name of the block.
+        value (dict or str): Its content (nested blocks are dictionaries).
+        depth (int): The indentation level.
+
+    Returns:
+        list: The lines of the block.
+    """
+    indent = "\t" * depth
+    if not isinstance(value, dict):
+        return [f'{indent}"{key}"\t\t"{value}"']
+    lines = [f'{indent}"{key}"', f"{indent}{{"]
+    for name, item in value.items():
+        lines.extend(_vdf(name, item, depth + 1))
+    lines.append(f"{indent}}}")
+    return lines
+
+
+def _write(path, content):
+    """Writes a file (str as UTF-8, or bytes), creating its folder."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _manifest(rng, app_id, name, install_dir):
+    """
+    Builds the content of an appmanifest.
+
+    Args:
+        rng (random.Random): The random generator.
+        app_id (str): The AppID of the game.
+        name (str): The name of the game.
+        install_dir (str or None): Its install folder (omitted if None).
+
+    Returns:
+        str: The manifest.
+    """
+    state = {
+        "appid": app_id,
+        "Universe": "1",
+        "LauncherPath": "C:\\\\Program Files (x86)\\\\Steam\\\\steam.exe",
+        "name": name,
+        "StateFlags": "4",
+    }
+    if install_dir is not None:
+        state["installdir"] = install_dir
+    state.update(
+        {
+            "LastUpdated": str(1_700_000_000 + rng.randrange(10_000_000)),
+            "SizeOnDisk": str(rng.randrange(1 << 34)),
+            "buildid": str(rng.randrange(1_000_000, 20_000_000)),
+            "LastOwner": "76561190000000000",
+            "AutoUpdateBehavior": "0",
+            "AllowOtherDownloadsWhileRunning": "0",
+            "ScheduledAutoUpdate": "0",
+        }
+    )
+    # Nested blocks of varied size, skipped by the manifest reader
+    depots = {}
+    for _ in range(rng.randrange(1, 40)):
+        depot = {
+            "manifest": str(rng.randrange(1 << 62)),
+            "size": str(rng.randrange(1 << 32)),
+        }
+        if rng.random() < 0.2:
+            depot["dlcappid"] = str(rng.randrange(100_000, 3_000_000))
+        depots[str(rng.randrange(100_000, 3_000_000))] = depot
+    state["InstalledDepots"] = depots
+    state["UserConfig"] = {"language": "english"}
+    state["MountedConfig"] = {"language": "english"}
+    return "\n".join(_vdf("AppState", state)) + "\n"
+
+
+def _broken_manifest(rng, kind, app_id, name, install_dir):
+    """
+    Builds the content of a damaged appmanifest.
+
+    Args:
+        rng (random.Random): The random generator.
+        kind (str): One of `_BROKEN_KINDS`.
+        app_id (str): The AppID of the game.
+        name (str): The name of the game.
+        install_dir (str): Its install folder.
+
+    Returns:
+        bytes: The manifest.
+    """
+    if kind == "empty":
+        return b""
+    if kind == "binary":
+        return bytes(rng.randrange(256) for _ in range(rng.randrange(64, 4096)))
+    if kind == "no_installdir":
+        return _manifest(rng, app_id, name, None).encode("utf-8")
+    content = _manifest(rng, app_id, name, install_dir).encode("utf-8")
+    # Cut before the end of the AppState block
+    return content[: rng.randrange(1, len(content) - 2)]
+
+
+def device_defines(rng, devices):
+    """
+    Builds an unconfigured `device_defines.xml`.
+
+    Args:
+        rng (random.Random): The random generator.
+        devices (int): The number of `<device>` entries.
+
+    Returns:
+        bytes: The document, with LF or CRLF line endings, and sometimes a
+               byte order mark and a comment mentioning the OpenFFBoard ID.
+    """
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', "<device_defines>"]
+    if rng.random() < 0.5:
+        # Mentions the ID outside of a <device> tag: must not count as one
+        lines.append(
+            '  <!-- <device id="{FFB01209-0000-0000-0000-504944564944}" /> -->'
+        )
+    for i in range(devices):
+        if i % 50 == 0:
+            lines.append(f"  <!-- Group {i // 50} -->")
+        lines.append(
+            f'  <device id="{{{rng.randrange(1 << 32):08X}-0000-0000-0000-'
+            f'504944564944}}" name="wheel_{i}" priority="{rng.randrange(200)}" '
+            f'type="{rng.choice(("wheel", "pedals", "shifter"))}" official="true" />'
+        )
+    lines.append("</device_defines>")
+    line_ending = rng.choice(("\n", "\r\n"))
+    content = (line_ending.join(lines) + line_ending).encode("utf-8")
+    if rng.random() < 0.3:
+        content = b"\xef\xbb\xbf" + content
+    return content
+
+
+def controller_json(rng, keys):
+    """
+    Builds an unconfigured rFactor 2 `Controller.JSON`.
+
+    Args:
+        rng (random.Random): The random generator.
+        keys (int): The approximate number of keys.
+
+    Returns:
+        bytes: The document, with a positive steering effects strength in
+               the middle of it.
+    """
+    data = {}
+    sections = max(keys // 100, 1)
+    for s in range(sections):
+        section = {}
+        for k in range(max(keys // sections, 1)):
+            value = rng.choice(
+                (rng.randrange(-10_000, 10_000), round(rng.random(), 5), "", True)
+            )
+            section[f"Setting {s}.{k}"] = value
+            section[f"Setting {s}.{k}#"] = "Description of the setting."
+        if s == sections // 2:
+            data["Steering effects strength"] = 8000
+            data["Steering effects strength#"] = "Strength of the steering effects."
+        data[f"Section {s}"] = section
+    content = json.dumps(data, indent=rng.choice((2, 4)))
+    if rng.random() < 0.5:
+        content = content.replace("\n", "\r\n")
+    return content.encode("utf-8")
+
+
+def _link(target, link_path):
+    """
+    Creates a symbolic link to a folder.
+
+    Returns:
+        bool: Whether the link was created.
+    """
+    os.makedirs(os.path.dirname(link_path), exist_ok=True)
+    try:
+        os.symlink(target, link_path, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        return False
+    return True
+
+
+def build_steam_tree(
+    root,
+    libraries=2,
+    manifests=20,
+    broken=0.1,
+    devices=500,
+    controller_keys=400,
+    symlinks=True,
+    seed=0,
+):
+    """
+    Generates a synthetic Steam installation.
+
+    Args:
+        root (str): The folder of the Steam root (created if needed).
+        libraries (int): The number of Steam libraries, the root included.
+        manifests (int): The total number of appmanifests.
+        broken (float): The fraction of damaged manifests.
+        devices (int): The number of entries of each `device_defines.xml`.
+        controller_keys (int): The approximate number of keys of the
+                               `Controller.JSON` file.
+        symlinks (bool): Whether to list libraries through symbolic links.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        dict: A summary of the tree: the 'root', the listed 'libraries', the
+              'games' that discovery must find (real path keyed by AppID,
+              discovery may report it through a symbolic link), and the
+              number of 'manifests' and 'broken' manifests written.
+    """
+    rng = random.Random(seed)
+    libraries = max(libraries, 1)
+    library_paths = [root]
+    for i in range(1, libraries):
+        # Libraries at varied depths, as on real multi-disk rigs
+        depth = ("games",) * (i % 3)
+        library_paths.append(os.path.join(root, "drives", f"d{i}", *depth, "Steam"))
+    for path in library_paths:
+        os.makedirs(os.path.join(path, "steamapps"), exist_ok=True)
+
+    listed = [root]
+    for i, path in enumerate(library_paths[1:], start=1):
+        link_path = os.path.join(root, "links", f"library{i}")
+        listed.append(
+            link_path if symlinks and i % 2 and _link(path, link_path) else path
+        )
+    if symlinks and len(library_paths) > 1:
+        alias = os.path.join(root, "links", "alias")
+        if _link(library_paths[-1], alias):
+            listed.append(alias)
+    folders = {str(i): {"path": path, "label": ""} for i, path in enumerate(listed)}
+    _write(
+        os.path.join(root, "steamapps", "libraryfolders.vdf"),
+        "\n".join(_vdf("libraryfolders", folders)) + "\n",
+    )
+
+    catalog = [app_id for app_id in SIM_RACING_APP_IDS if app_id != "480"]
+    catalog = catalog[:manifests]
+    # Damaged manifests go to the libraries without the valid one
+    broken_count = min(
+        int(manifests * broken),
+        manifests - len(catalog),
+        len(catalog) * (libraries - 1),
+    )
+    filler_count = manifests - len(catalog) - broken_count
+
+    games = {}
+    homes = {}
+    for app_id in catalog:
+        library = rng.choice(library_paths)
+        homes[app_id] = library
+        name = SIM_RACING_APP_IDS[app_id]
+        install_dir = _INSTALL_DIRS.get(app_id, name)
+        steamapps = os.path.join(library, "steamapps")
+        _write(
+            os.path.join(steamapps, f"appmanifest_{app_id}.acf"),
+            _manifest(rng, app_id, name, install_dir),
+        )
+        game_path = os.path.join(steamapps, "common", install_dir)
+        os.makedirs(game_path, exist_ok=True)
+        games[app_id] = game_path
+        _write_game_files(rng, app_id, game_path, devices, controller_keys)
+
+    written = 0
+    while written < broken_count:
+        app_id = rng.choice(catalog)
+        library = rng.choice(library_paths)
+        path = os.path.join(library, "steamapps", f"appmanifest_{app_id}.acf")
+        if library == homes[app_id] or os.path.exists(path):
+            continue
+        name = SIM_RACING_APP_IDS[app_id]
+        kind = _BROKEN_KINDS[written % len(_BROKEN_KINDS)]
+        _write(
+            path,
+            _broken_manifest(rng, kind, app_id, name, _INSTALL_DIRS.get(app_id, name)),
+        )
+        written += 1
+
+    for i in range(filler_count):
+        app_id = str(_FILLER_APP_ID + i)
+        library = library_paths[i % len(library_paths)]
+        _write(
+            os.path.join(library, "steamapps", f"appmanifest_{app_id}.acf"),
+            _manifest(rng, app_id, f"Other game {i}", f"Other game {i}"),
+        )
+
+    return {
+        "root": root,
+        "libraries": listed,
+        "games": games,
+        "manifests": len(catalog) + broken_count + filler_count,
+        "broken": broken_count,
+    }
+
+
+def _write_game_files(rng, app_id, game_path, devices, controller_keys):
+    """Writes the unconfigured configuration files of a game, if it has any."""
+    if app_id == "690790":
+        input_dir = os.path.join(game_path, "input")
+    elif app_id == "1849250":
+        input_dir = os.path.join(game_path, "WRC", "Content", "input", "Windows")
+    elif app_id == "365960":
+        _write(
+            os.path.join(game_path, "UserData", "player", "Controller.JSON"),
+            controller_json(rng, controller_keys),
+        )
+        return
+    else:
+        return
+    _write(
+        os.path.join(input_dir, "devices", "device_defines.xml"),
+        device_defines(rng, devices),
+    )
+    os.makedirs(os.path.join(input_dir, "actionmaps"), exist_ok=True)
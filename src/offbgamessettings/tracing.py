@@ -0,0 +1,336 @@
+"""
+Span tracing of the hot paths.
+
+When a rig takes 20 seconds to run, the time may go to locating Steam,
+parsing `libraryfolders.vdf`, reading the manifests, a specific
+configurator, or the backup copies. The hot paths are instrumented with
+spans (named, timed sections of code), recorded only while tracing is
+enabled (`--profile FILE`).
+
+Usage:
+-   `@traced("name")` decorates a function: each call is a span.
+-   `with span("name", key=value):` records a block, with arguments shown
+    in the trace viewer.
+-   `start()` enables tracing and returns the `Tracer`; `stop()` disables
+    it. `Tracer.write(path)` saves the spans in the Chrome trace format
+    (JSON), which Perfetto (https://ui.perfetto.dev) and `chrome://tracing`
+    open.
+
+Cost when disabled:
+    Tracing is off unless `start()` is called. A disabled span is a global
+    lookup and a shared, empty context manager; a decorated function is
+    called directly, without building any span. Nothing is recorded.
+
+Memory:
+    With `start(memory=True)`, `tracemalloc` also records the peak memory
+    allocated during each span (`peak_kib`, above the memory in use when it
+    started). `tracemalloc` slows everything down, so the durations of such
+    a trace are inflated. The peak is tracked process-wide: spans running
+    at the same time in several threads share their figures. The peak of
+    a span includes its nested spans; on Python 3.8 (no
+    `tracemalloc.reset_peak`), it is the peak since the trace started.
+
+Processes:
+    Timestamps come from the monotonic clock shared by the processes of the
+    machine, so traces recorded in several processes can be merged
+    (`Tracer.merge`). In fleet mode, each worker process traces its own
+    Steam roots, and the parent merges their spans: each worker shows up as
+    a process of its own in the viewer.
+"""
+import functools
+import os
+import threading
+import time
+
+# The active tracer, or None when tracing is disabled
+_tracer = None
+
+
+class _NullSpan:
+    """The span returned while tracing is disabled: it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """A span being recorded (see `Tracer.span`)."""
+
+    __slots__ = ("tracer", "name", "args", "start", "memory")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.memory = self.tracer._enter_memory() if self.tracer.memory else None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        args = self.args
+        if self.memory is not None:
+            args = dict(args, peak_kib=self.tracer._exit_memory(self.memory))
+        if exc_type is not None:
+            args = dict(args, error=exc_type.__name__)
+        self.tracer._record(self.name, self.start, end, args)
+        return False
+
+
+class Tracer:
+    """
+    Records spans, and writes them in the Chrome trace format.
+
+    Attributes:
+        memory (bool): Whether the peak memory of each span is recorded.
+        events (list): The recorded trace events.
+    """
+
+    def __init__(self, memory=False):
+        """
+        Initializes the tracer.
+
+        Args:
+            memory (bool): Whether to record the peak memory of each span
+                           (with `tracemalloc`, which must be running).
+        """
+        self.memory = memory
+        self.events = []
+        self._pid = os.getpid()
+        self._threads = {}
+        self._local = threading.local()
+        # Whether `stop()` stops tracemalloc (started by `start()`)
+        self._stops_tracemalloc = False
+
+    def span(self, name, args=None):
+        """
+        Creates a span.
+
+        Args:
+            name (str): The name of the span.
+            args (dict, optional): The arguments shown with the span.
+
+        Returns:
+            The span, a context manager.
+        """
+        return _Span(self, name, args or {})
+
+    def _record(self, name, start, end, args):
+        """Adds a complete event ("X") for a finished span."""
+        thread = threading.current_thread()
+        tid = thread.ident
+        if tid not in self._threads:
+            self._threads[tid] = thread.name
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self._pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        # `list.append` is atomic: spans may end in several threads at once
+        self.events.append(event)
+
+    def _memory_stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter_memory(self):
+        """
+        Starts tracking the peak memory of a span.
+
+        Returns:
+            list: `[memory at start, highest peak seen]`, updated by the
+                  nested spans.
+        """
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        stack = self._memory_stack()
+        if stack:
+            # Keep the peak reached so far by the enclosing span
+            stack[-1][1] = max(stack[-1][1], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        frame = [current, current]
+        stack.append(frame)
+        return frame
+
+    def _exit_memory(self, frame):
+        """
+        Ends the tracking of the peak memory of a span.
+
+        Returns:
+            float: The peak allocated during the span, in KiB.
+        """
+        import tracemalloc
+
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame[1])
+        stack = self._memory_stack()
+        if stack and stack[-1] is frame:
+            stack.pop()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        return round(max(peak - frame[0], 0) / 1024, 1)
+
+    def trace(self):
+        """
+        Returns the trace, in the Chrome trace format.
+
+        Returns:
+            dict: The trace events (spans, and the name of each thread).
+        """
+        names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self._threads.items())
+        ]
+        return {"traceEvents": names + list(self.events), "displayTimeUnit": "ms"}
+
+    def merge(self, events):
+        """
+        Adds the events of a trace recorded elsewhere (e.g. in a worker
+        process).
+
+        Args:
+            events (list): The 'traceEvents' of the other trace.
+        """
+        self.events.extend(events)
+
+    def write(self, path):
+        """
+        Writes the trace to a JSON file, atomically.
+
+        Args:
+            path (str): The path of the file.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        import json
+
+        from .utils import atomic_write
+
+        atomic_write(path, json.dumps(self.trace()).encode("utf-8"))
+
+
+def start(memory=False):
+    """
+    Enables tracing.
+
+    Args:
+        memory (bool): Whether to record the peak memory of each span. This
+                       starts `tracemalloc` if it is not running yet (and
+                       `stop()` stops it).
+
+    Returns:
+        Tracer: The tracer recording the spans.
+    """
+    global _tracer
+    tracer = Tracer(memory=memory)
+    if memory:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            tracer._stops_tracemalloc = True
+    _tracer = tracer
+    return tracer
+
+
+def stop():
+    """
+    Disables tracing.
+
+    Returns:
+        Tracer or None: The tracer that was recording, if any.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and tracer._stops_tracemalloc:
+        import tracemalloc
+
+        tracemalloc.stop()
+    return tracer
+
+
+def enabled():
+    """
+    Tells whether tracing is enabled, e.g. to skip building the name of a
+    span when it is not.
+    """
+    return _tracer is not None
+
+
+def current():
+    """
+    Returns the active tracer.
+
+    Returns:
+        Tracer or None: The tracer, or None if tracing is disabled.
+    """
+    return _tracer
+
+
+def span(name, **args):
+    """
+    Records a block of code as a span, if tracing is enabled.
+
+    Args:
+        name (str): The name of the span.
+        **args: The arguments shown with the span (JSON-serializable).
+
+    Returns:
+        A context manager.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, args)
+
+
+def traced(name):
+    """
+    Decorates a function: each call is recorded as a span, if tracing is
+    enabled.
+
+    Args:
+        name (str): The name of the spans.
+
+    Returns:
+        callable: The decorator.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,461 @@
+"""
+Journaled multi-file transactions.
+
+A configurator may change several files of a game (e.g. `device_defines.xml`
+and `openffboard.xml` for the Codemasters games). Writing them one by one
+with `atomic_write()` protects each file, not the game: a failure or a crash
+between two writes leaves the game half configured. The orchestrator runs
+each configuration in a `Transaction` instead, so that the files of a game
+are changed all together, or not at all.
+
+How it works:
+1.  While the configurator runs, its writes are only staged in memory (see
+    `BaseGameConfigurator._write`). A configurator that ends in error is
+    aborted: nothing is written.
+2.  `commit()` first backs up the changed files staged with `backup=True`
+    (see `backup_store.backup_file`): a game whose changes are aborted
+    leaves no backup behind. It then writes the new content of every
+    changed file to a temporary file next to it and, with a journal, keeps
+    a copy of the original content of each file in the journal folder
+    ("undo" copies).
+3.  The temporary files and undo copies are flushed to disk together (one
+    group `fsync` pass), then the write-ahead journal is written
+    atomically: it lists every file about to be replaced, its temporary
+    file and its undo copy (none for a created file).
+4.  The temporary files are moved into place with `os.replace`, and their
+    directories are flushed in a single grouped pass. The journal is then
+    deleted: this is the commit point.
+5.  If a file cannot be replaced, the files already replaced are rolled
+    back to their original content (created files are deleted), and the
+    error is raised.
+
+Recovery:
+    A journal left behind means that a run stopped in the middle of a
+    commit (crash, power loss, killed process). `recover()` rolls the
+    transaction back from the undo copies, so that every file of the game
+    gets its original content again, and deletes the journal. It is called
+    before each local run. Journals of transactions still running in
+    another process (a live owner, and recent) are left alone.
+
+Without a journal folder, transactions are still all-or-nothing within the
+process, but a crash in the middle of a commit is not recovered.
+
+Journal file (JSON, `<journal folder>/<transaction id>.json`):
+    {
+        "version": 1, "id": "...", "pid": 1234, "name": "DiRT Rally 2.0",
+        "time": 1700000000.0,
+        "files": [{"path": "...", "tmp": "...", "undo": "..." or null}]
+    }
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from . import discovery_cache
+from .tracing import traced
+from .utils import atomic_write, count_io, fsync_directory, set_default_mode
+
+JOURNAL_VERSION = 1
+JOURNAL_DIR_NAME = "journal"
+
+# Journals older than this (in seconds) are recovered even if their owner
+# seems alive (its process ID may have been reused)
+STALE_AFTER = 600
+
+
+def default_journal_dir():
+    """
+    Returns the default journal folder.
+
+    Returns:
+        str: The path to the folder, in the user's cache directory (it may
+             not exist yet).
+    """
+    return os.path.join(discovery_cache.get_cache_dir(), JOURNAL_DIR_NAME)
+
+
+def _fsync_file(path):
+    """Flushes the content of a file to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _sync_directories(paths):
+    """Flushes the directories of some files, each directory once."""
+    for directory in sorted({os.path.dirname(path) for path in paths}):
+        try:
+            fsync_directory(directory)
+        except OSError:
+            pass
+
+
+def _remove(path):
+    """Deletes a file, ignoring a file that is already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read(path):
+    """Reads a file, returning None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _process_alive(pid):
+    """
+    Tells whether a process is still running.
+
+    Args:
+        pid (int): The process ID.
+
+    Returns:
+        bool: True if the process exists (or its state cannot be known).
+    """
+    if os.name == "nt":
+        import ctypes
+
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # e.g. a process of another user
+        return True
+    return True
+
+
+class Transaction:
+    """
+    A set of file writes applied all together, or not at all.
+
+    Attributes:
+        journal_dir (str or None): The folder of the write-ahead journal, or
+                                   None to commit without a journal.
+        name (str): A label recorded in the journal (e.g. the game name).
+        id (str): The unique ID of the transaction.
+        backed_up (list): The files backed up by the last commit.
+    """
+
+    def __init__(self, journal_dir=None, name=""):
+        """
+        Initializes an empty transaction.
+
+        Args:
+            journal_dir (str, optional): The folder of the write-ahead
+                                         journal.
+            name (str): A label recorded in the journal.
+        """
+        self.journal_dir = journal_dir
+        self.name = name
+        self.id = uuid.uuid4().hex
+        self._staged = {}
+        self._backups = set()
+        self.backed_up = []
+
+    def __len__(self):
+        return len(self._staged)
+
+    def staged_paths(self):
+        """
+        Lists the staged files.
+
+        Returns:
+            list: The absolute paths, in the order they were staged.
+        """
+        return list(self._staged)
+
+    def stage(self, file_path, content, backup=False):
+        """
+        Stages the new content of a file. Staging a file again replaces its
+        previous content.
+
+        Args:
+            file_path (str): The path to the file.
+            content (bytes): The new content of the file.
+            backup (bool): Whether to back up the file when it is committed,
+                           before it is replaced.
+        """
+        path = os.path.abspath(file_path)
+        self._staged[path] = content
+        if backup:
+            self._backups.add(path)
+
+    def abort(self):
+        """
+        Discards the staged writes: no file is modified, nor backed up.
+        """
+        self._staged.clear()
+        self._backups.clear()
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.journal_dir, f"{self.id}.json")
+
+    @property
+    def undo_dir(self):
+        return os.path.join(self.journal_dir, self.id)
+
+    @traced("commit")
+    def commit(self):
+        """
+        Writes every staged file, all together or not at all.
+
+        Files whose content is already the staged one are neither written
+        nor backed up.
+
+        Returns:
+            list: The paths of the files written.
+
+        Raises:
+            OSError: If a file cannot be backed up or written. The files
+                     already replaced are rolled back first, and the writes
+                     stay staged.
+        """
+        # (path, original content or None, new content)
+        changes = []
+        for path, content in self._staged.items():
+            original = _read(path)
+            if original != content:
+                changes.append((path, original, content))
+        self.backed_up = []
+        if not changes:
+            self.abort()
+            return []
+
+        self._backup(path for path, original, _ in changes if original is not None)
+        files = []
+        try:
+            for index, (path, original, content) in enumerate(changes):
+                files.append(self._write_temporary(index, path, original, content))
+            # One group fsync: the new contents and the undo copies
+            for entry in files:
+                _fsync_file(entry["tmp"])
+                if entry["undo"]:
+                    _fsync_file(entry["undo"])
+            if self.journal_dir is not None:
+                _sync_directories([entry["undo"] for entry in files if entry["undo"]])
+                self._write_journal(files)
+        except BaseException:
+            for entry in files:
+                _remove(entry["tmp"])
+            self._discard_journal()
+            raise
+
+        replaced = []
+        try:
+            for entry, (path, _, _) in zip(files, changes):
+                os.replace(entry["tmp"], path)
+                replaced.append(path)
+        except BaseException:
+            originals = {path: original for path, original, _ in changes}
+            for entry in files[len(replaced) :]:
+                _remove(entry["tmp"])
+            # Raises if the rollback fails: the journal is kept for recovery
+            _rollback({path: originals[path] for path in replaced})
+            self._discard_journal()
+            raise
+
+        _sync_directories(replaced)
+        self._discard_journal()
+        self.abort()
+        for _, _, content in changes:
+            count_io("written", len(content))
+        return replaced
+
+    def _backup(self, paths):
+        """
+        Backs up the files staged with `backup=True`, before any of them is
+        replaced.
+
+        Raises:
+            OSError: If a file cannot be backed up.
+        """
+        from .backup_store import backup_file
+
+        for path in paths:
+            if path not in self._backups:
+                continue
+            if not backup_file(path):
+                raise OSError(f"Failed to create backup for {os.path.basename(path)}")
+            self.backed_up.append(path)
+
+    def _write_temporary(self, index, path, original, content):
+        """
+        Writes the new content of a file to a temporary file next to it,
+        and its original content to an undo copy (with a journal). Nothing
+        is flushed to disk yet.
+
+        Returns:
+            dict: The journal entry of the file: its 'path', 'tmp' file and
+                  'undo' copy (None for a created file, or without a
+                  journal).
+        """
+        entry = {"path": path, "tmp": None, "undo": None}
+        fd, entry["tmp"] = tempfile.mkstemp(
+            dir=os.path.dirname(path),
+            prefix=f".{os.path.basename(path)}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            if original is not None:
+                # Keep the permissions of the file being replaced
+                shutil.copymode(path, entry["tmp"])
+            else:
+                set_default_mode(entry["tmp"])
+            if original is not None and self.journal_dir is not None:
+                os.makedirs(self.undo_dir, exist_ok=True)
+                entry["undo"] = os.path.join(self.undo_dir, f"{index}.orig")
+                with open(entry["undo"], "wb") as f:
+                    f.write(original)
+        except BaseException:
+            _remove(entry["tmp"])
+            raise
+        return entry
+
+    def _write_journal(self, files):
+        """Writes the journal of the transaction, atomically."""
+        journal = {
+            "version": JOURNAL_VERSION,
+            "id": self.id,
+            "pid": os.getpid(),
+            "name": self.name,
+            "time": time.time(),
+            "files": files,
+        }
+        os.makedirs(self.journal_dir, exist_ok=True)
+        atomic_write(self.journal_path, json.dumps(journal, indent=2).encode("utf-8"))
+
+    def _discard_journal(self):
+        """Deletes the journal of the transaction, then its undo copies."""
+        if self.journal_dir is None:
+            return
+        _remove(self.journal_path)
+        shutil.rmtree(self.undo_dir, ignore_errors=True)
+
+
+def _rollback(originals):
+    """
+    Gives files their original content back.
+
+    Args:
+        originals (dict): The original content of each file, keyed by path
+                          (None for a file that did not exist).
+
+    Raises:
+        OSError: If a file cannot be restored. The other files are restored
+                 first.
+    """
+    error = None
+    for path, original in originals.items():
+        try:
+            if original is None:
+                _remove(path)
+            else:
+                atomic_write(path, original, defer_directory_sync=True)
+        except OSError as e:
+            error = error or e
+    _sync_directories(originals)
+    if error is not None:
+        raise error
+
+
+def _recover_journal(journal_dir, journal_path):
+    """
+    Rolls back the transaction of a journal, then deletes the journal.
+
+    Returns:
+        dict: The 'name' of the transaction and the 'files' restored.
+
+    Raises:
+        OSError: If a file cannot be restored.
+        ValueError: If the journal is not valid.
+    """
+    with open(journal_path, "rb") as f:
+        journal = json.loads(f.read().decode("utf-8"))
+    if not isinstance(journal, dict) or journal.get("version") != JOURNAL_VERSION:
+        raise ValueError(f"{journal_path} is not a transaction journal")
+
+    originals = {}
+    for entry in journal["files"]:
+        if entry["undo"]:
+            original = _read(entry["undo"])
+            if original is None:
+                raise ValueError(f"The undo copy of {entry['path']} is missing")
+        else:
+            original = None
+        originals[entry["path"]] = original
+        if entry["tmp"]:
+            _remove(entry["tmp"])
+    _rollback(originals)
+
+    _remove(journal_path)
+    shutil.rmtree(os.path.join(journal_dir, journal["id"]), ignore_errors=True)
+    return {"name": journal.get("name", ""), "files": list(originals)}
+
+
+def recover(journal_dir=None):
+    """
+    Rolls back the transactions interrupted in the middle of a commit.
+
+    Args:
+        journal_dir (str, optional): The journal folder. Defaults to
+                                     `default_journal_dir()`.
+
+    Returns:
+        list: The recovered transactions, as dictionaries with their 'name',
+              the 'files' restored and an 'error' message (None if the
+              transaction was rolled back).
+    """
+    if journal_dir is None:
+        journal_dir = default_journal_dir()
+    try:
+        names = sorted(os.listdir(journal_dir))
+    except FileNotFoundError:
+        return []
+
+    recovered = []
+    now = time.time()
+    for name in names:
+        path = os.path.join(journal_dir, name)
+        if not name.endswith(".json"):
+            # Undo copies of a transaction that never wrote its journal
+            if (
+                os.path.isdir(path)
+                and not os.path.exists(path + ".json")
+                and now - os.path.getmtime(path) > STALE_AFTER
+            ):
+                shutil.rmtree(path, ignore_errors=True)
+            continue
+        try:
+            with open(path, "rb") as f:
+                owner = json.loads(f.read().decode("utf-8")).get("pid")
+            if (
+                isinstance(owner, int)
+                and now - os.path.getmtime(path) <= STALE_AFTER
+                and _process_alive(owner)
+            ):
+                # Still being committed by another run
+                continue
+            recovered.append(dict(_recover_journal(journal_dir, path), error=None))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            recovered.append({"name": name, "files": [], "error": str(e)})
+    return recovered
@@ -2,36 +2,269 @@
 Miscellaneous file utilities.
 
 This module provides low-level helper functions that are used by
-different game configurators, such as creating file backups.
+different game configurators, such as writing files atomically or showing
+the difference between two versions of a file. Backups are handled by
+`backup_store.py`.
+
+Write pipeline:
+    All configurators write game files through `atomic_write()`. The new
+    content is written to a temporary file in the same directory, flushed
+    to disk with `fsync`, then moved into place with `os.replace`. A crash
+    or power loss therefore leaves either the old or the new file, never a
+    truncated one. A replaced file keeps its permissions, a created one gets
+    those of `open()` (see `set_default_mode`). Writing identical content is
+    skipped entirely, so repeated runs do not touch files that are already
+    configured.
+
+    The directory entries can be synced in a single grouped pass at the end
+    of a run: writes made with `defer_directory_sync=True` register their
+    directory, and `sync_pending_directories()` flushes them all at once.
+
+I/O counters:
+    `io_counters()` returns the number of bytes of game files written
+    (configured or restored) and backed up since the process started. They
+    are counted by the writers of game files (see `count_io`), not by
+    `atomic_write()`, so that the tool's own files (ledger, backup index,
+    journal...) are left out. Callers measure a run by the difference of two
+    snapshots.
+
+Probes:
+    `mapped_file()` memory-maps a file read-only, so that configurators can
+    search it at the byte level (see `BaseGameConfigurator.probe`) without
+    reading or parsing the whole file.
 """
+import mmap
 import os
 import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from .tracing import traced
+
+# Directories whose entries still need to be flushed to disk
+# (see `sync_pending_directories`).
+_pending_directories = set()
+_pending_directories_lock = threading.Lock()
+
+# `os.umask` can only be read by changing it: done once, before any thread
+# starts
+_umask = os.umask(0)
+os.umask(_umask)
+
+# Bytes "written" and "backed_up" since the process started
+_io_counters = {"written": 0, "backed_up": 0}
+_io_counters_lock = threading.Lock()
+
+
+def count_io(counter, size):
+    """
+    Adds bytes to an I/O counter.
+
+    Args:
+        counter (str): "written" or "backed_up".
+        size (int): The number of bytes.
+    """
+    with _io_counters_lock:
+        _io_counters[counter] += size
+
+
+def io_counters():
+    """
+    Returns a snapshot of the I/O counters.
+
+    Returns:
+        dict: The bytes of game files "written" and "backed_up" since the
+              process started.
+    """
+    with _io_counters_lock:
+        return dict(_io_counters)
 
 
-def backup_file(file_path):
+@contextmanager
+def mapped_file(file_path):
     """
-    Creates a backup of a file by adding a custom extension.
+    Memory-maps a file for reading.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Yields:
+        mmap.mmap or bytes: The read-only mapping of the file, which supports
+                            `find`, `rfind` and regular expressions on bytes.
+                            Empty files, which cannot be mapped, are given as
+                            `b""`.
 
-    The backup is a copy of the original file with the
-    `.bak_offb_settings` extension added to its name. This naming convention
-    makes it easy to identify backups created by this tool.
+    Raises:
+        OSError: If the file cannot be opened.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def unified_diff(file_path, old_content, new_content):
+    """
+    Builds a unified diff between two versions of a file.
 
     Args:
-        file_path (str): The absolute path to the file to be backed up.
+        file_path (str): The path of the file relative to the game folder,
+                         with `/` separators, used in the `a/` and `b/`
+                         headers of the diff.
+        old_content (bytes or None): The current content, or None if the file
+                                     does not exist yet.
+        new_content (bytes): The new content.
 
     Returns:
-        bool: True if the backup was created successfully, False otherwise.
+        str: The unified diff (empty if the contents are identical).
     """
-    if not os.path.exists(file_path):
-        return False
 
-    # Build the backup path
-    backup_path = file_path + ".bak_offb_settings"
+    def lines(content):
+        if content is None:
+            return []
+        return content.decode("utf-8", errors="replace").splitlines(keepends=True)
 
+    # Only needed for dry runs: kept out of the startup path
+    import difflib
+
+    diff = difflib.unified_diff(
+        lines(old_content),
+        lines(new_content),
+        fromfile="/dev/null" if old_content is None else f"a/{file_path}",
+        tofile=f"b/{file_path}",
+    )
+    # Make sure every line ends with a newline, even without a final one
+    return "".join(line if line.endswith("\n") else line + "\n" for line in diff)
+
+
+def fsync_directory(directory):
+    """
+    Flushes the entries of a directory (e.g. a rename) to disk.
+
+    This is a no-op on Windows, where directories cannot be opened this way
+    and `os.replace` is already journaled by NTFS.
+
+    Args:
+        directory (str): The path to the directory.
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
     try:
-        # Copy the original file to the new backup location
-        shutil.copy2(file_path, backup_path)
-        return True
-    except IOError:
-        # The copy failed, likely due to permissions
-        return False
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_pending_directories():
+    """
+    Flushes the directories of all deferred writes in one grouped pass.
+
+    Errors are ignored: at this point, the files themselves are already
+    safely written.
+
+    Returns:
+        int: The number of directories synced.
+    """
+    with _pending_directories_lock:
+        directories = sorted(_pending_directories)
+        _pending_directories.clear()
+
+    for directory in directories:
+        try:
+            fsync_directory(directory)
+        except OSError:
+            pass
+    return len(directories)
+
+
+def set_default_mode(file_path):
+    """
+    Gives a file the permissions of a file created with `open()` (0666
+    without the bits of the umask), instead of the private 0600 of
+    `tempfile.mkstemp`.
+
+    Args:
+        file_path (str): The path to the file.
+    """
+    os.chmod(file_path, 0o666 & ~_umask)
+
+
+@traced("atomic_write")
+def atomic_write(file_path, content, defer_directory_sync=False):
+    """
+    Writes a file atomically, skipping the write if nothing changes.
+
+    Args:
+        file_path (str): The path to the file to write.
+        content (bytes): The new content of the file.
+        defer_directory_sync (bool): If True, the directory is not synced
+                                     right away but registered for
+                                     `sync_pending_directories()`.
+
+    Returns:
+        bool: True if the file was written, False if it already had this
+              exact content.
+
+    Raises:
+        OSError: If the file cannot be written. The original file is left
+                 untouched in that case.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            # Keep the permissions of the file being replaced
+            shutil.copymode(file_path, tmp_path)
+        else:
+            set_default_mode(tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if defer_directory_sync:
+        with _pending_directories_lock:
+            _pending_directories.add(directory)
+    else:
+        fsync_directory(directory)
+    return True
+
+
+def restore_file(backup_path, file_path):
+    """
+    Restores a file from a backup copy, atomically.
+
+    Args:
+        backup_path (str): The path to the backup.
+        file_path (str): The path to the file to restore.
+
+    Returns:
+        bool: True if the file was written, False if it was already identical
+              to the backup.
+
+    Raises:
+        OSError: If the backup cannot be read or the file cannot be written.
+    """
+    with open(backup_path, "rb") as f:
+        content = f.read()
+    return atomic_write(file_path, content, defer_directory_sync=True)
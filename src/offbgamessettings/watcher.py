@@ -0,0 +1,441 @@
+"""
+Watch mode.
+
+Steam game updates routinely replace the files modified by the tool (for
+example DiRT Rally 2.0's `device_defines.xml`), which silently removes the
+OpenFFBoard configuration until the tool is run again. In watch mode, the
+tool keeps running after the first pass and re-applies the configuration of
+a game as soon as its files are overwritten.
+
+What is watched:
+-   the files managed by each configurator (`managed_files()`);
+-   the appmanifest of each game, which Steam rewrites during an update.
+
+How it works:
+-   On Linux, changes are reported by inotify (through `ctypes`, no extra
+    dependency). The parent directories are watched rather than the files
+    themselves, since files are usually replaced by a rename and a watch on
+    the old file would be lost. While waiting, the process is blocked in
+    `select()` and uses no CPU.
+-   Elsewhere (or if inotify is not available), the signatures (mtime,
+    size, inode) of the watched files are polled every few seconds. Only a
+    handful of `stat()` calls are made per interval.
+-   Bursts of events are debounced: a batch is only processed once no
+    watched file has changed for `debounce` seconds, so an update that
+    rewrites the same files many times triggers a single run.
+-   Only the games whose files changed are processed, through the normal
+    configuration workflow. Games whose appmanifest shows an update still
+    in progress are left for the next batch. Games that the ledger still
+    considers configured are skipped, so the tool's own writes never
+    trigger a new run.
+
+Decisions are never asked in watch mode: they are answered by the decision
+policy (`--yes`, `--no`, `--policy FILE`), or declined.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from . import config_orchestrator
+from .discovery_cache import file_signature
+from .game_configurators.factory import ConfiguratorFactory
+from .game_discovery import read_manifest_fields
+
+DEFAULT_DEBOUNCE = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify event masks (see inotify(7))
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+# struct inotify_event: wd, mask, cookie, len, then `len` bytes of name
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+# Steam `StateFlags`: fully installed, and no update, validation or
+# download pending or running (every flag from 0x100 up)
+_STATE_FULLY_INSTALLED = 0x4
+_STATE_UPDATE_REQUIRED = 0x2
+_STATE_BUSY_MASK = ~0xFF | _STATE_UPDATE_REQUIRED
+
+
+class PollingWatcher:
+    """
+    Detects changes to files by polling their signatures.
+
+    Attributes:
+        interval (float): The number of seconds between two polls.
+    """
+
+    def __init__(self, paths, interval=DEFAULT_POLL_INTERVAL):
+        """
+        Initializes the watcher.
+
+        Args:
+            paths (iterable): The paths of the files to watch.
+            interval (float): The number of seconds between two polls.
+        """
+        self.interval = interval
+        self._signatures = {path: file_signature(path) for path in paths}
+
+    def wait(self, timeout=None):
+        """
+        Waits until at least one watched file changes.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait.
+                                       Waits forever when None.
+
+        Returns:
+            set: The paths of the files that changed (empty on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+
+            changed = set()
+            for path, signature in self._signatures.items():
+                current = file_signature(path)
+                if current != signature:
+                    self._signatures[path] = current
+                    changed.add(path)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        """Releases the resources of the watcher."""
+
+
+class InotifyWatcher:
+    """
+    Detects changes to files with Linux inotify.
+
+    The nearest existing ancestor directory of each file is watched, so that
+    files (and directories) that are deleted, renamed or not created yet are
+    still noticed.
+    """
+
+    def __init__(self, paths):
+        """
+        Initializes the watcher.
+
+        Args:
+            paths (iterable): The paths of the files to watch.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._paths = {os.path.abspath(path) for path in paths}
+        self._watches = {}  # directory -> watch descriptor
+        self._directories = {}  # watch descriptor -> directory
+        self._refresh()
+
+    def _refresh(self):
+        """Watches the nearest existing directory above each file."""
+        needed = set()
+        for path in self._paths:
+            directory = os.path.dirname(path)
+            while not os.path.isdir(directory):
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+            needed.add(directory)
+
+        for directory in needed - set(self._watches):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _WATCH_MASK
+            )
+            if wd >= 0:
+                self._watches[directory] = wd
+                self._directories[wd] = directory
+        for directory in set(self._watches) - needed:
+            wd = self._watches.pop(directory)
+            self._directories.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _read_events(self):
+        """
+        Reads the pending events.
+
+        Returns:
+            set: The paths of the watched files affected by the events.
+        """
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return set()
+
+        touched = []
+        overflow = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                # The directory was removed: it is watched again below
+                del self._directories[wd]
+                self._watches.pop(directory, None)
+            touched.append(
+                os.path.join(directory, os.fsdecode(name)) if name else directory
+            )
+
+        self._refresh()
+        if overflow:
+            return set(self._paths)
+        # A file is affected by an event on itself or on a directory above it
+        return {
+            path
+            for path in self._paths
+            for touched_path in touched
+            if path == touched_path or path.startswith(touched_path + os.sep)
+        }
+
+    def wait(self, timeout=None):
+        """
+        Waits until at least one watched file changes.
+
+        Args:
+            timeout (float, optional): The maximum number of seconds to wait.
+                                       Waits forever when None.
+
+        Returns:
+            set: The paths of the files that changed (empty on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if ready:
+                changed = self._read_events()
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        """Releases the inotify instance."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(paths, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Creates the most efficient watcher available on this system.
+
+    Args:
+        paths (iterable): The paths of the files to watch.
+        poll_interval (float): The polling interval, if polling is used.
+
+    Returns:
+        InotifyWatcher or PollingWatcher: The watcher.
+    """
+    paths = list(paths)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            # No usable inotify (e.g. a libc without it): fall back to polling
+            pass
+    return PollingWatcher(paths, interval=poll_interval)
+
+
+def wait_for_batch(watcher, debounce=DEFAULT_DEBOUNCE, timeout=None):
+    """
+    Waits for a burst of changes to end.
+
+    Args:
+        watcher (InotifyWatcher or PollingWatcher): The watcher.
+        debounce (float): The number of quiet seconds that ends a burst.
+        timeout (float, optional): The maximum number of seconds to wait for
+                                   the first change. Waits forever when None.
+
+    Returns:
+        set: The paths of all the files changed during the burst (empty if
+             nothing changed before the timeout).
+    """
+    changed = watcher.wait(timeout)
+    while changed:
+        more = watcher.wait(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def is_update_complete(manifest_path):
+    """
+    Tells whether Steam has finished installing or updating a game.
+
+    Args:
+        manifest_path (str): The path to the appmanifest of the game.
+
+    Returns:
+        bool: False if the `StateFlags` of the manifest show an update in
+              progress. Manifests without `StateFlags` are considered
+              complete.
+    """
+    try:
+        fields = read_manifest_fields(manifest_path, keys=("StateFlags",))
+    except OSError:
+        return False
+    if not fields or "StateFlags" not in fields:
+        return True
+    try:
+        flags = int(fields["StateFlags"])
+    except ValueError:
+        return True
+    return bool(flags & _STATE_FULLY_INSTALLED) and not flags & _STATE_BUSY_MASK
+
+
+def _refresh_game_data(game_data):
+    """
+    Reads the new `buildid` of a game after its appmanifest changed.
+
+    Args:
+        game_data (dict): The game data, updated in place.
+    """
+    try:
+        fields = read_manifest_fields(game_data["manifest"], keys=("buildid",))
+    except OSError:
+        return
+    if fields:
+        game_data["buildid"] = fields.get("buildid")
+
+
+def watch_games(
+    games,
+    ledger,
+    policy=None,
+    on_results=None,
+    on_result=None,
+    debounce=DEFAULT_DEBOUNCE,
+    poll_interval=DEFAULT_POLL_INTERVAL,
+    stop=None,
+    watcher=None,
+    journal_dir=None,
+):
+    """
+    Watches the files of the configured games and re-applies their
+    configuration when they change.
+
+    Args:
+        games (dict): The games to watch, keyed by AppID (see
+                      `game_discovery.get_sim_racing_game_folders()`).
+        ledger (Ledger): The configuration ledger, used to skip the games
+                         that are still configured.
+        policy (DecisionPolicy, optional): Answers the decisions. Without a
+                                           policy, decisions are declined.
+        on_results (callable, optional): Called with the results dictionary
+                                         of each run.
+        on_result (callable, optional): Called with the result of each game
+                                        (see `config_orchestrator`).
+        debounce (float): The number of quiet seconds that ends a burst of
+                          changes.
+        poll_interval (float): The polling interval, if polling is used.
+        stop (threading.Event, optional): Stops watching when set. Without
+                                          it, the function runs until
+                                          interrupted.
+        watcher (optional): The watcher to use, instead of the most
+                            efficient one available.
+        journal_dir (str, optional): The journal folder of the transactions
+                                     (see `config_orchestrator`).
+
+    Returns:
+        int: The number of runs made.
+    """
+    owners = {}
+    for app_id, game_data in games.items():
+        configurator = ConfiguratorFactory.get_configurator(
+            app_id, game_data["name"], game_data["path"]
+        )
+        if not configurator or not configurator.managed_files():
+            continue
+        paths = list(configurator.managed_files())
+        if game_data.get("manifest"):
+            paths.append(game_data["manifest"])
+        for path in paths:
+            owners.setdefault(os.path.abspath(path), set()).add(app_id)
+
+    if not owners:
+        return 0
+
+    if watcher is None:
+        watcher = create_watcher(owners, poll_interval=poll_interval)
+    # With a stop event, wake up regularly to check it
+    timeout = None if stop is None else 0.5
+    runs = 0
+    try:
+        while stop is None or not stop.is_set():
+            changed = wait_for_batch(watcher, debounce=debounce, timeout=timeout)
+            affected = {app_id for path in changed for app_id in owners.get(path, ())}
+            for app_id in sorted(affected):
+                game_data = games[app_id]
+                manifest = game_data.get("manifest")
+                if manifest and os.path.abspath(manifest) in changed:
+                    if not is_update_complete(manifest):
+                        # Wait for Steam to finish: the manifest changes again
+                        continue
+                    _refresh_game_data(game_data)
+
+                current, _ = ledger.check(app_id, game_data)
+                if current:
+                    # Unchanged, or changed by the tool itself
+                    continue
+                results = config_orchestrator.check_and_configure_games(
+                    {app_id: game_data},
+                    policy=policy,
+                    interactive=False,
+                    ledger=ledger,
+                    on_result=on_result,
+                    journal_dir=journal_dir,
+                )
+                runs += 1
+                if on_results:
+                    on_results(results)
+    finally:
+        watcher.close()
+    return runs
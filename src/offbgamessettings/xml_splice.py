@@ -0,0 +1,200 @@
+"""
+Format-preserving XML patcher.
+
+Re-serializing a whole XML document with `ElementTree.write` to add a single
+node rewrites every byte of the file: comments are dropped, attributes and
+whitespace are normalized, and the diff against the vanilla file covers the
+whole document. This module adds child elements by splicing their text into
+the original bytes instead.
+
+How it works:
+1.  The root element is located after the prolog (XML declaration,
+    comments, DOCTYPE), and the byte offset of its closing tag is found.
+2.  The new elements are serialized and inserted just before the closing
+    tag, in a single splice:
+    -   when the closing tag is on its own line, each element gets its own
+        line, indented like the last child (or one level deeper than the
+        root when it has no children), with the file's line endings;
+    -   otherwise (single-line documents), they are inserted inline.
+    A self-closing root (`<devices />`) is expanded to hold the elements.
+3.  The result is parsed once to verify it: the document must be
+    well-formed and its root must end with the new elements.
+
+Every other byte of the file is kept as is. Documents that cannot be patched
+safely (for example an encoding that is not ASCII-compatible, such as
+UTF-16) raise `SpliceError`, so that the caller can fall back to a full
+rewrite.
+"""
+import codecs
+import re
+import xml.etree.ElementTree as ET
+
+# XML declaration, comments, processing instructions and DOCTYPE that may
+# precede the root element, followed by the root's start tag
+_PROLOG_ROOT_PATTERN = re.compile(
+    rb"(?:\s|<\?.*?\?>|<!--.*?-->|<!DOCTYPE[^>]*>)*"
+    rb"<(?P<name>[A-Za-z_][\w.:-]*)(?P<attributes>[^>]*?)(?P<empty>/?)>",
+    re.DOTALL,
+)
+_ENCODING_PATTERN = re.compile(rb"""^<\?xml[^>]*\bencoding\s*=\s*["']([\w.-]+)["']""")
+_INDENT_PATTERN = re.compile(rb"^[ \t]*")
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+_DEFAULT_INDENT_UNIT = b"  "
+
+
+class SpliceError(ValueError):
+    """Raised when a document cannot be patched without rewriting it."""
+
+
+def _document_encoding(content):
+    """
+    Determines the encoding of a document, which must be ASCII-compatible.
+
+    Args:
+        content (bytes): The document.
+
+    Returns:
+        str: The name of the encoding.
+
+    Raises:
+        SpliceError: If the encoding is unknown or not ASCII-compatible.
+    """
+    if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        raise SpliceError("UTF-16 documents are not supported.")
+    match = _ENCODING_PATTERN.match(
+        content[len(_UTF8_BOM) :] if content.startswith(_UTF8_BOM) else content
+    )
+    encoding = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        codec = codecs.lookup(encoding)
+    except LookupError:
+        raise SpliceError(f"Unknown encoding: {encoding}")
+    markup = "<>/=\"' \t\r\n"
+    if markup.encode(codec.name, errors="replace") != markup.encode("ascii"):
+        raise SpliceError(f"The {encoding} encoding is not ASCII-compatible.")
+    return codec.name
+
+
+def _line_ending(content):
+    return b"\r\n" if b"\r\n" in content else b"\n"
+
+
+def _indent_unit(content):
+    """Returns the first indentation found in the document."""
+    match = re.search(rb"\n([ \t]+)<", content)
+    return match.group(1) if match else _DEFAULT_INDENT_UNIT
+
+
+def _previous_line(content, line_start):
+    """
+    Returns the last non-blank line before the line starting at `line_start`.
+    """
+    end = line_start
+    while end > 0:
+        start = content.rfind(b"\n", 0, end - 1) + 1
+        line = content[start:end].rstrip(b"\r\n")
+        if line.strip():
+            return line
+        end = start
+    return b""
+
+
+def append_child(content, element):
+    """
+    Appends an element at the end of the root of an XML document, keeping
+    every other byte of the document.
+
+    Args:
+        content (bytes): The original document.
+        element (ET.Element): The element to add (without children text
+                              formatting: it is serialized on one line).
+
+    Returns:
+        tuple: `(new_content, root)`, the patched document (bytes) and its
+               parsed root element, from the verification parse.
+
+    Raises:
+        SpliceError: If the document cannot be patched safely.
+    """
+    return append_children(content, [element])
+
+
+def append_children(content, elements):
+    """
+    Appends several elements at the end of the root of an XML document, in
+    a single splice verified by a single parse.
+
+    Args:
+        content (bytes): The original document.
+        elements (list): The `ET.Element` objects to add, in order.
+
+    Returns:
+        tuple: `(new_content, root)`, the patched document (bytes) and its
+               parsed root element, from the verification parse.
+
+    Raises:
+        SpliceError: If the document cannot be patched safely.
+    """
+    if not elements:
+        raise SpliceError("No element to add.")
+    encoding = _document_encoding(content)
+    offset = len(_UTF8_BOM) if content.startswith(_UTF8_BOM) else 0
+    root_match = _PROLOG_ROOT_PATTERN.match(content, offset)
+    if not root_match:
+        raise SpliceError("The root element could not be found.")
+
+    children = [
+        ET.tostring(element, encoding="unicode").encode(encoding)
+        for element in elements
+    ]
+    name = root_match.group("name")
+
+    if root_match.group("empty"):
+        # `<root ... />` becomes `<root ...>child</root>`
+        start_tag = b"<" + name + root_match.group("attributes").rstrip() + b">"
+        new_content = (
+            content[: root_match.start("name") - 1]
+            + start_tag
+            + b"".join(children)
+            + b"</"
+            + name
+            + b">"
+            + content[root_match.end() :]
+        )
+    else:
+        close_pos = content.rfind(b"</" + name)
+        if close_pos < root_match.end() or not re.match(
+            rb"</" + re.escape(name) + rb"\s*>", content[close_pos:]
+        ):
+            raise SpliceError("The closing tag of the root element was not found.")
+
+        line_start = content.rfind(b"\n", 0, close_pos) + 1
+        closing_indent = content[line_start:close_pos]
+        if line_start > root_match.end() and not closing_indent.strip():
+            # The closing tag is on its own line: the child gets its own line
+            previous = _previous_line(content, line_start)
+            if previous.lstrip().startswith(b"<" + name):
+                indent = closing_indent + _indent_unit(content)
+            else:
+                indent = _INDENT_PATTERN.match(previous).group(0)
+            insert_pos = line_start
+            line_ending = _line_ending(content)
+            text = b"".join(indent + child + line_ending for child in children)
+        else:
+            insert_pos = close_pos
+            text = b"".join(children)
+        new_content = content[:insert_pos] + text + content[insert_pos:]
+
+    # Verify the result with a single parse
+    try:
+        root = ET.fromstring(new_content)
+    except ET.ParseError as e:
+        raise SpliceError(f"The patched document is not well-formed: {e}")
+    added = list(root)[-len(elements) :]
+    if len(added) != len(elements) or any(
+        child.tag != element.tag or child.attrib != element.attrib
+        for child, element in zip(added, elements)
+    ):
+        raise SpliceError("The patched document does not end with the new elements.")
+    return new_content, root
@@ -0,0 +1,180 @@
+import os
+import zlib
+
+import pytest
+
+from offbgamessettings import backup_store
+from offbgamessettings.backup_store import (
+    BackupIntegrityError,
+    BackupStore,
+    RetentionPolicy,
+    backup_file,
+    restore_backup,
+)
+
+
+def test_backup_file_nonexistent(tmp_path):
+    path = tmp_path / "does_not_exist.txt"
+    assert backup_file(str(path)) is False
+
+
+def test_backup_file_success(tmp_path):
+    f = tmp_path / "myfile.txt"
+    f.write_text("hello")
+
+    assert backup_file(str(f)) is True
+
+    store = BackupStore.for_file(str(f))
+    assert store.path == str(tmp_path / ".offb_settings_backups")
+    [entry] = store.entries(str(f))
+    assert entry["codec"] == "zlib"
+    with open(store.blob_path(entry["hash"], "zlib"), "rb") as blob:
+        assert zlib.decompress(blob.read()) == b"hello"
+
+
+def test_store_lives_in_steamapps(tmp_path):
+    f = tmp_path / "lib" / "steamapps" / "common" / "Game" / "config.xml"
+    f.parent.mkdir(parents=True)
+    f.write_text("<a/>")
+
+    store = BackupStore.for_file(str(f))
+    assert store.path == str(tmp_path / "lib" / "steamapps" / "offb_settings_backups")
+    assert store._key(str(f)) == "steamapps/common/Game/config.xml"
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    a = tmp_path / "a.json"
+    b = tmp_path / "b.json"
+    a.write_text("{}")
+    b.write_text("{}")
+
+    backup_file(str(a))
+    backup_file(str(b))
+    backup_file(str(a))
+
+    store = BackupStore.for_file(str(a))
+    objects = [
+        name
+        for _, _, files in os.walk(os.path.join(store.path, "objects"))
+        for name in files
+    ]
+    assert len(objects) == 1
+    # Backing up unchanged content does not add a version
+    assert len(store.entries(str(a))) == 1
+
+
+def test_original_survives_later_backups(tmp_path):
+    f = tmp_path / "Controller.JSON"
+    f.write_text("original")
+    backup_file(str(f))
+    f.write_text("modified once")
+    backup_file(str(f))
+    f.write_text("modified twice")
+
+    assert len(BackupStore.for_file(str(f)).entries(str(f))) == 2
+    assert restore_backup(str(f))["hash"] is not None
+    assert f.read_text() == "original"
+
+
+def test_restore_refuses_corrupt_blob(tmp_path):
+    f = tmp_path / "device_defines.xml"
+    f.write_text("original")
+    backup_file(str(f))
+    f.write_text("modified")
+
+    store = BackupStore.for_file(str(f))
+    [entry] = store.entries(str(f))
+    with open(store.blob_path(entry["hash"], entry["codec"]), "wb") as blob:
+        blob.write(b"bit rot")
+
+    with pytest.raises(BackupIntegrityError):
+        restore_backup(str(f))
+    assert f.read_text() == "modified"
+
+
+def test_restore_legacy_backup(tmp_path):
+    f = tmp_path / "Controller.JSON"
+    f.write_text("modified")
+    (tmp_path / "Controller.JSON.bak_offb_settings").write_text("original")
+
+    assert restore_backup(str(f)) is not None
+    assert f.read_text() == "original"
+    assert restore_backup(str(tmp_path / "missing.json")) is None
+
+
+def test_copy_file_falls_back_to_plain_copy(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    src.write_bytes(b"x" * 10000)
+
+    monkeypatch.setattr(backup_store, "_try_reflink", lambda src, dst: False)
+    monkeypatch.delattr(backup_store.os, "copy_file_range", raising=False)
+    assert backup_store.copy_file(str(src), str(tmp_path / "dst")) == "copy"
+    assert (tmp_path / "dst").read_bytes() == src.read_bytes()
+
+
+def _backup_versions(f, versions, monkeypatch, store=None):
+    """Backs up successive versions of a file, one second apart."""
+    store = store or BackupStore.for_file(str(f))
+    for i, text in enumerate(versions):
+        monkeypatch.setattr(backup_store.time, "time", lambda i=i: 1000.0 + i)
+        f.write_text(text)
+        store.backup(str(f))
+    return store
+
+
+def test_retention_keeps_original_and_evicts_blobs(tmp_path, monkeypatch):
+    f = tmp_path / "device_defines.xml"
+    store = BackupStore.for_file(str(f), retention=RetentionPolicy(max_generations=3))
+    _backup_versions(f, [f"v{i}" for i in range(6)], monkeypatch, store)
+
+    entries = store.entries(str(f))
+    assert [e["time"] for e in entries] == [1000.0, 1004.0, 1005.0]
+    # The blobs of the evicted generations were deleted
+    objects = [
+        name
+        for _, _, files in os.walk(os.path.join(store.path, "objects"))
+        for name in files
+    ]
+    assert sorted(objects) == sorted(e["hash"] + ".zz" for e in entries)
+
+
+def test_retention_by_age():
+    policy = RetentionPolicy(max_generations=None, max_age=10)
+    entries = [{"time": t} for t in (0, 5, 95, 100)]
+    kept, evicted = policy.split(entries, now=100)
+    assert kept == [entries[0], entries[2], entries[3]]
+    assert evicted == [entries[1]]
+
+
+def test_restore_point_in_time(tmp_path, monkeypatch):
+    f = tmp_path / "Controller.JSON"
+    _backup_versions(f, ["v0", "v1", "v2"], monkeypatch)
+    f.write_text("current")
+
+    assert restore_backup(str(f), timestamp=1001.5)["time"] == 1001.0
+    assert f.read_text() == "v1"
+    # Nothing was backed up that early
+    assert restore_backup(str(f), timestamp=999) is None
+    assert f.read_text() == "v1"
+    assert restore_backup(str(f))["time"] == 1000.0
+    assert f.read_text() == "v0"
+
+
+def test_lzma_codec_roundtrip(tmp_path):
+    f = tmp_path / "device_defines.xml"
+    f.write_text("<devices/>" * 100)
+    store = BackupStore.for_file(str(f), codec="lzma")
+    entry = store.backup(str(f))
+    assert entry["codec"] == "lzma"
+    assert entry["stored_size"] < entry["size"]
+
+    f.write_text("modified")
+    store.restore(str(f), entry)
+    assert f.read_text() == "<devices/>" * 100
+
+
+def test_parse_timestamp():
+    assert backup_store.parse_timestamp("1700000000") == 1700000000.0
+    assert backup_store.parse_timestamp("2024-05-01T00:00+00:00") == 1714521600.0
+    with pytest.raises(ValueError):
+        backup_store.parse_timestamp("yesterday")
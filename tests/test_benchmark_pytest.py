@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from offbgamessettings import benchmark
+from offbgamessettings.__main__ import main
+
+
+def test_percentiles():
+    assert benchmark.percentile([3, 1, 2], 50) == 2
+    assert benchmark.percentile([1, 2], 50) == 1.5
+    assert benchmark.percentile([5], 99) == 5
+    summary = benchmark.summarize([0.1, 0.2, 0.3, 0.4])
+    assert summary["runs"] == 4
+    assert summary["min"] == 0.1 and summary["max"] == 0.4
+    assert summary["p50"] == pytest.approx(0.25)
+
+
+def test_compare_reports_regressions_above_tolerance_and_noise():
+    def report(**medians):
+        return {
+            "results": {
+                "small": {phase: {"p50": p50} for phase, p50 in medians.items()}
+            }
+        }
+
+    baseline = report(discovery=0.010, check=0.100, apply=0.0001)
+    current = report(discovery=0.011, check=0.200, apply=0.0005, revert=1.0)
+    regressions = benchmark.compare(current, baseline, tolerance=0.25)
+    # The slower discovery is within the tolerance, the apply phase below the
+    # noise floor, and the revert phase has no baseline
+    assert [(r["phase"], r["ratio"]) for r in regressions] == [("check", 2.0)]
+
+
+def test_bench_command_saves_and_compares(tmp_path, monkeypatch, capsys):
+    runs = []
+
+    def fake_time_phases(root):
+        runs.append(root)
+        return dict.fromkeys(benchmark.PHASES, 0.01)
+
+    monkeypatch.setattr(benchmark, "time_phases", fake_time_phases)
+    saved = tmp_path / "baseline.json"
+    assert (
+        main(["bench", "--scale", "small", "--repeat", "2", "--save", str(saved)]) == 0
+    )
+    # One warm-up run, then the timed runs
+    assert len(runs) == 3
+    report = json.loads(saved.read_text())
+    assert report["results"]["small"]["check"]["p50"] == 0.01
+
+    report["results"]["small"]["check"]["p50"] = 0.001
+    saved.write_text(json.dumps(report))
+    assert (
+        main(["bench", "--scale", "small", "--repeat", "1", "--baseline", str(saved)])
+        == 1
+    )
+    assert "small / check" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("repeat", ["0", "-3"])
+def test_repeat_must_be_a_positive_integer(capsys, repeat):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["bench", "--repeat", repeat])
+    assert excinfo.value.code == 2
+    assert "must be a positive integer" in capsys.readouterr().err
@@ -1,11 +1,13 @@
 from types import SimpleNamespace
 
 from offbgamessettings import config_orchestrator
+from offbgamessettings.decisions import DecisionPolicy
 
 
 def test_check_and_configure_with_configurator(monkeypatch):
     fake_conf = SimpleNamespace(
-        check_and_configure=lambda: {"status": "MODIFIED", "logs": []}
+        get_pending_decisions=lambda: [],
+        check_and_configure=lambda: {"status": "MODIFIED", "logs": []},
     )
     monkeypatch.setattr(
         "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
@@ -30,7 +32,7 @@ def test_check_and_configure_no_configurator(monkeypatch):
 
 def test_revert_configurations(monkeypatch):
     fake_conf = SimpleNamespace(
-        revert_configuration=lambda: {"status": "RESTORED", "logs": []}
+        revert_configuration=lambda timestamp: {"status": "RESTORED", "logs": []}
     )
     monkeypatch.setattr(
         "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
@@ -40,3 +42,106 @@ def test_revert_configurations(monkeypatch):
     games = {"123": {"name": "GameX", "path": "/tmp/gamex"}}
     res = config_orchestrator.revert_configurations(games)
     assert res["GameX"]["status"] == "RESTORED"
+
+
+def test_check_and_configure_consumes_stream_lazily(monkeypatch):
+    events = []
+
+    def fake_get_configurator(app_id, name, path):
+        return SimpleNamespace(
+            get_pending_decisions=lambda: [],
+            check_and_configure=lambda: events.append(f"configure {name}")
+            or {"status": "OK", "logs": []},
+        )
+
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        fake_get_configurator,
+    )
+
+    def stream():
+        for app_id, name in (("1", "GameA"), ("2", "GameB")):
+            events.append(f"discover {name}")
+            yield app_id, {"name": name, "path": f"/tmp/{name}"}
+
+    res = config_orchestrator.check_and_configure_games(stream())
+    assert list(res) == ["GameA", "GameB"]
+    assert events == [
+        "discover GameA",
+        "configure GameA",
+        "discover GameB",
+        "configure GameB",
+    ]
+
+
+def test_concurrent_mode_keeps_order_and_isolates_errors(monkeypatch):
+    import threading
+    import time
+
+    def fake_get_configurator(app_id, name, path):
+        def check_and_configure():
+            # Later games finish first
+            time.sleep(0.01 * (5 - int(app_id)))
+            if app_id == "2":
+                raise RuntimeError("boom")
+            return {"status": "OK", "logs": [threading.current_thread().name]}
+
+        return SimpleNamespace(
+            get_pending_decisions=lambda: [], check_and_configure=check_and_configure
+        )
+
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        fake_get_configurator,
+    )
+
+    games = {str(i): {"name": f"Game{i}", "path": f"/tmp/{i}"} for i in range(5)}
+    res = config_orchestrator.check_and_configure_games(games, max_workers=4)
+
+    assert list(res) == [f"Game{i}" for i in range(5)]
+    assert res["Game2"]["status"] == "ERROR"
+    assert "boom" in res["Game2"]["logs"][0]["message"]
+    assert res["Game0"]["logs"][0].startswith("configurator")
+
+
+def test_decisions_are_collected_before_applying(monkeypatch):
+    events = []
+
+    class FakeConfigurator:
+        def __init__(self, app_id, name):
+            self.app_id = app_id
+            self.name = name
+            self.answers = None
+
+        def get_pending_decisions(self):
+            events.append(f"decisions {self.name}")
+            return [{"id": "flip", "prompt": "Flip?"}]
+
+        def set_answers(self, answers):
+            self.answers = answers
+
+        def check_and_configure(self):
+            events.append(f"apply {self.name}")
+            return {"status": "OK", "logs": [self.answers]}
+
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        lambda app_id, name, path: FakeConfigurator(app_id, name),
+    )
+    monkeypatch.setattr(
+        "offbgamessettings.console_ui.ask_user",
+        lambda prompt: (_ for _ in ()).throw(AssertionError("must not prompt")),
+    )
+
+    games = {"1": {"name": "GameA", "path": "/a"}, "2": {"name": "GameB", "path": "/b"}}
+    policy = DecisionPolicy(default=False, decisions={"2:flip": True})
+    res = config_orchestrator.check_and_configure_games(games, policy=policy)
+
+    assert events == [
+        "decisions GameA",
+        "decisions GameB",
+        "apply GameA",
+        "apply GameB",
+    ]
+    assert res["GameA"]["logs"] == [{"flip": False}]
+    assert res["GameB"]["logs"] == [{"flip": True}]
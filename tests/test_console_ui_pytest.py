@@ -1,3 +1,4 @@
+import io
 import re
 
 from offbgamessettings import console_ui
@@ -41,3 +42,95 @@ def test_prints_and_ask_user(capsys, monkeypatch):
     # ask_user
     monkeypatch.setattr("builtins.input", lambda prompt: "y")
     assert console_ui.ask_user("Proceed?") == "y"
+
+
+def test_ask_user_serializes_prompts(monkeypatch):
+    import threading
+    import time
+
+    events = []
+
+    def fake_input(prompt):
+        events.append(("start", prompt))
+        time.sleep(0.01)
+        events.append(("end", prompt))
+        return "n"
+
+    monkeypatch.setattr("builtins.input", fake_input)
+    threads = [
+        threading.Thread(target=console_ui.ask_user, args=(f"Q{i}",)) for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every question is answered before the next one is displayed
+    assert [kind for kind, _ in events] == ["start", "end"] * 3
+
+
+def test_print_plan(capsys):
+    console_ui.print_plan(
+        {
+            "GameA": {
+                "status": "PLANNED",
+                "operations": [
+                    {
+                        "op": "change_key",
+                        "path": "/x",
+                        "description": "Invert it.",
+                        "decision": "flip",
+                        "diff": "--- a/x\n+++ b/x\n@@ -1 +1 @@\n-1\n+-1\n",
+                    }
+                ],
+            },
+            "GameB": {"status": "OK", "operations": []},
+        }
+    )
+    clean = strip_ansi(capsys.readouterr().out)
+    assert "[change_key] Invert it. (requires confirmation)" in clean
+    assert "+-1" in clean
+    assert "GameB" not in clean
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_result_table_buffers_when_not_a_terminal():
+    stream = io.StringIO()
+    table = console_ui.ResultTable(["A much longer game name"], stream=stream)
+    table.add("GameA", "OK")
+    table.add("GameB", "WARNING")
+
+    # Nothing is written before the table is closed
+    assert stream.getvalue() == ""
+    table.close()
+    lines = stream.getvalue().splitlines()
+    assert lines[1:] == [
+        "--- Summary ---",
+        "Game                    | Status",
+        "------------------------|--------",
+        "GameA                   | OK",
+        "GameB                   | WARNING",
+    ]
+
+
+def test_result_table_rows_are_written_progressively_on_a_terminal():
+    stream = FakeTerminal()
+    table = console_ui.ResultTable(
+        ["Root"], title=None, label="Steam root", count_label="Games", stream=stream
+    )
+    table.add("/srv/a", "OK", 3)
+    assert "/srv/a     |     3 | " in strip_ansi(stream.getvalue())
+
+    # Rows are cut to the width of the terminal
+    narrow = FakeTerminal()
+    name = "A very long game name that does not fit"
+    table = console_ui.ResultTable([name], stream=narrow, width=30)
+    table.add(name, "NOT REQUIRED")
+    table.close()
+    lines = strip_ansi(narrow.getvalue()).splitlines()
+    assert all(len(line) <= 30 for line in lines)
+    assert lines[-1] == "A very long...  | NOT REQUIRED"
@@ -1,6 +1,7 @@
 import os
 import unittest
-from unittest.mock import mock_open, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, mock_open, patch
 
 from offbgamessettings.game_discovery import (
     find_steam_path,
@@ -29,7 +30,7 @@ MOCK_LIBRARYFOLDERS_VDF = """
 """
 
 # Sample ACF content for a sim racing game
-MOCK_APPMANIFEST_244210_ACF = """
+MOCK_APPMANIFEST_244210_ACF = b"""
 "AppState"
 {
     "appid"		"244210"
@@ -40,6 +41,21 @@ MOCK_APPMANIFEST_244210_ACF = """
 """
 
 
+def fake_scandir(names_by_path):
+    """Builds an `os.scandir` replacement listing the given file names."""
+
+    def scandir(path):
+        entries = [
+            SimpleNamespace(name=name, path=os.path.join(path, name))
+            for name in names_by_path.get(path, [])
+        ]
+        context = MagicMock()
+        context.__enter__.return_value = iter(entries)
+        return context
+
+    return scandir
+
+
 class TestSimRacingGames(unittest.TestCase):
     @patch("platform.system")
     @patch(
@@ -66,10 +82,10 @@ class TestSimRacingGames(unittest.TestCase):
     )
     @patch("os.path.exists")
     @patch("builtins.open", new_callable=mock_open)
-    @patch("os.listdir")
+    @patch("os.scandir")
     @patch("os.path.isdir")
     def test_get_sim_racing_game_folders(
-        self, mock_isdir, mock_listdir, mock_open_func, mock_exists, mock_find_steam
+        self, mock_isdir, mock_scandir, mock_open_func, mock_exists, mock_find_steam
     ):
         """Test the main function to find sim racing game folders."""
         # Setup mocks
@@ -90,12 +106,14 @@ class TestSimRacingGames(unittest.TestCase):
         ]
 
         # Mock directory listing to find the manifest only in the main library
-        def listdir_side_effect(path):
-            if path == os.path.join("/fake/steam", "steamapps"):
-                return ["appmanifest_244210.acf", "some_other_file.txt"]
-            return []
-
-        mock_listdir.side_effect = listdir_side_effect
+        mock_scandir.side_effect = fake_scandir(
+            {
+                os.path.join("/fake/steam", "steamapps"): [
+                    "appmanifest_244210.acf",
+                    "some_other_file.txt",
+                ]
+            }
+        )
 
         # Expected result
         expected_folders = {
@@ -104,6 +122,10 @@ class TestSimRacingGames(unittest.TestCase):
                 "path": os.path.join(
                     "/fake/steam", "steamapps", "common", "assettocorsa"
                 ),
+                "buildid": None,
+                "manifest": os.path.join(
+                    "/fake/steam", "steamapps", "appmanifest_244210.acf"
+                ),
             }
         }
 
@@ -119,8 +141,7 @@ class TestSimRacingGames(unittest.TestCase):
         )
         mock_open_func.assert_any_call(
             os.path.join("/fake/steam", "steamapps", "appmanifest_244210.acf"),
-            "r",
-            encoding="utf-8",
+            "rb",
         )
 
 
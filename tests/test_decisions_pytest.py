@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from offbgamessettings.__main__ import main
+from offbgamessettings.decisions import DecisionPolicy, resolve_decisions
+
+PENDING = [
+    {
+        "app_id": "365960",
+        "game_name": "rFactor 2",
+        "decision": {"id": "invert_steering_strength", "prompt": "Invert?"},
+    },
+    {
+        "app_id": "690790",
+        "game_name": "DiRT Rally 2.0",
+        "decision": {"id": "other", "prompt": "Other?"},
+    },
+]
+
+
+def test_policy_file_specificity(tmp_path):
+    policy_file = tmp_path / "policy.json"
+    policy_file.write_text(
+        json.dumps(
+            {
+                "default": "yes",
+                "decisions": {
+                    "invert_steering_strength": "no",
+                    "365960:invert_steering_strength": True,
+                    "690790": "no",
+                },
+            }
+        )
+    )
+    policy = DecisionPolicy.from_file(str(policy_file))
+
+    assert policy.answer("365960", "invert_steering_strength") is True
+    assert policy.answer("1234", "invert_steering_strength") is False
+    assert policy.answer("690790", "other") is False
+    assert policy.answer("1234", "anything") is True
+
+
+@pytest.mark.parametrize(
+    "policy", [{"default": "maybe"}, {"decisions": ["a"]}, {"decisions": None}]
+)
+def test_invalid_policy_file(tmp_path, policy):
+    policy_file = tmp_path / "policy.json"
+    policy_file.write_text(json.dumps(policy))
+    with pytest.raises(ValueError):
+        DecisionPolicy.from_file(str(policy_file))
+
+
+def test_invalid_policy_fails_the_run(tmp_path, capsys):
+    policy_file = tmp_path / "policy.json"
+    policy_file.write_text(json.dumps({"default": "maybe"}))
+    assert main(["--policy", str(policy_file)]) == 1
+    assert main(["--policy", str(tmp_path / "missing.json")]) == 1
+    assert "Invalid decision policy" in capsys.readouterr().out
+
+
+def test_resolve_with_policy_never_prompts(monkeypatch):
+    monkeypatch.setattr(
+        "offbgamessettings.console_ui.ask_user",
+        lambda prompt: pytest.fail("the policy path must not prompt"),
+    )
+    answers = resolve_decisions(PENDING, DecisionPolicy(default=True))
+    assert answers == {
+        "365960": {"invert_steering_strength": True},
+        "690790": {"other": True},
+    }
+
+
+def test_resolve_without_terminal_declines(monkeypatch):
+    monkeypatch.setattr(
+        "offbgamessettings.console_ui.ask_user",
+        lambda prompt: pytest.fail("must not prompt without a terminal"),
+    )
+    answers = resolve_decisions(PENDING, interactive=False)
+    assert answers["365960"]["invert_steering_strength"] is False
+
+
+def test_resolve_interactive_batch(monkeypatch, capsys):
+    prompts = []
+    monkeypatch.setattr(
+        "offbgamessettings.console_ui.ask_user",
+        lambda prompt: prompts.append(prompt) or "y",
+    )
+    answers = resolve_decisions(PENDING, interactive=True)
+
+    assert answers["690790"]["other"] is True
+    assert len(prompts) == 2
+    assert "Pending changes" in capsys.readouterr().out
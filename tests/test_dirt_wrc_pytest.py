@@ -64,3 +64,86 @@ def test_revert_no_backup(tmp_path):
         "NOT_FOUND",
         "NOT_FOUND",
     ) or isinstance(res["status"], str)
+
+
+def test_plan_does_not_write(tmp_path):
+    game_path = tmp_path / "game4"
+    dev_dir = game_path / "input" / "devices"
+    actionmaps = game_path / "input" / "actionmaps"
+    dev_dir.mkdir(parents=True)
+    actionmaps.mkdir(parents=True)
+    device_defines = dev_dir / "device_defines.xml"
+    create_device_defines(device_defines, with_device=False)
+    before = device_defines.read_bytes()
+
+    cfg = DirtWrcConfigurator("690790", "DiRT", str(game_path))
+    res = cfg.plan()
+
+    assert res["status"] == "PLANNED"
+    assert [op["op"] for op in res["operations"]] == ["insert_node", "create_file"]
+    assert "+" in res["operations"][0]["diff"]
+    assert "{FFB01209-0000-0000-0000-504944564944}" in res["operations"][0]["diff"]
+    # Headers are relative to the game folder
+    assert res["operations"][0]["diff"].startswith(
+        "--- a/input/devices/device_defines.xml\n"
+        "+++ b/input/devices/device_defines.xml\n"
+    )
+    assert res["operations"][1]["diff"].startswith(
+        "--- /dev/null\n+++ b/input/actionmaps/openffboard.xml\n"
+    )
+    # Nothing was written or backed up
+    assert device_defines.read_bytes() == before
+    assert sorted(p.name for p in dev_dir.iterdir()) == ["device_defines.xml"]
+    assert list(actionmaps.iterdir()) == []
+
+
+def test_probe_finds_device_without_parsing(tmp_path, monkeypatch):
+    game_path = tmp_path / "game5"
+    dev_dir = game_path / "input" / "devices"
+    actionmaps = game_path / "input" / "actionmaps"
+    dev_dir.mkdir(parents=True)
+    actionmaps.mkdir(parents=True)
+    device_defines = dev_dir / "device_defines.xml"
+    cfg = DirtWrcConfigurator("690790", "DiRT", str(game_path))
+
+    # A commented-out device does not count
+    device_defines.write_text(
+        '<devices>\n  <!-- <device id="{FFB01209-0000-0000-0000-504944564944}" /> -->'
+        "\n</devices>"
+    )
+    (actionmaps / "openffboard.xml").write_text("<existing />")
+    assert cfg.probe() is False
+
+    create_device_defines(device_defines, with_device=True)
+    assert cfg.probe() is True
+
+    def fail(*args):
+        raise AssertionError("the file must not be parsed")
+
+    monkeypatch.setattr(
+        "offbgamessettings.game_configurators.rules.ET.fromstring", fail
+    )
+    assert cfg.check_and_configure()["status"] == "OK"
+
+
+def test_configure_splices_device_into_original_file(tmp_path):
+    game_path = tmp_path / "game6"
+    dev_dir = game_path / "input" / "devices"
+    (game_path / "input" / "actionmaps").mkdir(parents=True)
+    dev_dir.mkdir(parents=True)
+    device_defines = dev_dir / "device_defines.xml"
+    vanilla = (
+        b'<?xml version="1.0" encoding="utf-8"?>\r\n'
+        b"<devices>\r\n"
+        b"    <!-- Logitech -->\r\n"
+        b'    <device id="{C24F046D-0000-0000-0000-504944564944}" name="g29" />\r\n'
+        b"</devices>\r\n"
+    )
+    device_defines.write_bytes(vanilla)
+
+    cfg = DirtWrcConfigurator("690790", "DiRT", str(game_path))
+    assert cfg.check_and_configure()["status"] == "MODIFIED"
+
+    lines = device_defines.read_bytes().split(b"\r\n")
+    assert b"\r\n".join(lines[:4] + lines[5:]) == vanilla
+    assert lines[4].startswith(b'    <device id="{FFB01209-')
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+import vdf
+
+from offbgamessettings import discovery_cache, game_discovery
+from offbgamessettings.__main__ import main
+from offbgamessettings.game_discovery import get_sim_racing_game_folders
+
+
+def make_steam(tmp_path):
+    steam = tmp_path / "Steam"
+    steamapps = steam / "steamapps"
+    (steamapps / "common" / "assettocorsa").mkdir(parents=True)
+    lib = {"libraryfolders": {"0": {"path": str(steam)}}}
+    (steamapps / "libraryfolders.vdf").write_text(vdf.dumps(lib))
+    acf = {
+        "AppState": {
+            "appid": "244210",
+            "name": "Assetto Corsa",
+            "installdir": "assettocorsa",
+        }
+    }
+    (steamapps / "appmanifest_244210.acf").write_text(vdf.dumps(acf))
+    return steam
+
+
+def test_cache_hit_does_not_read_manifests(tmp_path, monkeypatch):
+    steam = make_steam(tmp_path)
+    cache_path = str(tmp_path / "cache" / "discovery_cache.json")
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+
+    first = get_sim_racing_game_folders(cache_path=cache_path)
+    assert "244210" in first
+
+    def fail(*args, **kwargs):
+        raise AssertionError("manifest should be served from the cache")
+
+    monkeypatch.setattr(game_discovery, "_read_manifest", fail)
+    monkeypatch.setattr(game_discovery.os, "scandir", fail)
+    assert get_sim_racing_game_folders(cache_path=cache_path) == first
+
+
+def test_cache_invalidated_when_manifest_changes(tmp_path, monkeypatch):
+    steam = make_steam(tmp_path)
+    cache_path = str(tmp_path / "discovery_cache.json")
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+    get_sim_racing_game_folders(cache_path=cache_path)
+
+    manifest = steam / "steamapps" / "appmanifest_244210.acf"
+    acf = {
+        "AppState": {
+            "appid": "244210",
+            "name": "Assetto Corsa (updated)",
+            "installdir": "assettocorsa",
+        }
+    }
+    manifest.write_text(vdf.dumps(acf))
+
+    games = get_sim_racing_game_folders(cache_path=cache_path)
+    assert games["244210"]["name"] == "Assetto Corsa (updated)"
+
+
+def test_corrupt_or_outdated_cache_is_ignored(tmp_path, monkeypatch):
+    steam = make_steam(tmp_path)
+    cache_file = tmp_path / "discovery_cache.json"
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+
+    cache_file.write_text("{ not json")
+    assert "244210" in get_sim_racing_game_folders(cache_path=str(cache_file))
+
+    data = json.loads(cache_file.read_text())
+    assert data["version"] == discovery_cache.CACHE_VERSION
+
+    data["version"] = discovery_cache.CACHE_VERSION + 1
+    cache_file.write_text(json.dumps(data))
+    assert discovery_cache.load_cache(str(cache_file), str(steam))["libraries"] == {}
+
+
+def test_malformed_cache_entries_are_cache_misses(tmp_path, monkeypatch):
+    steam = make_steam(tmp_path)
+    cache_file = tmp_path / "discovery_cache.json"
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+    get_sim_racing_game_folders(cache_path=str(cache_file))
+    data = json.loads(cache_file.read_text())
+    (library,) = data["libraries"]
+    (manifest,) = data["libraries"][library]["manifests"]
+
+    for corrupt in (
+        lambda d: d["libraryfolders"].update(paths="not a list"),
+        lambda d: d["libraryfolders"].update(signature={"a": 1}),
+        lambda d: d["libraries"].update({library: ["not", "a", "dict"]}),
+        lambda d: d["libraries"][library].update(manifests=[1, 2]),
+        lambda d: d["libraries"][library]["manifests"].update({manifest: "x"}),
+        lambda d: d["libraries"][library]["manifests"][manifest].update(
+            details="not a dict"
+        ),
+    ):
+        broken = json.loads(json.dumps(data))
+        corrupt(broken)
+        cache_file.write_text(json.dumps(broken))
+        games = get_sim_racing_game_folders(cache_path=str(cache_file))
+        assert games["244210"]["name"] == "Assetto Corsa"
+
+
+def test_rebuild_cache_rescans(tmp_path, monkeypatch):
+    steam = make_steam(tmp_path)
+    cache_path = str(tmp_path / "discovery_cache.json")
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+    get_sim_racing_game_folders(cache_path=cache_path)
+
+    calls = []
+    original = game_discovery._read_manifest
+
+    def counting(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(game_discovery, "_read_manifest", counting)
+    get_sim_racing_game_folders(cache_path=cache_path, rebuild_cache=True)
+    assert len(calls) == 1
+
+
+def test_cache_saved_to_a_bare_file_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert discovery_cache.save_cache("cache.json", {"version": 1}) is True
+    assert json.loads((tmp_path / "cache.json").read_text()) == {"version": 1}
+
+
+def test_no_cache_conflicts_with_rebuild_cache(capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["--no-cache", "--rebuild-cache"])
+    assert excinfo.value.code == 2
+    assert "--rebuild-cache" in capsys.readouterr().err
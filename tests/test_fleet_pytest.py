@@ -0,0 +1,64 @@
+import json
+
+import pytest
+import vdf
+
+from offbgamessettings import fleet
+from offbgamessettings.__main__ import main
+from offbgamessettings.decisions import DecisionPolicy
+
+
+def make_rig(root, strength):
+    steamapps = root / "steamapps"
+    game = steamapps / "common" / "rFactor 2"
+    (game / "UserData" / "player").mkdir(parents=True)
+    (game / "UserData" / "player" / "Controller.JSON").write_text(
+        json.dumps({"Steering effects strength": strength})
+    )
+    lib = {"libraryfolders": {"0": {"path": str(root)}}}
+    (steamapps / "libraryfolders.vdf").write_text(vdf.dumps(lib))
+    acf = {
+        "AppState": {"appid": "365960", "name": "rFactor 2", "installdir": "rFactor 2"}
+    }
+    (steamapps / "appmanifest_365960.acf").write_text(vdf.dumps(acf))
+    return game / "UserData" / "player" / "Controller.JSON"
+
+
+def test_run_fleet_merges_reports_and_isolates_errors(tmp_path):
+    controller_a = make_rig(tmp_path / "rigA", 8000)
+    make_rig(tmp_path / "rigB", -8000)
+    missing = tmp_path / "rigC"
+
+    roots = [str(tmp_path / "rigA"), str(tmp_path / "rigB"), str(missing)]
+    report = fleet.run_fleet(roots, policy=DecisionPolicy(default=True), max_workers=2)
+
+    assert list(report) == roots
+    assert report[roots[0]]["status"] == "MODIFIED"
+    assert report[roots[1]]["status"] == "OK"
+    assert report[roots[2]]["status"] == "ERROR"
+    assert report[roots[2]]["error"]
+    assert json.loads(controller_a.read_text())["Steering effects strength"] == -8000
+
+
+def test_run_fleet_without_policy_declines(tmp_path):
+    controller = make_rig(tmp_path / "rig", 8000)
+    report = fleet.run_fleet([str(tmp_path / "rig")], max_workers=1)
+    assert report[str(tmp_path / "rig")]["status"] == "OK"
+    assert json.loads(controller.read_text())["Steering effects strength"] == 8000
+
+
+def test_aggregate_status():
+    assert fleet.aggregate_status({}) == "NOT FOUND"
+    assert (
+        fleet.aggregate_status({"A": {"status": "OK"}, "B": {"status": "ERROR"}})
+        == "ERROR"
+    )
+
+
+@pytest.mark.parametrize("jobs", ["0", "-1", "two"])
+def test_jobs_must_be_a_positive_integer(tmp_path, capsys, jobs):
+    for argv in (["fleet", "--root", str(tmp_path)], []):
+        with pytest.raises(SystemExit) as excinfo:
+            main(argv + ["--yes", "-j", jobs])
+        assert excinfo.value.code == 2
+        assert "must be a positive integer" in capsys.readouterr().err
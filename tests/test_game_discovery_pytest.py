@@ -2,7 +2,11 @@ import os
 
 import vdf
 
-from offbgamessettings.game_discovery import get_sim_racing_game_folders
+from offbgamessettings.game_discovery import (
+    get_sim_racing_game_folders,
+    iter_sim_racing_games,
+    read_manifest_fields,
+)
 
 
 def write_vdf_library(path, libraries):
@@ -67,3 +71,114 @@ def test_get_sim_racing_game_folders_malformed_vdf(tmp_path, monkeypatch):
     )
 
     assert get_sim_racing_game_folders() == {}
+
+
+def test_parallel_scan_matches_sequential_order(tmp_path, monkeypatch):
+    steam = tmp_path / "Steam"
+    libraries = [steam] + [tmp_path / f"Library{i}" for i in range(3)]
+    games = [
+        ("244210", "Assetto Corsa", "assettocorsa"),
+        ("805550", "Assetto Corsa Competizione", "acc"),
+        ("365960", "rFactor 2", "rFactor 2"),
+        ("690790", "DiRT Rally 2.0", "DiRT Rally 2.0"),
+    ]
+    for library, (appid, name, installdir) in zip(libraries, games):
+        steamapps = library / "steamapps"
+        (steamapps / "common" / installdir).mkdir(parents=True)
+        write_acf(steamapps / f"appmanifest_{appid}.acf", appid, name, installdir)
+    write_vdf_library(steam / "steamapps" / "libraryfolders.vdf", libraries)
+
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+
+    sequential = get_sim_racing_game_folders(max_workers=1)
+    parallel = get_sim_racing_game_folders(max_workers=4)
+
+    assert parallel == sequential
+    assert list(parallel) == [appid for appid, _, _ in games]
+
+    stream = iter_sim_racing_games(max_workers=4)
+    app_id, game = next(stream)
+    assert app_id == "244210"
+    assert game == parallel["244210"]
+    assert [app_id for app_id, _ in stream] == [appid for appid, _, _ in games[1:]]
+
+
+def test_game_in_several_libraries_last_library_wins(tmp_path, monkeypatch):
+    steam = tmp_path / "Steam"
+    libraries = [steam, tmp_path / "Library1", tmp_path / "Library2"]
+    for library in libraries:
+        (library / "steamapps" / "common" / "rFactor 2").mkdir(parents=True)
+    write_vdf_library(steam / "steamapps" / "libraryfolders.vdf", libraries)
+    # Stale manifest in the first library, current one in the second
+    for library in libraries[:2]:
+        write_acf(
+            library / "steamapps" / "appmanifest_365960.acf",
+            "365960",
+            "rFactor 2",
+            "rFactor 2",
+        )
+    (steam / "steamapps" / "common" / "assettocorsa").mkdir()
+    write_acf(
+        steam / "steamapps" / "appmanifest_244210.acf",
+        "244210",
+        "Assetto Corsa",
+        "assettocorsa",
+    )
+    # A manifest whose game folder is missing does not win
+    write_acf(
+        libraries[2] / "steamapps" / "appmanifest_244210.acf",
+        "244210",
+        "Assetto Corsa",
+        "missing",
+    )
+    monkeypatch.setattr(
+        "offbgamessettings.game_discovery.find_steam_path", lambda: str(steam)
+    )
+
+    for max_workers in (1, 4):
+        games = list(iter_sim_racing_games(max_workers=max_workers))
+        assert sorted(app_id for app_id, _ in games) == ["244210", "365960"]
+        paths = {app_id: game["path"] for app_id, game in games}
+        assert paths["365960"].startswith(str(libraries[1]))
+        assert paths["244210"].startswith(str(steam))
+
+
+def test_read_manifest_fields_skips_nested_blocks(tmp_path):
+    manifest = tmp_path / "appmanifest_365960.acf"
+    manifest.write_bytes(
+        b'"AppState"\n{\n'
+        b'\t"appid"\t\t"365960"\n'
+        b'\t"InstalledDepots"\n\t{\n'
+        b'\t\t"365961" { "manifest" "1" "name" "depot" }\n'
+        b"\t}\n"
+        b'\t"name"\t\t"rFactor 2"\n'
+        b'\t"StateFlags"\t\t"4"\n'
+        b'\t"installdir"\t\t"rFactor 2"\n'
+        b'\t"buildid"\t\t"1234"\n'
+        # Everything after this point must not be read
+        b'\t"UserConfig" { "unterminated\n'
+    )
+
+    assert read_manifest_fields(str(manifest)) == {
+        "name": "rFactor 2",
+        "StateFlags": "4",
+        "installdir": "rFactor 2",
+        "buildid": "1234",
+    }
+    assert read_manifest_fields(str(manifest), keys=("name",)) == {"name": "rFactor 2"}
+
+
+def test_read_manifest_fields_non_utf8_and_malformed(tmp_path):
+    manifest = tmp_path / "appmanifest_244210.acf"
+    manifest.write_bytes(b'"AppState" { "name" "Caf\xe9 Racer" "installdir" "cafe" }\n')
+    fields = read_manifest_fields(str(manifest))
+    assert fields["name"].startswith("Caf")
+    assert fields["installdir"] == "cafe"
+
+    manifest.write_bytes(b'"AppState"\n{\n"name" "truncated')
+    assert read_manifest_fields(str(manifest)) is None
+
+    manifest.write_bytes(b'"OtherRoot" { "name" "x" }')
+    assert read_manifest_fields(str(manifest)) is None
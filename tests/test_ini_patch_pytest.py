@@ -0,0 +1,57 @@
+import pytest
+
+from offbgamessettings.ini_patch import IniPatchError, patch_values, read_values
+
+DOCUMENT = (
+    b"\xef\xbb\xbf; global settings\r\n"
+    b"version = 3\r\n"
+    b"\r\n"
+    b"[Input]\r\n"
+    b"Device=keyboard ; default\r\n"
+    b"ForceFeedback = 1\r\n"
+    b"\r\n"
+    b"[Graphics]\r\n"
+    b"Width=1920\r\n"
+)
+
+
+def test_read_values_case_insensitively():
+    values = read_values(
+        DOCUMENT,
+        [(None, "version"), ("input", "forcefeedback"), ("Input", "missing")],
+    )
+    assert values == {(None, "version"): "3", ("input", "forcefeedback"): "1"}
+
+
+def test_patch_keeps_every_other_byte():
+    patched = patch_values(DOCUMENT, {("Input", "ForceFeedback"): 0})
+    assert patched == DOCUMENT.replace(b"ForceFeedback = 1", b"ForceFeedback = 0")
+
+
+def test_patch_adds_missing_keys_and_sections():
+    patched = patch_values(
+        DOCUMENT,
+        {
+            ("Input", "Steering"): "wheel",
+            ("Graphics", "Height"): 1080,
+            ("Audio", "Volume"): 80,
+        },
+    )
+    assert patched == DOCUMENT.replace(
+        b"ForceFeedback = 1\r\n", b"ForceFeedback = 1\r\nSteering=wheel\r\n"
+    ).replace(
+        b"Width=1920\r\n",
+        b"Width=1920\r\nHeight=1080\r\n\r\n[Audio]\r\nVolume=80\r\n",
+    )
+
+
+def test_patch_empty_and_unterminated_documents():
+    assert patch_values(b"", {("Input", "Device"): "wheel"}) == (
+        b"[Input]\nDevice=wheel\n"
+    )
+    assert patch_values(b"[Input]\nA=1", {("Input", "B"): 2}) == b"[Input]\nA=1\nB=2\n"
+
+
+def test_invalid_documents_are_rejected():
+    with pytest.raises(IniPatchError):
+        read_values(b"[Input]\nDevice=\xff\n", [("Input", "Device")])
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from offbgamessettings.json_patch import (
+    JSONPatchError,
+    find_spans,
+    patch_values,
+    read_values,
+)
+
+DOCUMENT = (
+    b'{\r\n  "Steering effects strength":8000 ,\r\n'
+    b'  "name": "a \\" } [ quote",\r\n'
+    b'  "devices": [ {"gain": 1.50}, {"gain": 2e0, "extra": [1, {"gain": 0}]} ],\r\n'
+    b'  "flag": true\r\n}'
+)
+
+
+def test_read_values_of_several_paths():
+    values = read_values(
+        DOCUMENT,
+        [("Steering effects strength",), ("devices", 1, "gain"), ("missing",)],
+    )
+    assert values == {("Steering effects strength",): 8000, ("devices", 1, "gain"): 2.0}
+
+
+def test_patch_keeps_every_other_byte():
+    patched = patch_values(
+        DOCUMENT,
+        {("Steering effects strength",): -8000, ("devices", 0, "gain"): 0.5},
+    )
+    assert patched == DOCUMENT.replace(b":8000 ,", b":-8000 ,").replace(b"1.50", b"0.5")
+    assert json.loads(patched)["devices"][1]["extra"] == [1, {"gain": 0}]
+
+
+def test_duplicated_key_last_one_wins():
+    content = b'{"a": 1, "a": 2}'
+    assert find_spans(content, [("a",)]) == {("a",): (14, 15)}
+    assert patch_values(content, {("a",): 3}) == b'{"a": 1, "a": 3}'
+
+
+def test_errors():
+    with pytest.raises(JSONPatchError):
+        patch_values(DOCUMENT, {("missing",): 1})
+    for malformed in (b'{"a": 1,}', b'{"a" 1}', b"[1, 2", b'{"a": 1} x'):
+        with pytest.raises(JSONPatchError):
+            find_spans(malformed, [("a",)])
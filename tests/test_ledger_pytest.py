@@ -0,0 +1,121 @@
+import json
+import os
+from types import SimpleNamespace
+
+from offbgamessettings import __main__ as cli
+from offbgamessettings import config_orchestrator, ledger
+
+
+def _write_manifest(path, buildid):
+    path.write_text(
+        '"AppState"\n{\n\t"appid"\t\t"365960"\n\t"name"\t\t"rFactor 2"\n'
+        f'\t"installdir"\t\t"rFactor 2"\n\t"buildid"\t\t"{buildid}"\n}}\n'
+    )
+
+
+def _setup(tmp_path, buildid="100"):
+    manifest = tmp_path / "appmanifest_365960.acf"
+    _write_manifest(manifest, buildid)
+    managed = tmp_path / "Controller.JSON"
+    managed.write_text(json.dumps({"Steering effects strength": -8000}))
+    game_data = {
+        "name": "rFactor 2",
+        "path": str(tmp_path / "rf2"),
+        "buildid": buildid,
+        "manifest": str(manifest),
+    }
+    book = ledger.Ledger(str(tmp_path / "ledger.json"))
+    book.record("365960", game_data, [str(managed)], True, "MODIFIED")
+    return book, game_data, manifest, managed
+
+
+def test_recorded_game_is_current_after_reload(tmp_path):
+    book, game_data, _, _ = _setup(tmp_path)
+    book.save()
+
+    reloaded = ledger.Ledger.load(book.path)
+    assert reloaded.check("365960", game_data) == (True, None)
+    assert reloaded.check("365960") == (True, None)
+    assert reloaded.check("244210")[0] is False
+
+
+def test_buildid_change_requeues_game(tmp_path):
+    book, game_data, manifest, _ = _setup(tmp_path)
+
+    _write_manifest(manifest, "101")
+    current, reason = book.check("365960")
+    assert not current
+    assert "101" in reason
+    assert not book.check("365960", dict(game_data, buildid="101"))[0]
+
+
+def test_modified_file_requeues_game(tmp_path):
+    book, game_data, _, managed = _setup(tmp_path)
+
+    managed.write_text(json.dumps({"Steering effects strength": 8000}))
+    current, reason = book.check("365960", game_data)
+    assert not current
+    assert "Controller.JSON" in reason
+
+
+def test_touched_but_identical_file_is_current(tmp_path):
+    book, game_data, _, managed = _setup(tmp_path)
+
+    stat = os.stat(managed)
+    os.utime(managed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert book.check("365960", game_data) == (True, None)
+
+
+def test_status_reports_unconfigured_games(tmp_path):
+    book, _, _, _ = _setup(tmp_path)
+    book.record(
+        "690790",
+        {"name": "DiRT Rally 2.0", "path": str(tmp_path / "dirt")},
+        [str(tmp_path / "missing.xml")],
+        False,
+        "ERROR",
+    )
+
+    report = book.status()
+    assert list(report) == ["690790", "365960"]
+    assert report["365960"]["configured"]
+    assert not report["690790"]["configured"]
+    assert "ERROR" in report["690790"]["reason"]
+
+
+def test_orchestrator_skips_current_games(tmp_path, monkeypatch):
+    book, game_data, _, managed = _setup(tmp_path)
+    calls = []
+    fake_conf = SimpleNamespace(
+        get_pending_decisions=lambda: [],
+        managed_files=lambda: [str(managed)],
+        probe=lambda: True,
+        check_and_configure=lambda: calls.append("configure")
+        or {"status": "OK", "logs": []},
+    )
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        lambda app_id, name, path: fake_conf,
+    )
+
+    games = {"365960": game_data}
+    res = config_orchestrator.check_and_configure_games(games, ledger=book)
+    assert res["rFactor 2"] == config_orchestrator.LEDGER_SKIPPED_RESULT
+    assert calls == []
+
+    managed.write_text("{}")
+    res = config_orchestrator.check_and_configure_games(games, ledger=book)
+    assert res["rFactor 2"]["status"] == "OK"
+    assert calls == ["configure"]
+    assert book.check("365960", game_data) == (True, None)
+
+
+def test_status_command_exit_codes(tmp_path, monkeypatch):
+    book, _, _, managed = _setup(tmp_path)
+    monkeypatch.setattr(ledger, "default_ledger_path", lambda: book.path)
+
+    assert cli.main(["status"]) == 2
+    book.save()
+    assert cli.main(["status"]) == 0
+    managed.write_text("{}")
+    assert cli.main(["status"]) == 1
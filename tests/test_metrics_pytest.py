@@ -0,0 +1,111 @@
+import os
+import stat
+
+import pytest
+
+from offbgamessettings import config_orchestrator, utils
+from offbgamessettings.__main__ import main
+from offbgamessettings.decisions import DecisionPolicy
+from offbgamessettings.game_configurators.factory import ConfiguratorFactory
+from offbgamessettings.game_discovery import iter_sim_racing_games
+from offbgamessettings.metrics import Histogram, MetricsCollector
+from offbgamessettings.results import GameResult
+from offbgamessettings.synthetic_steam import build_steam_tree
+from offbgamessettings.utils import count_io
+
+
+def samples(text):
+    """Parses the samples of an exposition text into {name{labels}: value}."""
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value)
+
+    lines = histogram.render("x")
+    assert lines == [
+        'x_bucket{le="0.1"} 1',
+        'x_bucket{le="1"} 3',
+        'x_bucket{le="+Inf"} 4',
+        "x_sum 4.25",
+        "x_count 4",
+    ]
+
+
+def test_status_gauges_labels_and_io_deltas():
+    count_io("written", 100)
+    metrics = MetricsCollector("configure")
+    game = {"name": 'Say "hi"\\', "path": "/games/x"}
+    metrics.on_result("1", game, GameResult("MODIFIED"), {"configure": 0.02})
+    metrics.on_result("2", {"name": "B", "path": "/b"}, GameResult("OK"), {})
+    count_io("written", 42)
+    count_io("backed_up", 7)
+
+    values = samples(metrics.render())
+    status = 'offbgamessettings_game_status{app_id="1",game="Say \\"hi\\"\\\\"'
+    assert values[status + ',status="MODIFIED"}'] == 1
+    assert values[status + ',status="OK"}'] == 0
+    assert values['offbgamessettings_games{status="MODIFIED"}'] == 1
+    assert values['offbgamessettings_games{status="OK"}'] == 1
+    assert values["offbgamessettings_configure_duration_seconds_count"] == 1
+    assert values["offbgamessettings_written_bytes"] == 42
+    assert values["offbgamessettings_backed_up_bytes"] == 7
+    assert 'offbgamessettings_last_run_timestamp_seconds{action="configure"}' in values
+
+
+def test_metrics_of_a_run(tmp_path):
+    root = str(tmp_path / "Steam")
+    build_steam_tree(root, libraries=1, manifests=10, seed=4)
+    metrics = MetricsCollector("configure")
+    games = dict(metrics.timed_discovery(iter_sim_racing_games(steam_path=root)))
+    config_orchestrator.check_and_configure_games(
+        games,
+        policy=DecisionPolicy(default=True),
+        interactive=False,
+        on_result=metrics.on_result,
+    )
+    path = tmp_path / "metrics.prom"
+    metrics.write(str(path))
+
+    values = samples(path.read_text(encoding="utf-8"))
+    assert values["offbgamessettings_discovery_duration_seconds_count"] == 1
+    # Only the games with a configurator are timed
+    modified = values['offbgamessettings_games{status="MODIFIED"}']
+    assert modified >= 1
+    assert values["offbgamessettings_configure_duration_seconds_count"] == modified
+    assert values["offbgamessettings_backed_up_bytes"] > 0
+    # Only the game files count, not the ledger, backups or metrics file
+    game_files = []
+    for app_id, game in games.items():
+        configurator = ConfiguratorFactory.get_configurator(
+            app_id, game["name"], game["path"]
+        )
+        if configurator:
+            game_files.extend(configurator.managed_files())
+    assert values["offbgamessettings_written_bytes"] == sum(
+        os.path.getsize(path) for path in game_files
+    )
+    assert sorted(os.listdir(tmp_path)) == ["Steam", "metrics.prom"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_metrics_file_is_readable_by_the_collector(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_umask", 0o022)
+    path = tmp_path / "metrics.prom"
+    MetricsCollector("configure").write(str(path))
+    mode = stat.S_IMODE(path.stat().st_mode)
+    assert mode & stat.S_IRGRP and mode & stat.S_IROTH
+
+
+def test_metrics_file_is_local_only(tmp_path, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["fleet", "--root", str(tmp_path), "--metrics-file", "x.prom"])
+    assert excinfo.value.code == 2
+    assert "--metrics-file" in capsys.readouterr().err
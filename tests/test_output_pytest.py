@@ -0,0 +1,125 @@
+import io
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from offbgamessettings import config_orchestrator
+from offbgamessettings.output import RecordWriter, build_record
+from offbgamessettings.results import GameResult, LogEntry
+
+
+def test_ndjson_and_json_streams():
+    records = [{"app_id": "1"}, {"app_id": "2"}]
+
+    stream = io.StringIO()
+    writer = RecordWriter(stream, "ndjson")
+    for record in records:
+        writer.write(record)
+    writer.close()
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == records
+
+    stream = io.StringIO()
+    writer = RecordWriter(stream, "json")
+    writer.write(records[0])
+    # The first record is available before the end of the run
+    assert stream.getvalue() == '[\n{"app_id": "1"}'
+    writer.write(records[1])
+    writer.close()
+    assert json.loads(stream.getvalue()) == records
+
+    stream = io.StringIO()
+    RecordWriter(stream, "json").close()
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_build_record_from_a_game_result():
+    result = GameResult("MODIFIED", [LogEntry("MODIFIED", "{} created.", "a.xml")])
+    record = build_record(
+        "690790",
+        {"name": "DiRT", "path": "/games/dirt"},
+        result,
+        "configure",
+        {"configure": 0.5},
+    )
+    assert json.loads(json.dumps(record)) == {
+        "app_id": "690790",
+        "name": "DiRT",
+        "path": "/games/dirt",
+        "action": "configure",
+        "status": "MODIFIED",
+        "logs": [{"status": "MODIFIED", "message": "a.xml created."}],
+        "timings": {"configure": 0.5},
+    }
+
+
+def test_records_are_written_as_games_finish(monkeypatch):
+    events = []
+    stream = io.StringIO()
+    writer = RecordWriter(stream, "ndjson")
+
+    def fake_get_configurator(app_id, name, path):
+        if name == "GameC":
+            return None
+        return SimpleNamespace(
+            get_pending_decisions=lambda: [],
+            check_and_configure=lambda: {"status": "OK", "logs": []},
+        )
+
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        fake_get_configurator,
+    )
+
+    def stream_games():
+        for app_id, name in (("1", "GameA"), ("2", "GameB"), ("3", "GameC")):
+            # Records of the previous games are already written
+            events.append(len(stream.getvalue().splitlines()))
+            yield app_id, {"name": name, "path": f"/tmp/{name}"}
+
+    config_orchestrator.check_and_configure_games(
+        stream_games(), on_result=writer.result_callback("configure")
+    )
+    assert events == [0, 1, 2]
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(r["app_id"], r["status"]) for r in records] == [
+        ("1", "OK"),
+        ("2", "OK"),
+        ("3", "NOT REQUIRED"),
+    ]
+    assert set(records[0]["timings"]) == {"decisions", "configure"}
+    assert records[2]["timings"] == {}
+
+
+def test_callbacks_are_serialized_in_concurrent_mode(monkeypatch):
+    barrier = threading.Barrier(4)
+    active = []
+
+    def configure():
+        barrier.wait(timeout=5)
+        return {"status": "OK", "logs": []}
+
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        lambda app_id, name, path: SimpleNamespace(
+            get_pending_decisions=lambda: [], check_and_configure=configure
+        ),
+    )
+
+    def on_result(app_id, game_data, result, timings):
+        if active:
+            overlaps.append(app_id)
+        active.append(app_id)
+        time.sleep(0.01)
+        active.remove(app_id)
+        seen.append(app_id)
+
+    seen = []
+    overlaps = []
+    games = {str(i): {"name": f"Game{i}", "path": "/tmp"} for i in range(4)}
+    config_orchestrator.check_and_configure_games(
+        games, max_workers=4, on_result=on_result
+    )
+    assert sorted(seen) == ["0", "1", "2", "3"]
+    assert overlaps == []
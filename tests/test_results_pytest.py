@@ -0,0 +1,60 @@
+import json
+import pickle
+
+from offbgamessettings.results import GameResult, LogEntry, Status
+
+
+class CountingParam:
+    def __init__(self):
+        self.formatted = 0
+
+    def __format__(self, spec):
+        self.formatted += 1
+        return "x"
+
+
+def test_status_behaves_like_its_string():
+    assert Status.NOT_FOUND == "NOT FOUND"
+    assert f"[{Status.OK}]" == "[OK]"
+    assert {"OK": 1}[Status.OK] == 1
+    assert json.dumps({"status": Status.MODIFIED}) == '{"status": "MODIFIED"}'
+
+
+def test_message_is_formatted_lazily():
+    param = CountingParam()
+    entry = LogEntry("INFO", "Backup of {} created.", param)
+    assert param.formatted == 0
+    assert entry["status"] is Status.INFO
+    assert param.formatted == 0
+    assert entry.message == "Backup of x created."
+    assert param.formatted == 1
+    # A plain message is never formatted
+    assert LogEntry("OK", "{FFB01209}").message == "{FFB01209}"
+
+
+def test_compatibility_with_the_dict_shape():
+    result = GameResult(
+        "MODIFIED",
+        [LogEntry("MODIFIED", "{} added to {}.", "Device", "devices.xml")],
+    )
+    expected = {
+        "status": "MODIFIED",
+        "logs": [{"status": "MODIFIED", "message": "Device added to devices.xml."}],
+    }
+    assert result == expected
+    assert result.to_dict() == expected
+    assert type(result.to_dict()["status"]) is str
+    assert "operations" not in result
+    assert GameResult("PLANNED", operations=[]).get("operations") == []
+
+
+def test_pickled_entries_share_their_template():
+    entries = [LogEntry("OK", "{} already exists.", f"file{i}") for i in range(3)]
+    copies = pickle.loads(pickle.dumps(entries))
+    assert [entry.message for entry in copies] == [
+        "file0 already exists.",
+        "file1 already exists.",
+        "file2 already exists.",
+    ]
+    assert copies[0].template is copies[2].template is entries[0].template
+    assert not hasattr(copies[0], "__dict__")
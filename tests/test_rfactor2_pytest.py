@@ -48,3 +48,120 @@ def test_check_and_configure_missing_file(tmp_path):
     cfg = Rfactor2Configurator("365960", "rFactor 2", str(tmp_path))
     res = cfg.check_and_configure()
     assert res["status"] == "WARNING"
+
+
+def test_pending_decision_and_collected_answer(tmp_path, monkeypatch):
+    game_path = tmp_path / "rf3"
+    controller_dir = game_path / "UserData" / "player"
+    controller_dir.mkdir(parents=True)
+    controller = controller_dir / "Controller.JSON"
+    controller.write_text(json.dumps({"Steering effects strength": 8000}))
+
+    monkeypatch.setattr(
+        "offbgamessettings.console_ui.ask_user",
+        lambda prompt: (_ for _ in ()).throw(AssertionError("must not prompt")),
+    )
+
+    cfg = Rfactor2Configurator("365960", "rFactor 2", str(game_path))
+    decisions = cfg.get_pending_decisions()
+    assert [d["id"] for d in decisions] == ["invert_steering_strength"]
+    # Listing the decisions must not modify anything
+    assert json.loads(controller.read_text())["Steering effects strength"] == 8000
+
+    cfg.set_answers({"invert_steering_strength": True})
+    res = cfg.check_and_configure()
+    assert res["status"] == "MODIFIED"
+    assert json.loads(controller.read_text())["Steering effects strength"] == -8000
+    assert (
+        Rfactor2Configurator("365960", "rF2", str(game_path)).get_pending_decisions()
+        == []
+    )
+
+
+def test_plan_reports_change_without_writing(tmp_path):
+    game_path = tmp_path / "rf4"
+    controller_dir = game_path / "UserData" / "player"
+    controller_dir.mkdir(parents=True)
+    controller = controller_dir / "Controller.JSON"
+    controller.write_text(json.dumps({"Steering effects strength": 8000}))
+
+    res = Rfactor2Configurator("365960", "rFactor 2", str(game_path)).plan()
+
+    assert res["status"] == "PLANNED"
+    (operation,) = res["operations"]
+    assert operation["op"] == "change_key"
+    assert operation["decision"] == "invert_steering_strength"
+    assert "-8000" in operation["diff"]
+    assert json.loads(controller.read_text())["Steering effects strength"] == 8000
+    assert [p.name for p in controller_dir.iterdir()] == ["Controller.JSON"]
+
+
+def test_revert_restores_original_after_two_runs(tmp_path, monkeypatch):
+    game_path = tmp_path / "rf5"
+    controller_dir = game_path / "UserData" / "player"
+    controller_dir.mkdir(parents=True)
+    controller = controller_dir / "Controller.JSON"
+    original = json.dumps({"Steering effects strength": 8000})
+    controller.write_text(original)
+    monkeypatch.setattr("offbgamessettings.console_ui.ask_user", lambda prompt: "y")
+
+    Rfactor2Configurator("365960", "rFactor 2", str(game_path)).check_and_configure()
+    # A second run inverts the value back: the original must not be lost
+    Rfactor2Configurator("365960", "rFactor 2", str(game_path)).check_and_configure()
+
+    res = Rfactor2Configurator(
+        "365960", "rFactor 2", str(game_path)
+    ).revert_configuration()
+    assert res["status"] == "RESTORED"
+    assert controller.read_text() == original
+
+
+def test_probe_skips_parsing_configured_file(tmp_path, monkeypatch):
+    game_path = tmp_path / "rf6"
+    controller_dir = game_path / "UserData" / "player"
+    controller_dir.mkdir(parents=True)
+    controller = controller_dir / "Controller.JSON"
+    controller.write_text('{\n  "Other": 1,\n  "Steering effects strength": -8000\n}')
+
+    cfg = Rfactor2Configurator("365960", "rFactor 2", str(game_path))
+    assert cfg.probe() is True
+
+    def fail(*args):
+        raise AssertionError("the file must not be parsed")
+
+    monkeypatch.setattr("offbgamessettings.json_patch.find_spans", fail)
+    assert cfg.get_pending_decisions() == []
+    assert cfg.check_and_configure()["status"] == "OK"
+
+
+def test_probe_is_inconclusive_when_in_doubt(tmp_path):
+    game_path = tmp_path / "rf7"
+    controller_dir = game_path / "UserData" / "player"
+    controller_dir.mkdir(parents=True)
+    controller = controller_dir / "Controller.JSON"
+    cfg = Rfactor2Configurator("365960", "rFactor 2", str(game_path))
+
+    assert cfg.probe() is False  # missing file
+    controller.write_bytes(b"")
+    assert cfg.probe() is False
+    controller.write_text('{"Steering effects strength": 8000}')
+    assert cfg.probe() is False
+    # Duplicated key: the last one wins when parsed
+    controller.write_text(
+        '{"Steering effects strength": -1, "Steering effects strength": 1}'
+    )
+    assert cfg.probe() is False
+
+
+def test_inversion_keeps_file_formatting(tmp_path):
+    game_path = tmp_path / "rf8"
+    controller_dir = game_path / "UserData" / "player"
+    controller_dir.mkdir(parents=True)
+    controller = controller_dir / "Controller.JSON"
+    original = '{\n"Zeta":1,\n"Steering effects strength":8000,\n"Alpha" : [1,2]\n}\n'
+    controller.write_text(original)
+
+    cfg = Rfactor2Configurator("365960", "rFactor 2", str(game_path))
+    cfg.set_answers({"invert_steering_strength": True})
+    assert cfg.check_and_configure()["status"] == "MODIFIED"
+    assert controller.read_text() == original.replace("8000", "-8000")
@@ -0,0 +1,184 @@
+import pytest
+
+from offbgamessettings.game_configurators import base_configurator, rules
+from offbgamessettings.game_configurators.factory import ConfiguratorFactory
+from offbgamessettings.game_configurators.rule_set_configurator import (
+    RuleSetConfigurator,
+)
+from offbgamessettings.game_configurators.rules import (
+    FileExists,
+    IniKeyEquals,
+    JsonKeyNegative,
+    RuleSet,
+    XmlNodeExists,
+)
+
+DEVICES = ("input", "devices.xml")
+
+
+def device_rule(device_id, **kwargs):
+    return XmlNodeExists(DEVICES, "device", {"id": device_id}, **kwargs)
+
+
+def test_rules_of_a_file_share_one_read_parse_and_write(tmp_path, monkeypatch):
+    (tmp_path / "input").mkdir()
+    devices = tmp_path / "input" / "devices.xml"
+    devices.write_bytes(b"<devices>\n  <device id='{A}'/>\n</devices>\n")
+    rule_set = RuleSet(
+        "Game", [device_rule("{A}"), device_rule("{B}"), device_rule("{C}")]
+    )
+
+    parses = []
+    writes = []
+    fromstring = rules.ET.fromstring
+    atomic_write = base_configurator.atomic_write
+    monkeypatch.setattr(
+        rules.ET, "fromstring", lambda text: parses.append(1) or fromstring(text)
+    )
+    monkeypatch.setattr(
+        base_configurator,
+        "atomic_write",
+        lambda path, *args, **kwargs: writes.append(path)
+        or atomic_write(path, *args, **kwargs),
+    )
+
+    res = RuleSetConfigurator(
+        "1", "Game", str(tmp_path), rule_set
+    ).check_and_configure()
+    assert res["status"] == "MODIFIED"
+    assert [log["status"] for log in res["logs"]] == [
+        "OK",
+        "INFO",
+        "MODIFIED",
+        "MODIFIED",
+    ]
+    # One parse to check the rules, one to verify the patched file
+    assert len(parses) == 2
+    assert writes == [str(devices)]
+    assert devices.read_bytes() == (
+        b"<devices>\n  <device id='{A}'/>\n"
+        b'  <device id="{B}" />\n  <device id="{C}" />\n</devices>\n'
+    )
+
+
+def test_decisions_evaluation_is_reused(tmp_path, monkeypatch):
+    (tmp_path / "cfg").mkdir()
+    settings = tmp_path / "cfg" / "settings.ini"
+    settings.write_bytes(b"[Input]\r\nForceFeedback=0\r\n")
+    rule_set = RuleSet(
+        "Game",
+        [
+            IniKeyEquals(
+                ("cfg", "settings.ini"),
+                "Input",
+                "ForceFeedback",
+                1,
+                decision="enable_ffb",
+                prompt="Enable force feedback?",
+            ),
+            IniKeyEquals(("cfg", "settings.ini"), "Input", "Device", "OpenFFBoard"),
+        ],
+    )
+    cfg = RuleSetConfigurator("1", "Game", str(tmp_path), rule_set)
+
+    decisions = cfg.get_pending_decisions()
+    assert [d["id"] for d in decisions] == ["enable_ffb"]
+    cfg.set_answers({"enable_ffb": True})
+
+    def fail(*args):
+        raise AssertionError("the file must not be checked again")
+
+    monkeypatch.setattr(cfg, "_evaluate_target", fail)
+    assert cfg.check_and_configure()["status"] == "MODIFIED"
+    assert settings.read_bytes() == (
+        b"[Input]\r\nForceFeedback=1\r\nDevice=OpenFFBoard\r\n"
+    )
+
+
+def test_declined_change_leaves_other_rules_applied(tmp_path):
+    (tmp_path / "cfg").mkdir()
+    settings = tmp_path / "cfg" / "settings.ini"
+    settings.write_bytes(b"[Input]\nForceFeedback=0\n")
+    rule_set = RuleSet(
+        "Game",
+        [
+            IniKeyEquals(
+                ("cfg", "settings.ini"), "Input", "ForceFeedback", 1, decision="ffb"
+            ),
+            IniKeyEquals(("cfg", "settings.ini"), "Input", "Device", "OpenFFBoard"),
+        ],
+    )
+    cfg = RuleSetConfigurator("1", "Game", str(tmp_path), rule_set)
+    cfg.set_answers({"ffb": False})
+    assert cfg.check_and_configure()["status"] == "MODIFIED"
+    assert settings.read_bytes() == b"[Input]\nForceFeedback=0\nDevice=OpenFFBoard\n"
+
+
+def test_created_file_and_missing_directory(tmp_path):
+    rule_set = RuleSet(
+        "Game", [FileExists(("maps", "wheel.xml"), "<map />", name="Action map")]
+    )
+    cfg = RuleSetConfigurator("1", "Game", str(tmp_path), rule_set)
+    res = cfg.plan()
+    assert res["status"] == "WARNING"
+    assert res["logs"][0]["message"] == "Maps directory not found."
+
+    (tmp_path / "maps").mkdir()
+    cfg = RuleSetConfigurator("1", "Game", str(tmp_path), rule_set)
+    assert cfg.probe() is False
+    assert cfg.check_and_configure()["status"] == "MODIFIED"
+    assert (tmp_path / "maps" / "wheel.xml").read_bytes() == b"<map />"
+    assert RuleSetConfigurator("1", "Game", str(tmp_path), rule_set).probe() is True
+    assert (
+        RuleSetConfigurator(
+            "1", "Game", str(tmp_path), rule_set
+        ).revert_configuration()["status"]
+        == "NOT REQUIRED"
+    )
+
+
+def test_missing_required_file_stops_the_game(tmp_path):
+    (tmp_path / "maps").mkdir()
+    rule_set = RuleSet(
+        "Game",
+        [
+            device_rule("{A}", missing_message="devices.xml is missing."),
+            FileExists(("maps", "wheel.xml"), "<map />"),
+        ],
+    )
+    res = RuleSetConfigurator(
+        "1", "Game", str(tmp_path), rule_set
+    ).check_and_configure()
+    assert res == {
+        "status": "WARNING",
+        "logs": [{"status": "WARNING", "message": "devices.xml is missing."}],
+    }
+    assert not (tmp_path / "maps" / "wheel.xml").exists()
+
+
+def test_rule_set_rejects_mixed_formats():
+    with pytest.raises(ValueError):
+        RuleSet(
+            "Game",
+            [
+                IniKeyEquals(("a.cfg",), "S", "k", 1),
+                JsonKeyNegative(("a.cfg",), ("k",)),
+            ],
+        )
+
+
+def test_incomplete_rules_and_documents_cannot_be_instantiated():
+    class Incomplete(rules.Rule):
+        def check(self, document):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete(("a.cfg",))
+    with pytest.raises(TypeError):
+        rules.Document(b"", [])
+
+
+def test_factory_maps_rule_sets_to_the_generic_configurator():
+    cfg = ConfiguratorFactory.get_configurator("365960", "rFactor 2", "/tmp")
+    assert isinstance(cfg, RuleSetConfigurator)
+    assert cfg.rule_set.name == "rFactor 2"
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import offbgamessettings
+
+# Import budget of the package itself, on top of `argparse` (microseconds).
+# Generous, to leave room for slow machines: a regression that pulls the
+# configurators or `vdf` back into the startup path shows up in the module
+# checks below first.
+STARTUP_BUDGET_US = 40_000
+
+# Modules that must not be imported to parse the command line or answer
+# `status`
+LAZY_MODULES = (
+    "vdf",
+    "colorama",
+    "xml.etree.ElementTree",
+    "concurrent.futures",
+    "multiprocessing",
+    "ctypes",
+    "offbgamessettings.config_orchestrator",
+    "offbgamessettings.game_discovery",
+    "offbgamessettings.game_configurators",
+    "offbgamessettings.backup_store",
+)
+
+
+def _import_times(code, tmp_path):
+    """Runs `code` with `-X importtime` and returns the cumulative times."""
+    src = os.path.dirname(os.path.dirname(offbgamessettings.__file__))
+    env = dict(
+        os.environ,
+        PYTHONPATH=src,
+        XDG_CACHE_HOME=str(tmp_path),
+        LOCALAPPDATA=str(tmp_path),
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=str(tmp_path),
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import offbgamessettings.__main__",
+        "from offbgamessettings.__main__ import main; main(['status'])",
+    ],
+)
+def test_startup_imports_only_what_is_needed(tmp_path, code):
+    times = _import_times(code, tmp_path)
+    assert "offbgamessettings.__main__" in times
+
+    eager = [name for name in times if name.startswith(LAZY_MODULES)]
+    assert eager == []
+
+
+def test_startup_time_budget(tmp_path):
+    times = _import_times("import offbgamessettings.__main__", tmp_path)
+    package_time = times["offbgamessettings.__main__"] - times.get("argparse", 0)
+    assert package_time < STARTUP_BUDGET_US
+
+
+def test_discovery_functions_are_imported_on_first_use():
+    assert callable(offbgamessettings.iter_sim_racing_games)
+    assert "get_sim_racing_game_folders" in dir(offbgamessettings)
+    with pytest.raises(AttributeError):
+        offbgamessettings.missing_attribute
@@ -0,0 +1,76 @@
+import json
+import os
+
+from offbgamessettings import config_orchestrator, tracing
+from offbgamessettings.decisions import DecisionPolicy
+from offbgamessettings.game_discovery import iter_sim_racing_games
+from offbgamessettings.synthetic_steam import build_steam_tree
+
+
+def test_discovery_finds_every_valid_game_once(tmp_path):
+    root = str(tmp_path / "Steam")
+    tree = build_steam_tree(root, libraries=4, manifests=60, broken=0.2, seed=3)
+
+    assert tree["manifests"] == 60
+    assert tree["broken"] == 12
+    games = dict(iter_sim_racing_games(steam_path=root))
+    # Damaged manifests and aliased libraries yield nothing more
+    found = {app_id: os.path.realpath(data["path"]) for app_id, data in games.items()}
+    assert found == {
+        app_id: os.path.realpath(path) for app_id, path in tree["games"].items()
+    }
+
+
+def test_aliased_library_is_scanned_once(tmp_path):
+    root = str(tmp_path / "Steam")
+    tree = build_steam_tree(root, libraries=3, manifests=40, broken=0, seed=6)
+    assert os.path.islink(os.path.join(root, "links", "alias"))
+
+    tracer = tracing.start()
+    try:
+        app_ids = [app_id for app_id, _ in iter_sim_racing_games(steam_path=root)]
+    finally:
+        tracing.stop()
+    scanned = [
+        os.path.realpath(event["args"]["path"])
+        for event in tracer.events
+        if event["name"] == "scan library"
+    ]
+    # The alias is listed too, but points to a library already listed
+    libraries = {os.path.realpath(path) for path in tree["libraries"]}
+    assert len(libraries) == len(tree["libraries"]) - 1
+    assert sorted(scanned) == sorted(libraries)
+    assert sorted(app_ids) == sorted(tree["games"])
+
+
+def test_generation_is_deterministic(tmp_path):
+    a = build_steam_tree(str(tmp_path / "a"), manifests=15, symlinks=False, seed=1)
+    b = build_steam_tree(str(tmp_path / "b"), manifests=15, symlinks=False, seed=1)
+    path = os.path.join("UserData", "player", "Controller.JSON")
+    with open(os.path.join(a["games"]["365960"], path), "rb") as f:
+        content_a = f.read()
+    with open(os.path.join(b["games"]["365960"], path), "rb") as f:
+        assert f.read() == content_a
+
+
+def test_generated_games_can_be_configured_and_reverted(tmp_path):
+    root = str(tmp_path / "Steam")
+    tree = build_steam_tree(root, devices=200, controller_keys=300, seed=5)
+    games = dict(iter_sim_racing_games(steam_path=root))
+
+    results = config_orchestrator.check_and_configure_games(
+        games, policy=DecisionPolicy(default=True), interactive=False
+    )
+    assert results["DiRT Rally 2.0"]["status"] == "MODIFIED"
+    assert results["EA SPORTS WRC"]["status"] == "MODIFIED"
+    assert results["rFactor 2"]["status"] == "MODIFIED"
+    controller = os.path.join(
+        tree["games"]["365960"], "UserData", "player", "Controller.JSON"
+    )
+    with open(controller, encoding="utf-8") as f:
+        assert json.load(f)["Steering effects strength"] == -8000
+
+    results = config_orchestrator.revert_configurations(games)
+    assert results["rFactor 2"]["status"] == "RESTORED"
+    with open(controller, encoding="utf-8") as f:
+        assert json.load(f)["Steering effects strength"] == 8000
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from offbgamessettings import tracing
+from offbgamessettings.benchmark import time_phases
+from offbgamessettings.synthetic_steam import build_steam_tree
+
+
+@pytest.fixture
+def tracer():
+    tracer = tracing.start()
+    yield tracer
+    tracing.stop()
+
+
+def test_disabled_tracing_records_nothing():
+    @tracing.traced("double")
+    def double(x):
+        return 2 * x
+
+    assert not tracing.enabled()
+    assert tracing.span("a") is tracing.span("b")
+    with tracing.span("a", path="/x"):
+        assert double(2) == 4
+
+
+def test_spans_cover_discovery_configurators_and_backups(tmp_path, tracer):
+    root = str(tmp_path / "Steam")
+    build_steam_tree(root, libraries=2, manifests=30, seed=2)
+    time_phases(root)
+
+    names = {event["name"] for event in tracer.events}
+    for name in (
+        "parse libraryfolders.vdf",
+        "scan library",
+        "read manifest",
+        "plan_configurations",
+        "check_and_configure_games",
+        "configure: rFactor 2",
+        "evaluate",
+        "apply",
+        "backup",
+        "atomic_write",
+        "restore",
+    ):
+        assert name in names
+
+    count = len(tracer.events)
+    path = tmp_path / "trace.json"
+    tracer.write(str(path))
+    trace = json.loads(path.read_text())
+    spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert len(spans) == count
+    assert all(span["dur"] >= 0 for span in spans)
+    # Each thread is named
+    assert {e["tid"] for e in trace["traceEvents"] if e["ph"] == "M"} == {
+        span["tid"] for span in spans
+    }
+
+
+def test_memory_peaks_include_nested_spans():
+    tracer = tracing.start(memory=True)
+    try:
+        with tracing.span("outer"):
+            with tracing.span("inner"):
+                data = bytearray(4 * 1024 * 1024)
+                del data
+            with tracing.span("small"):
+                pass
+    finally:
+        tracing.stop()
+
+    peaks = {event["name"]: event["args"]["peak_kib"] for event in tracer.events}
+    assert peaks["inner"] >= 4096
+    assert peaks["outer"] >= peaks["inner"]
+    assert peaks["small"] < 1024
+
+
+def test_fleet_workers_are_traced(tmp_path):
+    from offbgamessettings.__main__ import main
+
+    roots = []
+    for seed in (1, 2):
+        roots.append(str(tmp_path / f"rig{seed}"))
+        build_steam_tree(roots[-1], manifests=15, seed=seed)
+    path = tmp_path / "trace.json"
+    main(["fleet", "--root", *roots, "--yes", "--profile", str(path)])
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert not tracing.enabled()
+    assert {e["args"]["root"] for e in events if e["name"] == "process_root"} == set(
+        roots
+    )
+    assert any(e["name"] == "fleet" for e in events)
+    assert any(e["name"] == "configure: rFactor 2" for e in events)
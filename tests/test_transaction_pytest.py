@@ -0,0 +1,193 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from offbgamessettings import config_orchestrator, transaction
+from offbgamessettings.game_configurators.rule_set_configurator import (
+    RuleSetConfigurator,
+)
+from offbgamessettings.transaction import Transaction, recover
+
+
+def files_in(path):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), path)
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def test_commit_writes_all_files_and_leaves_no_journal(tmp_path):
+    journal_dir = tmp_path / "journal"
+    (tmp_path / "a.txt").write_bytes(b"old")
+    (tmp_path / "same.txt").write_bytes(b"same")
+
+    txn = Transaction(str(journal_dir), "Game")
+    txn.stage(str(tmp_path / "a.txt"), b"new")
+    txn.stage(str(tmp_path / "b.txt"), b"created")
+    txn.stage(str(tmp_path / "same.txt"), b"same")
+    # Nothing is written before the commit
+    assert not (tmp_path / "b.txt").exists()
+
+    written = txn.commit()
+    assert written == [str(tmp_path / "a.txt"), str(tmp_path / "b.txt")]
+    assert (tmp_path / "a.txt").read_bytes() == b"new"
+    assert (tmp_path / "b.txt").read_bytes() == b"created"
+    assert files_in(tmp_path) == ["a.txt", "b.txt", "same.txt"]
+    assert len(txn) == 0
+
+
+def test_failed_commit_rolls_back_every_file(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_bytes(b"old a")
+    (tmp_path / "c.txt").write_bytes(b"old c")
+    txn = Transaction(str(tmp_path / "journal"))
+    for name in ("a.txt", "b.txt", "c.txt"):
+        txn.stage(str(tmp_path / name), b"new")
+
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        if dst.endswith("c.txt"):
+            raise OSError("disk full")
+        replace(src, dst)
+
+    monkeypatch.setattr(transaction.os, "replace", failing_replace)
+    with pytest.raises(OSError, match="disk full"):
+        txn.commit()
+
+    # The replaced file is restored, the created one deleted
+    assert (tmp_path / "a.txt").read_bytes() == b"old a"
+    assert (tmp_path / "c.txt").read_bytes() == b"old c"
+    assert files_in(tmp_path) == ["a.txt", "c.txt"]
+    assert len(txn) == 3
+
+
+def test_crashed_commit_is_recovered(tmp_path):
+    journal_dir = tmp_path / "journal"
+    game = tmp_path / "game"
+    game.mkdir()
+    (game / "a.txt").write_bytes(b"old a")
+    (game / "c.txt").write_bytes(b"old c")
+    # Crash after the second file is replaced
+    script = textwrap.dedent(
+        f"""
+        import os
+        from offbgamessettings import transaction
+
+        replace = os.replace
+        count = []
+
+        def crashing_replace(src, dst):
+            replace(src, dst)
+            if dst.startswith({str(game)!r}):
+                count.append(dst)
+                if len(count) == 2:
+                    os._exit(1)
+
+        transaction.os.replace = crashing_replace
+        txn = transaction.Transaction({str(journal_dir)!r}, "Game")
+        for name in ("a.txt", "b.txt", "c.txt"):
+            txn.stage(os.path.join({str(game)!r}, name), b"new")
+        txn.commit()
+        """
+    )
+    process = subprocess.run([sys.executable, "-c", script])
+    assert process.returncode == 1
+    assert (game / "a.txt").read_bytes() == b"new"
+    assert (game / "b.txt").read_bytes() == b"new"
+
+    recovered = recover(str(journal_dir))
+    assert [(entry["name"], entry["error"]) for entry in recovered] == [("Game", None)]
+    assert (game / "a.txt").read_bytes() == b"old a"
+    assert (game / "c.txt").read_bytes() == b"old c"
+    assert files_in(game) == ["a.txt", "c.txt"]
+    assert os.listdir(journal_dir) == []
+    assert recover(str(journal_dir)) == []
+
+
+def test_game_is_configured_all_or_nothing(tmp_path, monkeypatch):
+    game_path = tmp_path / "game"
+    (game_path / "input" / "devices").mkdir(parents=True)
+    (game_path / "input" / "actionmaps").mkdir(parents=True)
+    device_defines = game_path / "input" / "devices" / "device_defines.xml"
+    device_defines.write_bytes(b"<devices>\n</devices>\n")
+    original = device_defines.read_bytes()
+
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        if dst.endswith("openffboard.xml"):
+            raise OSError("read-only folder")
+        replace(src, dst)
+
+    monkeypatch.setattr(transaction.os, "replace", failing_replace)
+    games = {"690790": {"name": "DiRT Rally 2.0", "path": str(game_path)}}
+    results = config_orchestrator.check_and_configure_games(
+        games, journal_dir=str(tmp_path / "journal")
+    )
+
+    result = results["DiRT Rally 2.0"]
+    assert result["status"] == "ERROR"
+    assert "rolled back: read-only folder" in result["logs"][-1]["message"]
+    assert device_defines.read_bytes() == original
+    assert not (game_path / "input" / "actionmaps" / "openffboard.xml").exists()
+
+
+def dirt_game(tmp_path):
+    game_path = tmp_path / "game"
+    (game_path / "input" / "devices").mkdir(parents=True)
+    (game_path / "input" / "actionmaps").mkdir(parents=True)
+    device_defines = game_path / "input" / "devices" / "device_defines.xml"
+    device_defines.write_bytes(b"<devices>\n</devices>\n")
+    return game_path
+
+
+def snapshot(path):
+    return {name: (path / name).read_bytes() for name in files_in(path)}
+
+
+@pytest.mark.parametrize("failure", ["error", "exception"])
+def test_aborted_game_leaves_no_file_or_backup(tmp_path, monkeypatch, failure):
+    game_path = dirt_game(tmp_path)
+    action_map = game_path / "input" / "actionmaps" / "openffboard.xml"
+    if failure == "error":
+        # The second file of the game cannot be read
+        action_map.mkdir()
+    else:
+        apply_target = RuleSetConfigurator._apply_target
+
+        def crashing_apply_target(self, target):
+            if target["path"].endswith("openffboard.xml"):
+                raise RuntimeError("boom")
+            apply_target(self, target)
+
+        monkeypatch.setattr(RuleSetConfigurator, "_apply_target", crashing_apply_target)
+    before = snapshot(tmp_path)
+
+    games = {"690790": {"name": "DiRT Rally 2.0", "path": str(game_path)}}
+    results = config_orchestrator.check_and_configure_games(
+        games, journal_dir=str(tmp_path / "journal")
+    )
+
+    logs = [entry["message"] for entry in results["DiRT Rally 2.0"]["logs"]]
+    assert results["DiRT Rally 2.0"]["status"] == "ERROR"
+    assert logs[-1].startswith("Changes to device_defines.xml rolled back")
+    assert not any(message.startswith("Backup of") for message in logs)
+    # Neither the game files nor the backup store changed
+    assert snapshot(tmp_path) == before
+
+
+def test_committed_game_is_backed_up(tmp_path):
+    game_path = dirt_game(tmp_path)
+    games = {"690790": {"name": "DiRT Rally 2.0", "path": str(game_path)}}
+    results = config_orchestrator.check_and_configure_games(
+        games, journal_dir=str(tmp_path / "journal")
+    )
+
+    logs = [entry["message"] for entry in results["DiRT Rally 2.0"]["logs"]]
+    assert results["DiRT Rally 2.0"]["status"] == "MODIFIED"
+    assert logs.count("Backup of device_defines.xml created.") == 1
+    assert any("offb_settings_backups" in name for name in files_in(tmp_path))
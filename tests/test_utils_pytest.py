@@ -1,21 +1,68 @@
-from offbgamessettings.utils import backup_file
+import os
+import stat
 
+import pytest
 
-def test_backup_file_nonexistent(tmp_path):
-    path = tmp_path / "does_not_exist.txt"
-    assert backup_file(str(path)) is False
+from offbgamessettings import utils
+from offbgamessettings.utils import atomic_write, unified_diff
 
 
-def test_backup_file_success(tmp_path):
-    f = tmp_path / "myfile.txt"
-    f.write_text("hello")
+def test_unified_diff():
+    diff = unified_diff("dir/file.txt", b"a\nb\n", b"a\nc\n")
+    assert "--- a/dir/file.txt" in diff
+    assert "-b\n" in diff and "+c\n" in diff
+    assert unified_diff("f", b"same", b"same") == ""
+    assert unified_diff("f", None, b"new").startswith("--- /dev/null")
 
-    assert backup_file(str(f)) is True
 
-    bak = tmp_path / "myfile.txt.bak_offb_settings"
-    assert bak.exists()
-    assert bak.read_text() == "hello"
+def test_atomic_write_skips_identical_content(tmp_path):
+    f = tmp_path / "config.xml"
+    assert atomic_write(str(f), b"<a/>") is True
+    assert f.read_bytes() == b"<a/>"
 
-    # cleanup
-    bak.unlink()
-    f.unlink()
+    inode = f.stat().st_ino
+    assert atomic_write(str(f), b"<a/>") is False
+    # The file was not replaced
+    assert f.stat().st_ino == inode
+
+    assert atomic_write(str(f), b"<b/>") is True
+    assert f.read_bytes() == b"<b/>"
+    assert [p.name for p in tmp_path.iterdir()] == ["config.xml"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_atomic_write_modes(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_umask", 0o022)
+    created = tmp_path / "created.prom"
+    atomic_write(str(created), b"1")
+    # Like open(), not the 0600 of the temporary file
+    assert stat.S_IMODE(created.stat().st_mode) == 0o644
+
+    existing = tmp_path / "existing.cfg"
+    existing.write_bytes(b"old")
+    existing.chmod(0o640)
+    atomic_write(str(existing), b"new")
+    assert stat.S_IMODE(existing.stat().st_mode) == 0o640
+
+
+def test_atomic_write_failure_keeps_original(tmp_path, monkeypatch):
+    f = tmp_path / "Controller.JSON"
+    f.write_bytes(b"original")
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(utils.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        utils.atomic_write(str(f), b"new content")
+
+    assert f.read_bytes() == b"original"
+    assert [p.name for p in tmp_path.iterdir()] == ["Controller.JSON"]
+
+
+def test_deferred_directory_sync(tmp_path):
+    utils.sync_pending_directories()
+    utils.atomic_write(str(tmp_path / "a"), b"1", defer_directory_sync=True)
+    utils.atomic_write(str(tmp_path / "b"), b"2", defer_directory_sync=True)
+    assert utils.sync_pending_directories() == 1
+    assert utils.sync_pending_directories() == 0
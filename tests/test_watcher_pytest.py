@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from offbgamessettings import ledger, watcher
+
+
+class ScriptedWatcher:
+    """Returns a predefined sequence of change sets, then stops the loop."""
+
+    def __init__(self, batches, stop=None):
+        self.batches = list(batches)
+        self.stop = stop
+        self.closed = False
+
+    def wait(self, timeout=None):
+        if self.batches:
+            return self.batches.pop(0)
+        if self.stop is not None:
+            self.stop.set()
+        return set()
+
+    def close(self):
+        self.closed = True
+
+
+def _replace(path, content):
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def test_polling_watcher_detects_changes(tmp_path):
+    watched = tmp_path / "device_defines.xml"
+    watched.write_text("<devices />")
+    poller = watcher.PollingWatcher([str(watched)], interval=0.01)
+
+    assert poller.wait(timeout=0.05) == set()
+    _replace(watched, "<devices></devices>")
+    assert poller.wait(timeout=1) == {str(watched)}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+def test_inotify_watcher_detects_replaced_and_created_files(tmp_path):
+    watched = tmp_path / "device_defines.xml"
+    watched.write_text("<devices />")
+    missing = tmp_path / "actionmaps" / "openffboard.xml"
+    notifier = watcher.InotifyWatcher([str(watched), str(missing)])
+    try:
+        (tmp_path / "unrelated.txt").write_text("x")
+        assert notifier.wait(timeout=0.05) == set()
+
+        _replace(watched, "<devices></devices>")
+        assert notifier.wait(timeout=1) == {str(watched)}
+
+        missing.parent.mkdir()
+        assert notifier.wait(timeout=1) == {str(missing)}
+        missing.write_text("<action_map />")
+        assert notifier.wait(timeout=1) == {str(missing)}
+    finally:
+        notifier.close()
+
+
+def test_wait_for_batch_merges_a_burst():
+    scripted = ScriptedWatcher([{"a"}, {"b"}, {"a"}, set(), {"c"}])
+    assert watcher.wait_for_batch(scripted, debounce=0) == {"a", "b"}
+    assert watcher.wait_for_batch(scripted, debounce=0) == {"c"}
+
+
+@pytest.mark.parametrize(
+    "flags, complete", [("4", True), ("6", False), ("1026", False), ("1540", False)]
+)
+def test_is_update_complete(tmp_path, flags, complete):
+    manifest = tmp_path / "appmanifest_690790.acf"
+    manifest.write_text(f'"AppState"\n{{\n\t"StateFlags"\t\t"{flags}"\n}}\n')
+    assert watcher.is_update_complete(str(manifest)) is complete
+
+
+def test_watch_games_reruns_only_affected_games(tmp_path, monkeypatch):
+    files = {}
+    games = {}
+    for app_id, name in (("690790", "DiRT Rally 2.0"), ("365960", "rFactor 2")):
+        files[app_id] = tmp_path / f"{app_id}.cfg"
+        files[app_id].write_text("configured")
+        games[app_id] = {"name": name, "path": str(tmp_path / app_id)}
+
+    runs = []
+
+    def fake_get_configurator(app_id, name, path):
+        def check_and_configure():
+            runs.append(app_id)
+            files[app_id].write_text("configured")
+            return {"status": "MODIFIED", "logs": []}
+
+        return SimpleNamespace(
+            managed_files=lambda: [str(files[app_id])],
+            probe=lambda: files[app_id].read_text() == "configured",
+            get_pending_decisions=lambda: [],
+            check_and_configure=check_and_configure,
+        )
+
+    monkeypatch.setattr(
+        "offbgamessettings.watcher.ConfiguratorFactory.get_configurator",
+        fake_get_configurator,
+    )
+    monkeypatch.setattr(
+        "offbgamessettings.config_orchestrator.ConfiguratorFactory.get_configurator",
+        fake_get_configurator,
+    )
+
+    book = ledger.Ledger()
+    for app_id, game_data in games.items():
+        book.record(app_id, game_data, [str(files[app_id])], True, "MODIFIED")
+
+    # A game update overwrites DiRT's file, then the tool rewrites it
+    files["690790"].write_text("vanilla")
+    stop = threading.Event()
+    scripted = ScriptedWatcher(
+        [{str(files["690790"])}, set(), {str(files["690790"])}, set()], stop=stop
+    )
+    results = []
+    count = watcher.watch_games(
+        games, book, on_results=results.append, stop=stop, watcher=scripted
+    )
+
+    assert runs == ["690790"]
+    assert count == 1
+    assert results[0]["DiRT Rally 2.0"]["status"] == "MODIFIED"
+    assert book.check("690790")[0]
+    assert scripted.closed
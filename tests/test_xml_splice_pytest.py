@@ -0,0 +1,64 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from offbgamessettings.xml_splice import SpliceError, append_child, append_children
+
+DEVICE = ET.Element("device", {"id": "{X}", "name": "openffboard"})
+
+
+def test_splice_keeps_formatting_and_comments():
+    content = (
+        b'<?xml version="1.0" encoding="utf-8"?>\r\n'
+        b"<!-- vanilla file -->\r\n"
+        b"<devices>\r\n"
+        b'\t<device id="{A}" name="wheel"   type="wheel"/>\r\n'
+        b"\t<!-- comment -->\r\n"
+        b"</devices>\r\n"
+    )
+    new_content, root = append_child(content, DEVICE)
+    assert new_content == content.replace(
+        b"</devices>",
+        b'\t<device id="{X}" name="openffboard" />\r\n</devices>',
+    )
+    assert [child.get("id") for child in root] == ["{A}", "{X}"]
+
+
+def test_splice_indents_first_child():
+    content = b"<devices>\n</devices>\n"
+    new_content, _ = append_child(content, DEVICE)
+    assert new_content == (
+        b'<devices>\n  <device id="{X}" name="openffboard" />\n</devices>\n'
+    )
+
+
+def test_splice_inline_and_self_closing_roots():
+    new_content, _ = append_child(b"<devices><device id='{A}'/></devices>", DEVICE)
+    assert new_content == (
+        b"<devices><device id='{A}'/>"
+        b'<device id="{X}" name="openffboard" /></devices>'
+    )
+
+    new_content, _ = append_child(b'<devices version="2" />', DEVICE)
+    assert new_content == (
+        b'<devices version="2"><device id="{X}" name="openffboard" /></devices>'
+    )
+
+
+def test_splice_rejects_unsupported_documents():
+    with pytest.raises(SpliceError):
+        append_child("<devices></devices>".encode("utf-16"), DEVICE)
+    with pytest.raises(SpliceError):
+        append_child(b"<devices><device></devices>", DEVICE)
+
+
+def test_splice_several_children_at_once():
+    content = b"<devices>\r\n  <device id='{A}'/>\r\n</devices>\r\n"
+    other = ET.Element("device", {"id": "{Y}"})
+    new_content, root = append_children(content, [DEVICE, other])
+    assert new_content == (
+        b"<devices>\r\n  <device id='{A}'/>\r\n"
+        b'  <device id="{X}" name="openffboard" />\r\n'
+        b'  <device id="{Y}" />\r\n</devices>\r\n'
+    )
+    assert [child.get("id") for child in root] == ["{A}", "{X}", "{Y}"]